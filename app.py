@@ -1,29 +1,31 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
-from datetime import datetime, timedelta
-import plotly.express as px
-import plotly.graph_objects as go
-from news_collector import NegativeNewsCollector
+from datetime import datetime, timezone
+from news_store import NewsReader, DEFAULT_DB_PATH
+from news_snapshots import SnapshotStore, load_snapshots
+from collection_lease import CollectionBusyError
 import os
 import time
 import threading
 
-# Download NLTK data on first run (needed for TextBlob)
-import nltk
-import ssl
+# The read-only dashboard path below never imports the collectors, NLTK or
+# TextBlob. They are loaded on demand when a refresh button is clicked.
 
-# Handle SSL certificate issues
-try:
-    _create_unverified_https_context = ssl._create_unverified_context
-except AttributeError:
-    pass
-else:
-    ssl._create_default_https_context = _create_unverified_https_context
-
-# Download required NLTK data
+# Download required NLTK data (needed for TextBlob) - only before collecting
 @st.cache_resource
 def download_nltk_data():
+    import nltk
+    import ssl
+    
+    # Handle SSL certificate issues
+    try:
+        _create_unverified_https_context = ssl._create_unverified_context
+    except AttributeError:
+        pass
+    else:
+        ssl._create_default_https_context = _create_unverified_https_context
+    
     try:
         nltk.data.find('tokenizers/punkt')
     except LookupError:
@@ -34,8 +36,6 @@ def download_nltk_data():
         nltk.download('vader_lexicon', quiet=True)
     return True
 
-download_nltk_data()
-
 # Page configuration
 st.set_page_config(
     page_title="Negative Business News Tracker",
@@ -44,14 +44,46 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize news collector
+# Database path (on Modal NEWS_DB_PATH points at a local copy of the daemon's published snapshot)
+db_path = DEFAULT_DB_PATH
+# Set on Modal: the dashboard's writes are queued for the ingest daemon, the
+# only process that writes (and commits) the shared database
+write_queue_name = os.getenv("NEWS_WRITE_QUEUE")
+
+def queue_write(request):
+    """Hand a write request to the ingest daemon's queue"""
+    import modal
+    modal.Queue.from_name(write_queue_name).put(request)
+
+# Read-only access for rendering - no schema setup, no NLP imports
+@st.cache_resource
+def get_news_reader():
+    return NewsReader(db_path)
+
+reader = get_news_reader()
+
+# Bumped by every save that adds articles. Cached data below is keyed on it,
+# so reruns reuse it until new articles actually land
+data_version = reader.ingest_version()
+
+@st.cache_resource
+def get_snapshot_store():
+    return SnapshotStore(db_path)
+
+# Initialize news collector lazily, only when a collection is requested
 @st.cache_resource
 def get_news_collector():
-    # Use local database path
-    db_path = "news_data.db"
+    download_nltk_data()
+    from news_collector import NegativeNewsCollector
     return NegativeNewsCollector(db_path)
 
-collector = get_news_collector()
+# Prometheus endpoint for collections triggered from this process (opt-in via COLLECTOR_METRICS_PORT)
+@st.cache_resource
+def start_collector_metrics():
+    from collector_metrics import maybe_start_metrics_server
+    return maybe_start_metrics_server()
+
+start_collector_metrics()
 
 # Modern 2025 color scheme - CSS variables
 st.markdown("""
@@ -119,88 +151,266 @@ sentiment_range = st.sidebar.slider(
 # Keyword filter
 keyword_filter = st.sidebar.text_input("Filter by keyword (optional)")
 
-st.sidebar.markdown("**⚡ Real-time Mode**")
-st.sidebar.write(f"Last update: {datetime.now().strftime('%H:%M:%S')}")
+# Company filter: companies are extracted at ingest and indexed
+@st.cache_data(ttl=1800)
+def load_company_counts(days_back, version):
+    return reader.company_counts(days_back, limit=200)
+
+company_counts = load_company_counts(days, data_version['version'])
+company_options = ["All companies"] + list(company_counts)
+selected_company = st.sidebar.selectbox(
+    "🏢 Company",
+    company_options,
+    format_func=lambda company: company if company not in company_counts else f"{company} ({company_counts[company]})"
+)
 
-# Simple auto-refresh with meta tag
-auto_refresh = st.sidebar.selectbox(
-    "Auto-refresh interval:",
-    ["Off", "5 minutes", "10 minutes", "30 minutes"],
-    index=0
+# Watchlists are standing queries matched at ingest; selecting one reads its matches
+@st.cache_data(ttl=60)
+def load_watchlists():
+    return reader.get_watchlists()
+
+with st.sidebar.expander("💾 Save current filters as a watchlist"):
+    from news_schema import KEYWORD_CATEGORIES, categories_for_keywords
+    watchlist_name = st.text_input("Watchlist name")
+    # Watchlists match the stored crisis categories, each of which groups several crisis types
+    watchlist_categories = st.multiselect(
+        "Crisis categories",
+        sorted(KEYWORD_CATEGORIES),
+        default=categories_for_keywords(crisis_types),
+        help="Preset from the selected crisis types (e.g. fraud and lawsuit fall under legal_troubles)"
+    )
+    if st.button("Save watchlist"):
+        from watchlists import Watchlist, check_watchlist, create_watchlist_tables, save_watchlist
+        if sentiment_range[0] > -1.0:
+            # Watchlists only bound sentiment from above
+            st.error("A watchlist can't keep a minimum sentiment; move the lower end of the range back to -1.0 to save it.")
+        else:
+            try:
+                watchlist = Watchlist(
+                    watchlist_name,
+                    keywords=[keyword_filter] if keyword_filter else [],
+                    categories=watchlist_categories,
+                    companies=[selected_company] if selected_company != "All companies" else [],
+                    max_sentiment=sentiment_range[1] if sentiment_range[1] < 1.0 else None
+                )
+                if write_queue_name:
+                    check_watchlist(watchlist)
+                    queue_write({'op': 'save_watchlist', 'watchlist': watchlist.as_dict()})
+                    st.success(f"Queued '{watchlist.name}'. It appears in the list within a minute or two.")
+                else:
+                    conn = sqlite3.connect(db_path)
+                    try:
+                        create_watchlist_tables(conn)
+                        save_watchlist(conn, watchlist)
+                    finally:
+                        conn.close()
+                    load_watchlists.clear()
+                    st.success(f"Saved '{watchlist.name}'. New matching articles are queued as they are collected.")
+            except Exception as e:
+                st.error(f"Watchlist not saved: {e}")
+
+watchlists = {w['name']: w for w in load_watchlists()}
+selected_watchlist = st.sidebar.selectbox("👁️ Watchlist", ["None"] + list(watchlists))
+
+# Articles about the same event are clustered into stories at ingest
+group_stories = st.sidebar.checkbox("📚 Group related articles into stories", value=True)
+
+st.sidebar.markdown("**⚡ Real-time Mode**")
+if data_version['updated_at']:
+    st.sidebar.write(f"Last new articles: {datetime.fromtimestamp(data_version['updated_at']).strftime('%H:%M:%S')}")
+else:
+    st.sidebar.write(f"Last update: {datetime.now().strftime('%H:%M:%S')}")
+
+# Live updates: a fragment polls the ingest version and reruns the page only
+# when new articles have landed, instead of reloading it on a timer
+live_updates = st.sidebar.selectbox(
+    "Check for new articles:",
+    ["Off", "Every 30 seconds", "Every minute", "Every 5 minutes"],
+    index=2
 )
 
-if auto_refresh != "Off":
-    refresh_seconds = {
-        "5 minutes": 300,
-        "10 minutes": 600, 
-        "30 minutes": 1800
-    }[auto_refresh]
+new_articles = st.session_state.pop('new_articles', 0)
+if new_articles > 0:
+    st.toast(f"🆕 {new_articles} new articles")
+
+if live_updates != "Off":
+    poll_seconds = {
+        "Every 30 seconds": 30,
+        "Every minute": 60,
+        "Every 5 minutes": 300
+    }[live_updates]
+    
+    @st.fragment(run_every=poll_seconds)
+    def watch_for_new_articles():
+        latest = reader.ingest_version()
+        if latest['version'] != data_version['version']:
+            st.session_state.new_articles = latest['articles'] - data_version['articles']
+            st.rerun()
+        st.caption(f"🟢 Live • checked {datetime.now().strftime('%H:%M:%S')}")
     
-    st.markdown(f'<meta http-equiv="refresh" content="{refresh_seconds}">', unsafe_allow_html=True)
-    st.sidebar.success(f"🔄 Auto-refresh every {auto_refresh}")
+    with st.sidebar:
+        watch_for_new_articles()
 
 # Manual refresh button
 if st.sidebar.button("🔄 Refresh News Data"):
     with st.spinner("Fetching latest news..."):
         try:
-            # Quick update using standard collector
-            newsapi_key = os.getenv("NEWSAPI_KEY")
-            saved_count = collector.update_news(newsapi_key)
-            st.sidebar.success(f"Updated! Found {saved_count} new articles")
-            st.rerun()
+            if write_queue_name:
+                queue_write({'op': 'update_news'})
+                st.sidebar.info("Update queued; new articles show up live as they are saved")
+            else:
+                # Quick update using standard collector
+                newsapi_key = os.getenv("NEWSAPI_KEY")
+                collector = get_news_collector()
+                # Never block the page behind another collection
+                saved_count = collector.update_news(newsapi_key, wait=False)
+                st.sidebar.success(f"Updated! Found {saved_count} new articles")
+                st.rerun()
+        except CollectionBusyError as e:
+            st.sidebar.warning(f"Update skipped: {e}")
         except Exception as e:
             st.sidebar.error(f"Update failed: {e}")
 
 if st.sidebar.button("⚡ Fast Update (Local Sources)"):
     with st.spinner("Quick local news scan..."):
         try:
-            from fast_collector import FastNewsCollector
-            fast_collector = FastNewsCollector(collector.db_path) 
-            saved_count, total_collected, elapsed_time = fast_collector.fast_update(target_articles=30)
-            st.sidebar.success(f"⚡ {saved_count} new articles in {elapsed_time:.1f}s")
-            st.rerun()
+            if write_queue_name:
+                queue_write({'op': 'fast_update', 'target_articles': 30})
+                st.sidebar.info("Fast update queued; new articles show up live as they are saved")
+            else:
+                download_nltk_data()
+                from fast_collector import FastNewsCollector
+                fast_collector = FastNewsCollector(db_path)
+                saved_count, total_collected, elapsed_time = fast_collector.fast_update(target_articles=30, wait=False)
+                st.sidebar.success(f"⚡ {saved_count} new articles in {elapsed_time:.1f}s")
+                st.rerun()
+        except CollectionBusyError as e:
+            st.sidebar.warning(f"Fast update skipped: {e}")
         except Exception as e:
             st.sidebar.error(f"Fast update failed: {e}")
 
-# Get news data
-@st.cache_data(ttl=1800)  # Cache for 30 minutes
-def load_news_data(days_back):
-    return collector.get_recent_news(days_back)
+def format_time_ago(published_at, now):
+    """Compact age of an article from its UTC publish epoch"""
+    age = max(0, int(now - published_at))
+    if age >= 86400:
+        return f"{age // 86400}d ago"
+    if age > 3600:
+        return f"{age // 3600}h ago"
+    return f"{age // 60}m ago"
+
+# Get news data. Frames are cached as shared resources rather than pickled
+# per session, so snapshot-backed columns stay memory-mapped. ``version`` (the
+# ingest version) only keys the caches, so new articles replace them at once.
+@st.cache_resource(ttl=1800)  # Cache for 30 minutes
+def load_news_data(days_back, version):
+    if get_snapshot_store().is_current():
+        return load_snapshots(db_path, days_back)
+    return pd.DataFrame(reader.get_recent_news(days_back))
+
+@st.cache_data(ttl=1800)
+def load_crisis_article_ids(crisis_types, days_back, version):
+    return reader.article_ids_for_crisis_types(list(crisis_types), days_back)
+
+@st.cache_data(ttl=1800)
+def load_category_counts(days_back, version):
+    return reader.category_counts(days_back)
+
+@st.cache_data(ttl=1800)
+def load_company_article_ids(company, days_back, version):
+    return reader.article_ids_for_company(company, days_back)
+
+@st.cache_data(ttl=300)
+def load_watchlist_article_ids(watchlist_id, version):
+    return reader.article_ids_for_watchlist(watchlist_id)
 
 # Load data
-news_data = load_news_data(days)
+news_data = load_news_data(days, data_version['version'])
 
-if not news_data:
+if news_data.empty:
     st.warning("📭 No negative business news found for the selected time period.")
     st.info("👉 **First time setup:** Use the sidebar button '🔄 Update News' to collect initial articles (takes ~2-3 minutes)")
     st.info("Try expanding the time range or click the update button to refresh data.")
     st.stop()
 
-# Convert to DataFrame
-df = pd.DataFrame(news_data)
-df['created_at'] = pd.to_datetime(df['created_at'])
-df['published'] = pd.to_datetime(df['published'], errors='coerce')
-
-# Apply filters
-if sentiment_range:
-    df = df[(df['sentiment_score'] >= sentiment_range[0]) & 
-            (df['sentiment_score'] <= sentiment_range[1])]
-
-if keyword_filter:
-    mask = df.apply(lambda row: keyword_filter.lower() in row.astype(str).str.lower().str.cat(sep=' '), axis=1)
-    df = df[mask]
-
-# Apply crisis type filter (only if specific categories selected)
-if crisis_filter_mode == "Specific Categories" and crisis_types:
-    crisis_mask = df['negative_keywords'].str.lower().str.contains('|'.join(crisis_types), case=False, na=False)
-    df = df[crisis_mask]
-
-# Sort by newest to oldest (created_at first, then published)
-df = df.sort_values(['created_at', 'published'], ascending=[False, False])
+# Filtered views are memoized on the filter values plus the ingest version, so
+# a rerun that changes neither (e.g. a chart control) reuses the frames as they
+# are. They are shared between sessions and must not be modified.
+@st.cache_resource(ttl=1800, max_entries=32)
+def load_filtered_view(days_back, version, filters):
+    sentiment_range, keyword_filter, crisis_types, company, watchlist_id, group_stories = filters
+    df = load_news_data(days_back, version)
+    
+    # Apply filters
+    if sentiment_range:
+        df = df[(df['sentiment_score'] >= sentiment_range[0]) & 
+                (df['sentiment_score'] <= sentiment_range[1])]
+    
+    if keyword_filter:
+        mask = df.apply(lambda row: keyword_filter.lower() in row.astype(str).str.lower().str.cat(sep=' '), axis=1)
+        df = df[mask]
+    
+    # Apply crisis type filter (only if specific categories selected)
+    if crisis_types:
+        crisis_ids = load_crisis_article_ids(crisis_types, days_back, version)
+        if crisis_ids is None:
+            # Database predates the keyword link tables
+            crisis_mask = df['negative_keywords'].str.lower().str.contains('|'.join(crisis_types), case=False, na=False)
+        else:
+            crisis_mask = df['id'].isin(crisis_ids)
+        df = df[crisis_mask]
+    
+    # Apply company filter via the company index
+    if company != "All companies":
+        company_ids = load_company_article_ids(company, days_back, version)
+        if company_ids is not None:
+            df = df[df['id'].isin(company_ids)]
+    
+    # Apply watchlist filter from the matches recorded at ingest
+    if watchlist_id is not None:
+        df = df[df['id'].isin(load_watchlist_article_ids(watchlist_id, version))]
+    
+    # Sort by newest to oldest (published_at is a UTC epoch parsed at ingest)
+    df = df.sort_values('published_at', ascending=False)
+    
+    # Separate LinkedIn trending articles
+    linkedin_df = df[df['source'] == 'LinkedIn Trending'].head(10)
+    regular_df = df[df['source'] != 'LinkedIn Trending']
+    
+    # One card per story, led by its newest article; unclustered articles stand alone
+    story_coverage = {}
+    total_alerts = len(regular_df)
+    total_sources = regular_df['source'].nunique()
+    if group_stories and 'story_id' in regular_df.columns and len(regular_df) > 0:
+        story_df = regular_df.assign(story_key=regular_df['story_id'].fillna(-regular_df['id']).astype('int64'))
+        story_stats = story_df.groupby('story_key').agg(story_articles=('id', 'size'), story_sources=('source', 'nunique'))
+        for row in story_df[story_df.duplicated('story_key')].itertuples():
+            story_coverage.setdefault(row.story_key, []).append((row.title, row.link, row.source))
+        regular_df = story_df.drop_duplicates('story_key').join(story_stats, on='story_key')
+    
+    return {
+        'df': df,
+        'linkedin_df': linkedin_df,
+        'regular_df': regular_df,
+        'story_coverage': story_coverage,
+        'total_alerts': total_alerts,
+        'total_sources': total_sources
+    }
 
-# Separate LinkedIn trending articles
-linkedin_df = df[df['source'] == 'LinkedIn Trending'].head(10)
-regular_df = df[df['source'] != 'LinkedIn Trending']
+filters = (
+    tuple(sentiment_range),
+    keyword_filter,
+    tuple(crisis_types) if crisis_filter_mode == "Specific Categories" else (),
+    selected_company,
+    watchlists[selected_watchlist]['id'] if selected_watchlist != "None" else None,
+    group_stories
+)
+view = load_filtered_view(days, data_version['version'], filters)
+df = view['df']
+linkedin_df = view['linkedin_df']
+regular_df = view['regular_df']
+story_coverage = view['story_coverage']
+total_alerts = view['total_alerts']
+total_sources = view['total_sources']
 
 # Modern metrics dashboard with 2025 colors
 st.markdown("""
@@ -225,45 +435,101 @@ with col3:
     st.metric("📰 News Sources", sources_count)
 
 with col4:
-    recent_articles = len(df[df['created_at'] >= datetime.now() - timedelta(hours=24)]) if len(df) > 0 else 0
+    recent_articles = int((df['published_at'] >= time.time() - 86400).sum()) if len(df) > 0 else 0
     st.metric("🕒 Last 24 Hours", recent_articles)
 
 with col5:
     linkedin_count = len(linkedin_df)
     st.metric("🔗 LinkedIn Trending", linkedin_count)
 
-# Charts
-if len(df) > 0:
-    # Timeline chart
+# Chart figures are memoized on the same key as the filtered view, and each
+# chart renders in its own fragment: its controls rerun only that chart, and a
+# full rerun rebuilds only figures whose inputs changed. Plotly is only
+# imported once there is something to chart.
+@st.cache_data(ttl=1800, max_entries=64)
+def timeline_figure(days_back, version, filters, granularity):
+    import plotly.express as px
+    df = load_filtered_view(days_back, version, filters)['df']
+    published = pd.to_datetime(df['published_at'], unit='s', utc=True)
+    timeline_data = df.assign(date=published.dt.floor('h') if granularity == "Hour" else published.dt.date)
+    timeline_data = timeline_data.groupby('date').size().reset_index(name='count')
+    if len(timeline_data) <= 1:
+        return None
+    fig_timeline = px.line(timeline_data, x='date', y='count', 
+                         title="Negative Business News Articles Over Time")
+    fig_timeline.update_layout(height=400)
+    return fig_timeline
+
+@st.cache_data(ttl=1800)
+def category_figure(days_back, version):
+    # Per-category counts come straight from the category index
+    category_counts = load_category_counts(days_back, version)
+    if not category_counts:
+        return None
+    import plotly.express as px
+    fig_categories = px.bar(x=list(category_counts.values()), y=list(category_counts.keys()),
+                            orientation='h', title="Articles per Crisis Category")
+    fig_categories.update_layout(height=400)
+    return fig_categories
+
+@st.cache_data(ttl=1800, max_entries=64)
+def sentiment_figure(days_back, version, filters):
+    import plotly.express as px
+    df = load_filtered_view(days_back, version, filters)['df']
+    fig_sentiment = px.histogram(df, x='sentiment_score', nbins=20, 
+                               title="Distribution of Sentiment Scores")
+    fig_sentiment.update_layout(height=400)
+    return fig_sentiment
+
+@st.cache_data(ttl=1800, max_entries=64)
+def sources_figure(days_back, version, filters, top_n):
+    import plotly.express as px
+    df = load_filtered_view(days_back, version, filters)['df']
+    source_counts = df['source'].value_counts().head(top_n)
+    fig_sources = px.bar(x=source_counts.values, y=source_counts.index, 
+                       orientation='h', title="Top News Sources")
+    fig_sources.update_layout(height=400)
+    return fig_sources
+
+@st.fragment
+def timeline_chart(days_back, version, filters):
     st.subheader("📈 News Timeline")
-    
-    # Group by date
-    df['date'] = df['created_at'].dt.date
-    timeline_data = df.groupby('date').size().reset_index(name='count')
-    
-    if len(timeline_data) > 1:
-        fig_timeline = px.line(timeline_data, x='date', y='count', 
-                             title="Negative Business News Articles Over Time")
-        fig_timeline.update_layout(height=400)
+    granularity = st.radio("Group by", ["Day", "Hour"], horizontal=True, key="timeline_granularity")
+    fig_timeline = timeline_figure(days_back, version, filters, granularity)
+    if fig_timeline is not None:
         st.plotly_chart(fig_timeline, use_container_width=True)
+
+@st.fragment
+def category_chart(days_back, version):
+    fig_categories = category_figure(days_back, version)
+    if fig_categories is not None:
+        st.subheader("🏷️ Crisis Categories")
+        st.plotly_chart(fig_categories, use_container_width=True)
+
+@st.fragment
+def sentiment_chart(days_back, version, filters):
+    st.subheader("😡 Sentiment Distribution")
+    st.plotly_chart(sentiment_figure(days_back, version, filters), use_container_width=True)
+
+@st.fragment
+def sources_chart(days_back, version, filters):
+    st.subheader("📰 Sources")
+    top_n = st.selectbox("Show top", [10, 20, 50], key="top_sources")
+    st.plotly_chart(sources_figure(days_back, version, filters, top_n), use_container_width=True)
+
+# Charts
+if len(df) > 0:
+    timeline_chart(days, data_version['version'], filters)
+    category_chart(days, data_version['version'])
     
     # Sentiment distribution
     col1, col2 = st.columns(2)
     
     with col1:
-        st.subheader("😡 Sentiment Distribution")
-        fig_sentiment = px.histogram(df, x='sentiment_score', nbins=20, 
-                                   title="Distribution of Sentiment Scores")
-        fig_sentiment.update_layout(height=400)
-        st.plotly_chart(fig_sentiment, use_container_width=True)
+        sentiment_chart(days, data_version['version'], filters)
     
     with col2:
-        st.subheader("📰 Sources")
-        source_counts = df['source'].value_counts().head(10)
-        fig_sources = px.bar(x=source_counts.values, y=source_counts.index, 
-                           orientation='h', title="Top News Sources")
-        fig_sources.update_layout(height=400)
-        st.plotly_chart(fig_sources, use_container_width=True)
+        sources_chart(days, data_version['version'], filters)
 
 # LinkedIn trending section with modern styling
 if len(linkedin_df) > 0:
@@ -292,37 +558,31 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
+stories_summary = f'<strong style="color: #00d4aa;">{len(regular_df)}</strong> stories • ' if story_coverage else ''
 st.markdown(f"""
 <div style="color: #a8a8a8; margin: 0.5rem 0 1rem 0; font-size: 0.9rem;">
-    <strong style="color: #00d4aa;">{len(regular_df)}</strong> crisis alerts from <strong style="color: #00d4aa;">{regular_df['source'].nunique()}</strong> sources • Sorted by newest first
+    {stories_summary}<strong style="color: #00d4aa;">{total_alerts}</strong> crisis alerts from <strong style="color: #00d4aa;">{total_sources}</strong> sources • Sorted by newest first
 </div>
 """, unsafe_allow_html=True)
 
 # Display articles in news aggregator style (using regular_df to exclude LinkedIn trending)
+render_now = time.time()
 for idx, article in regular_df.iterrows():
-    # Parse dates for better display
-    try:
-        pub_date = pd.to_datetime(article['published']) if pd.notna(article['published']) else None
-        time_ago = ""
-        if pub_date:
-            from datetime import datetime, timezone
-            now = datetime.now(timezone.utc)
-            if pub_date.tzinfo is None:
-                pub_date = pub_date.replace(tzinfo=timezone.utc)
-            diff = now - pub_date
-            if diff.days > 0:
-                time_ago = f"{diff.days}d ago"
-            elif diff.seconds > 3600:
-                time_ago = f"{diff.seconds // 3600}h ago"
-            else:
-                time_ago = f"{diff.seconds // 60}m ago"
-    except:
-        time_ago = ""
+    # published_at is a UTC epoch, so age and display date need no parsing
+    published_dt = datetime.fromtimestamp(article['published_at'], timezone.utc)
+    time_ago = format_time_ago(article['published_at'], render_now)
     
     # Modern 2025 news card styling
     sentiment_color = "#ee5a6f" if article['sentiment_score'] < -0.2 else "#ff9f43" if article['sentiment_score'] < 0 else "#a8a8a8"
     severity_label = "SEVERE" if article['sentiment_score'] < -0.2 else "MODERATE" if article['sentiment_score'] < 0 else "MILD"
     
+    coverage = story_coverage.get(article['story_key'], []) if story_coverage else []
+    coverage_line = (
+        f'<div style="color: #ff9f43; font-size: 0.85rem; margin: 0.5rem 0 0 0;">🗞️ +{len(coverage)} more '
+        f'{"article" if len(coverage) == 1 else "articles"} • {article["story_sources"]} '
+        f'{"source" if article["story_sources"] == 1 else "sources"} covering this story</div>'
+    ) if coverage else ""
+    
     st.markdown(f"""
     <div style="border-left: 4px solid {sentiment_color}; background: #3a3a3c; padding: 1.5rem; margin: 1rem 0; border-radius: 0 12px 12px 0; border: 1px solid rgba(168, 168, 168, 0.1);">
         <div style="display: flex; justify-content: space-between; align-items: flex-start; margin-bottom: 0.75rem;">
@@ -331,8 +591,9 @@ for idx, article in regular_df.iterrows():
         </div>
         <h3 style="margin: 0.5rem 0; font-size: 1.35rem; line-height: 1.4;"><a href="{article['link']}" target="_blank" style="color: #f5f5f7; text-decoration: none; transition: color 0.2s;" onmouseover="this.style.color='#00d4aa'" onmouseout="this.style.color='#f5f5f7'">{article['title']}</a></h3>
         <div style="color: #a8a8a8; font-size: 0.9rem; margin: 0.75rem 0 0 0;">
-            <strong style="color: #00d4aa;">{article['source']}</strong> • {pd.to_datetime(article['published']).strftime('%B %d, %Y at %I:%M %p') if pd.notna(article['published']) else 'Recently published'}
+            <strong style="color: #00d4aa;">{article['source']}</strong> • {published_dt.strftime('%B %d, %Y at %I:%M %p')}
         </div>
+        {coverage_line}
     </div>
     """, unsafe_allow_html=True)
     
@@ -368,6 +629,11 @@ for idx, article in regular_df.iterrows():
         " onmouseover="this.style.background='#00f5c4'; this.style.transform='translateY(-1px)'" onmouseout="this.style.background='#00d4aa'; this.style.transform='translateY(0)'">📖 Read Full Story →</a>
         """, unsafe_allow_html=True)
     
+    if coverage:
+        with st.expander(f"More coverage of this story ({len(coverage)})"):
+            for title, link, source in coverage:
+                st.markdown(f"- [{title}]({link}) — *{source}*")
+    
     st.markdown("---")
 
 # Professional news footer
@@ -393,7 +659,7 @@ st.info("⚡ Powered by advanced sentiment analysis and real-time RSS monitoring
 # Debug info (only show in development)
 if os.getenv('DEBUG', '').lower() == 'true':
     with st.expander("Debug Info"):
-        st.write(f"Database path: {collector.db_path}")
+        st.write(f"Database path: {db_path}")
         st.write(f"Total articles in database: {len(news_data)}")
         st.write(f"Filtered articles shown: {len(df)}")
         st.write(f"Sentiment range: {sentiment_range}")
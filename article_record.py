@@ -0,0 +1,76 @@
+"""
+Article Record
+Compact slotted record for one collected article, shared by every collector
+from parsing through dedup to the database writer. Repeated values (source
+names, keyword lists, categories) are interned so rows share one copy. The
+published date is parsed once, here, into a UTC epoch.
+"""
+
+import sys
+import time
+from typing import Dict, Optional, Tuple
+from feed_fetcher import parse_feed_timestamp
+
+# Column order of the negative_news INSERT used by save_articles
+ROW_FIELDS = ('title', 'link', 'description', 'published', 'source', 'sentiment_score', 'negative_keywords',
+              'source_type', 'published_at')
+
+
+def _intern(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+def ingest_timestamp(published: str, fetched_at: Optional[float] = None) -> float:
+    """UTC epoch for a feed's published string, falling back to fetch time when
+    it is missing or unparseable and capping dates in the future"""
+    fetched_at = time.time() if fetched_at is None else fetched_at
+    parsed = parse_feed_timestamp(published)
+    if parsed is None or parsed > fetched_at:
+        return fetched_at
+    return parsed
+
+
+class ArticleRecord:
+    """One negative-news article.
+
+    Supports ``record['field']`` and ``record.get('field')`` for code written
+    against the old per-article dicts.
+    """
+
+    __slots__ = ('title', 'link', 'description', 'published', 'source', 'sentiment_score',
+                 'negative_keywords', 'keyword_category', 'source_type', 'feed_url', 'published_at')
+
+    def __init__(self, title: str, link: str, description: str, published: str, source: str,
+                 sentiment_score: float, negative_keywords: str, keyword_category: str = None,
+                 source_type: str = 'rss', feed_url: str = None, published_at: float = None):
+        self.title = title
+        self.link = link
+        self.description = description
+        self.published = published
+        self.source = _intern(source)
+        self.sentiment_score = sentiment_score
+        self.negative_keywords = _intern(negative_keywords)
+        self.keyword_category = _intern(keyword_category)
+        self.source_type = _intern(source_type)
+        self.feed_url = _intern(feed_url)
+        self.published_at = ingest_timestamp(published) if published_at is None else published_at
+
+    def __getitem__(self, key: str):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default)
+
+    def as_row(self) -> Tuple:
+        """Values for the negative_news INSERT, in ``ROW_FIELDS`` order"""
+        return (self.title, self.link, self.description, self.published, self.source,
+                self.sentiment_score, self.negative_keywords, self.source_type, self.published_at)
+
+    def as_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"ArticleRecord({self.title[:40]!r}, {self.source!r})"
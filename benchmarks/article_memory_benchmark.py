@@ -0,0 +1,106 @@
+"""
+Article Memory Benchmark
+Retained memory per collected article for the old per-article dicts versus
+ArticleRecord, measured with tracemalloc over a synthetic run-sized batch.
+Source names, keyword lists and categories repeat the way they do across a
+real collection run.
+"""
+
+import os
+import sys
+import json
+import random
+import argparse
+import platform
+import datetime
+import tracemalloc
+from typing import Callable, Dict, Iterator
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from hot_path_benchmark import FILLER_WORDS
+from article_record import ArticleRecord
+
+CATEGORIES = ['financial_distress', 'operational_issues', 'workforce_reduction', 'market_decline',
+              'legal_regulatory', 'leadership_crisis', 'general_negative']
+KEYWORDS = ['layoffs', 'bankruptcy', 'closure', 'lawsuit', 'recall', 'losses', 'shutdown', 'job cuts']
+
+
+def iter_article_fields(count: int, sources: int, seed: int = 0) -> Iterator[Dict]:
+    """Field values for ``count`` articles, each built from fresh strings as
+    the collectors do per feed entry"""
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    for i in range(count):
+        source_id = rng.randrange(sources)
+        yield {
+            'title': " ".join(rng.choice(FILLER_WORDS) for _ in range(10)),
+            'link': f"https://news{source_id}.example.com/story/{i}",
+            'description': " ".join(rng.choice(FILLER_WORDS) for _ in range(40)),
+            'published': (now - datetime.timedelta(minutes=i)).strftime('%a, %d %b %Y %H:%M:%S +0000'),
+            'source': f"Example News {source_id}",
+            'source_type': "".join(["r", "ss"]),
+            'sentiment_score': rng.uniform(-1.0, 0.4),
+            'negative_keywords': ','.join(rng.sample(KEYWORDS, rng.randint(1, 3))),
+            'keyword_category': f"{rng.choice(CATEGORIES)}",
+            'feed_url': f"https://news{source_id}.example.com/feed",
+        }
+
+
+def as_dict(fields: Dict):
+    return fields
+
+
+def as_record(fields: Dict):
+    return ArticleRecord(**fields)
+
+
+def measure(build: Callable, count: int, sources: int, seed: int) -> Dict:
+    """Bytes still held by ``count`` built articles once their inputs are gone"""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    articles = [build(fields) for fields in iter_article_fields(count, sources, seed)]
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    retained = after - before
+    del articles
+    return {
+        'retained_kb': round(retained / 1024, 1),
+        'peak_kb': round((peak - before) / 1024, 1),
+        'bytes_per_article': round(retained / count, 1),
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-article memory of dicts and ArticleRecord")
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--sources", type=int, default=160)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = {}
+    for name, build in (('dict', as_dict), ('article_record', as_record)):
+        print(f"🔬 {name}", file=sys.stderr)
+        results[name] = measure(build, args.articles, args.sources, args.seed)
+    results['reduction'] = round(1.0 - results['article_record']['retained_kb'] / results['dict']['retained_kb'], 3)
+
+    report = {
+        'benchmark': 'article_memory',
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {'articles': args.articles, 'sources': args.sources, 'seed': args.seed},
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -0,0 +1,255 @@
+"""
+End-to-End Collector Benchmark
+Runs update_news, fast_update, comprehensive_update and the sharded
+comprehensive collection against recorded fixture feeds served locally and reports wall time, throughput, CPU time and
+peak RSS as JSON for regression tracking
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import datetime
+import functools
+import subprocess
+import multiprocessing
+from types import SimpleNamespace
+from typing import List, Dict
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+from feed_fixture_server import FixtureFeedServer
+
+METHODS = ["update_news", "fast_update", "comprehensive_update", "sharded_update"]
+
+# API keys would send the comprehensive collector to the real internet
+API_KEY_VARS = ["NEWSAPI_KEY", "MEDIASTACK_KEY", "NEWSDATA_KEY"]
+
+
+def point_at_fixtures(collector, feed_urls: List[str], social: Dict):
+    """Swap the comprehensive collector's feed catalog and social sources for fixtures"""
+    split = len(feed_urls) // 2
+    collector.aggregator.comprehensive_rss_feeds = feed_urls[:split]
+    collector.local_collector.local_news_rss_feeds = feed_urls[split:]
+    collector.aggregator.social_sources['reddit_business'] = social['reddit']
+    collector.aggregator.social_sources['hackernews'] = social['hackernews']
+
+
+def build_collector(method: str, db_path: str, feed_urls: List[str], social: Dict, shard_workers: int = 4):
+    """Create the collector for ``method`` pointed at fixture URLs only"""
+    if method == "update_news":
+        from news_collector import NegativeNewsCollector
+        collector = NegativeNewsCollector(db_path)
+        collector.rss_feeds = feed_urls
+        return collector, lambda: collector.update_news(None)
+
+    if method == "fast_update":
+        from fast_collector import FastNewsCollector
+        collector = FastNewsCollector(db_path)
+        split = (len(feed_urls) * 2) // 3
+        collector.priority_feeds = feed_urls[:split]
+        collector.secondary_feeds = feed_urls[split:]
+        return collector, lambda: collector.fast_update(target_articles=50)
+
+    if method == "comprehensive_update":
+        from enhanced_collector import EnhancedNegativeNewsCollector
+        collector = EnhancedNegativeNewsCollector(db_path)
+        point_at_fixtures(collector, feed_urls, social)
+        return collector, lambda: collector.comprehensive_update(min_articles=100)
+
+    if method == "sharded_update":
+        from sharded_collection import run_sharded
+        from collector_metrics import CollectionMetrics
+        configure = functools.partial(point_at_fixtures, feed_urls=feed_urls, social=social)
+        run = SimpleNamespace(metrics=CollectionMetrics("enhanced_collector", "run_sharded"))
+        batch_dir = os.path.join(os.path.dirname(db_path), "batches")
+        return run, lambda: run_sharded(shard_workers, db_path, batch_dir, configure, run.metrics)
+
+    raise ValueError(f"Unknown method: {method}")
+
+
+def count_rows(db_path: str) -> int:
+    import sqlite3
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM negative_news").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KiB"""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_one(method: str, feed_urls: List[str], social: Dict, verbose: bool, queue, trace_memory: bool = False,
+            shard_workers: int = 4):
+    """Child-process entry point: one timed collection run"""
+    for var in API_KEY_VARS:
+        os.environ.pop(var, None)
+
+    result = {'method': method, 'status': 'ok', 'error': None}
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        stdout = sys.stdout
+        if not verbose:
+            sys.stdout = open(os.devnull, 'w')
+        try:
+            collector, run = build_collector(method, db_path, feed_urls, social, shard_workers)
+            if trace_memory:
+                import tracemalloc
+                tracemalloc.start()
+            wall_start = time.perf_counter()
+            cpu_start = time.process_time()
+            try:
+                run()
+            except Exception as e:
+                result['status'] = 'error'
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['wall_s'] = time.perf_counter() - wall_start
+            result['cpu_s'] = time.process_time() - cpu_start
+            if trace_memory:
+                # Python allocations made during the run only (imports excluded)
+                result['peak_traced_kb'] = tracemalloc.get_traced_memory()[1] // 1024
+                tracemalloc.stop()
+            # Per-stage breakdown from the collector's own instrumentation
+            summary = collector.metrics.summary()
+            result['stages'] = summary['stages']
+            result['cpu_stages'] = summary['cpu_stages']
+        finally:
+            if not verbose:
+                sys.stdout.close()
+                sys.stdout = stdout
+
+        result['articles'] = count_rows(db_path)
+        result['articles_per_s'] = result['articles'] / result['wall_s'] if result['wall_s'] > 0 else 0.0
+        result['peak_rss_kb'] = peak_rss_kb()
+    queue.put(result)
+
+
+def run_isolated(method: str, feed_urls: List[str], social: Dict, verbose: bool, run_timeout: float,
+                 trace_memory: bool = False, shard_workers: int = 4) -> Dict:
+    """Run one benchmark in a fresh process so peak RSS is per-run"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=run_one, args=(method, feed_urls, social, verbose, queue, trace_memory,
+                                                  shard_workers))
+    proc.start()
+    proc.join(run_timeout)
+    if proc.is_alive():
+        proc.terminate()
+        proc.join()
+        return {'method': method, 'status': 'timeout', 'error': f"exceeded {run_timeout}s",
+                'wall_s': run_timeout, 'cpu_s': None, 'articles': 0,
+                'articles_per_s': 0.0, 'peak_rss_kb': None}
+    if queue.empty():
+        return {'method': method, 'status': 'crashed', 'error': f"exit code {proc.exitcode}",
+                'wall_s': None, 'cpu_s': None, 'articles': 0,
+                'articles_per_s': 0.0, 'peak_rss_kb': None}
+    return queue.get()
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def run_benchmarks(args) -> Dict:
+    with FixtureFeedServer(hang_seconds=args.hang_seconds) as server:
+        feeds = server.feed_urls(
+            args.feeds,
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            error_rate=args.error_rate,
+            timeout_rate=args.timeout_rate,
+            malformed_rate=args.malformed_rate,
+            seed=args.seed,
+        )
+        feed_urls = [feed['url'] for feed in feeds]
+        social = {
+            'reddit': [server.url("social", f"r{i}", "reddit_business.json") for i in range(5)],
+            'hackernews': server.url("social", "hn", "hn_topstories.json"),
+        }
+
+        results = []
+        for method in args.methods:
+            for repeat in range(args.repeat):
+                print(f"⏱️  {method} (run {repeat + 1}/{args.repeat})...", file=sys.stderr)
+                result = run_isolated(method, feed_urls, social, args.verbose, args.run_timeout,
+                                      args.trace_memory, args.shard_workers)
+                result['repeat'] = repeat
+                results.append(result)
+                print(f"   {result['status']}: {result['articles']} articles in "
+                      f"{result['wall_s'] or 0:.2f}s", file=sys.stderr)
+
+        return {
+            'benchmark': 'collector_e2e',
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'config': {
+                'feeds': args.feeds,
+                'latency_ms': args.latency_ms,
+                'jitter_ms': args.jitter_ms,
+                'error_rate': args.error_rate,
+                'timeout_rate': args.timeout_rate,
+                'malformed_rate': args.malformed_rate,
+                'hang_seconds': args.hang_seconds,
+                'seed': args.seed,
+                'trace_memory': args.trace_memory,
+                'shard_workers': args.shard_workers,
+                'faults': {fault: sum(1 for f in feeds if f['fault'] == fault)
+                           for fault in ('error', 'timeout', 'malformed')},
+            },
+            'server': {'requests': server.request_count, 'bytes_served': server.bytes_served},
+            'results': results,
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the news collectors against local fixture feeds")
+    parser.add_argument("--methods", nargs="+", choices=METHODS, default=METHODS)
+    parser.add_argument("--feeds", type=int, default=40, help="number of fixture feeds to mount")
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--hang-seconds", type=float, default=30.0, help="how long 'timeout' feeds stall")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--run-timeout", type=float, default=600.0, help="kill a run after this many seconds")
+    parser.add_argument("--shard-workers", type=int, default=4, help="worker processes for sharded_update")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="show collector output")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record peak_traced_kb with tracemalloc (slows the run)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run_benchmarks(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+        print(f"📊 Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
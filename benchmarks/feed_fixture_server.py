@@ -0,0 +1,202 @@
+"""
+Local Feed Fixture Server
+Serves recorded RSS/Atom/JSON fixtures over HTTP with injectable latency, errors and timeouts
+"""
+
+import os
+import re
+import time
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from typing import List, Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CONTENT_TYPES = {
+    '.xml': 'application/rss+xml; charset=utf-8',
+    '.json': 'application/json; charset=utf-8',
+}
+
+# Article links are made unique per mounted feed so that N copies of one
+# fixture behave like N distinct sources instead of collapsing in dedup
+RSS_LINK_PATTERN = re.compile(rb'(<(?:link|guid|id)>)([^<]+)(</(?:link|guid|id)>)')
+ATOM_LINK_PATTERN = re.compile(rb'(<link[^>]*href=")([^"]+)(")')
+JSON_LINK_PATTERN = re.compile(rb'("permalink": ")([^"]+)(")')
+
+
+class FixtureFeedServer:
+    """Threaded HTTP server for fixture feeds.
+
+    URLs look like ``/feeds/<n>/<fixture>?delay=0.05&fault=error`` where
+    ``fault`` is one of ``error`` (HTTP 500), ``timeout`` (hang, then drop the
+    connection), ``malformed`` (truncated body) or absent.
+    """
+
+    def __init__(self, fixtures_dir: str = FIXTURES_DIR, host: str = "127.0.0.1",
+                 port: int = 0, hang_seconds: float = 30.0):
+        self.fixtures_dir = fixtures_dir
+        self.hang_seconds = hang_seconds
+        self.request_count = 0
+        self.bytes_served = 0
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fixture_names(self, kind: str = "feeds") -> List[str]:
+        """List fixture files available under ``fixtures/<kind>``"""
+        return sorted(os.listdir(os.path.join(self.fixtures_dir, kind)))
+
+    def load_fixture(self, kind: str, name: str, feed_id: str) -> bytes:
+        """Load a fixture with article links rewritten for ``feed_id``"""
+        key = (kind, name, feed_id)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+
+        with open(os.path.join(self.fixtures_dir, kind, name), 'rb') as f:
+            body = f.read()
+        suffix = b"#f" + feed_id.encode()
+        for pattern in (RSS_LINK_PATTERN, ATOM_LINK_PATTERN, JSON_LINK_PATTERN):
+            body = pattern.sub(lambda m: m.group(1) + m.group(2) + suffix + m.group(3), body)
+
+        with self._lock:
+            self._cache[key] = body
+        return body
+
+    def _make_handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = parse_qs(parsed.query)
+                parts = parsed.path.strip('/').split('/')
+
+                with server._lock:
+                    server.request_count += 1
+
+                delay = float(params.get('delay', ['0'])[0])
+                if delay > 0:
+                    time.sleep(delay)
+
+                fault = params.get('fault', [''])[0]
+                if fault == 'timeout':
+                    time.sleep(server.hang_seconds)
+                    self.close_connection = True
+                    return
+                if fault == 'error':
+                    self.send_error(500, "Injected error")
+                    return
+
+                if len(parts) != 3:
+                    self.send_error(404)
+                    return
+                kind, feed_id, name = parts
+                try:
+                    body = server.load_fixture(kind, name, feed_id)
+                except (OSError, ValueError):
+                    self.send_error(404)
+                    return
+
+                if fault == 'malformed':
+                    body = body[:len(body) // 3]
+
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPES.get(os.path.splitext(name)[1], 'text/plain'))
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                with server._lock:
+                    server.bytes_served += len(body)
+
+        return FixtureHandler
+
+    def url(self, kind: str, feed_id, name: str, delay: float = 0.0, fault: str = None) -> str:
+        """Build the URL for one mounted fixture"""
+        query = []
+        if delay > 0:
+            query.append(f"delay={delay:.3f}")
+        if fault:
+            query.append(f"fault={fault}")
+        suffix = f"?{'&'.join(query)}" if query else ""
+        return f"{self.base_url}/{kind}/{feed_id}/{name}{suffix}"
+
+    def feed_urls(self, count: int, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                  error_rate: float = 0.0, timeout_rate: float = 0.0,
+                  malformed_rate: float = 0.0, seed: int = 0) -> List[Dict]:
+        """Mount ``count`` feeds cycling over the recorded fixtures.
+
+        Faults and latency are assigned deterministically from ``seed`` so
+        repeated runs see the same scenario.
+        """
+        rng = random.Random(seed)
+        names = self.fixture_names("feeds")
+        feeds = []
+        for i in range(count):
+            roll = rng.random()
+            if roll < error_rate:
+                fault = 'error'
+            elif roll < error_rate + timeout_rate:
+                fault = 'timeout'
+            elif roll < error_rate + timeout_rate + malformed_rate:
+                fault = 'malformed'
+            else:
+                fault = None
+            delay = max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000.0
+            name = names[i % len(names)]
+            feeds.append({
+                'url': self.url("feeds", i, name, delay=delay, fault=fault),
+                'fixture': name,
+                'fault': fault,
+                'delay': delay,
+            })
+        return feeds
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve recorded feed fixtures locally")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--feeds", type=int, default=10)
+    args = parser.parse_args()
+
+    with FixtureFeedServer(port=args.port) as server:
+        print(f"🧪 Serving fixtures from {server.fixtures_dir} at {server.base_url}")
+        for feed in server.feed_urls(args.feeds):
+            print(f"   • {feed['url']}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,290 @@
+"""
+Per-Article Hot Path Micro-Benchmarks
+Measures throughput of the text functions every feed entry goes through, how
+keyword matching scales with keyword-list size, and the cost of the storage
+layer at increasing table sizes
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import random
+import sqlite3
+import argparse
+import platform
+import datetime
+import tempfile
+from typing import List, Dict, Callable
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_ROOT)
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+THRESHOLDS_PATH = os.path.join(BENCH_DIR, "hot_path_thresholds.json")
+
+FILLER_WORDS = (
+    "company shares market quarter revenue growth investors board chief executive "
+    "analysts said report percent billion million customers sales retail store "
+    "plant workers union deal acquisition strategy outlook demand prices supply "
+    "bank lenders rates economy consumer brand product launch expansion region"
+).split()
+
+
+def load_recorded_corpus() -> List[str]:
+    """Title + description pairs from the recorded fixture feeds"""
+    import feedparser
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "feeds", "*"))):
+        with open(path, 'rb') as f:
+            feed = feedparser.parse(f.read())
+        for entry in feed.entries:
+            title = entry.get('title', '')
+            description = entry.get('description', '') or entry.get('summary', '')
+            texts.append(f"{title} {description}")
+    return texts
+
+
+def build_synthetic_corpus(size: int, keywords: List[str], hit_rate: float = 0.3, seed: int = 0) -> List[str]:
+    """Headline + HTML description pairs with a controlled keyword hit rate"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(size):
+        title = " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(6, 12))).capitalize()
+        body = " ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(25, 60)))
+        if rng.random() < hit_rate:
+            body = f"{body} {rng.choice(keywords)} {' '.join(rng.choice(FILLER_WORDS) for _ in range(8))}"
+        texts.append(f"{title} <p>{body} &amp; <a href=\"https://example.com\">more</a></p>")
+    return texts
+
+
+def scaled_keywords(base: List[str], size: int, seed: int = 0) -> List[str]:
+    """Grow or shrink a keyword list to ``size`` entries with plausible phrases"""
+    if size <= len(base):
+        return base[:size]
+    rng = random.Random(seed)
+    extra = []
+    while len(base) + len(extra) < size:
+        phrase = f"{rng.choice(FILLER_WORDS)} {rng.choice(base)}"
+        if phrase not in extra:
+            extra.append(phrase)
+    return base + extra
+
+
+def measure(func: Callable, items: List, min_time: float = 0.5, repeats: int = 3) -> Dict:
+    """Best-of-``repeats`` throughput of ``func`` over ``items``"""
+    best = None
+    calls = 0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            for item in items:
+                func(item)
+            calls += len(items)
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        per_call = elapsed / calls
+        best = per_call if best is None else min(best, per_call)
+    return {'ops_per_s': 1.0 / best, 'us_per_op': best * 1e6, 'calls': calls}
+
+
+def bench_text_functions(corpora: Dict[str, List[str]], collector, min_time: float) -> Dict:
+    from text_normalizer import normalize_entry
+
+    results = {}
+    for corpus_name, texts in corpora.items():
+        found = [collector.contains_negative_keywords(text) for text in texts]
+        normalized = [normalize_entry('', text) for text in texts]
+        cases = {
+            'clean_html': (collector.clean_html, texts),
+            'normalize_entry': (lambda text: normalize_entry('', text), texts),
+            'contains_negative_keywords': (collector.contains_negative_keywords, texts),
+            'contains_negative_keywords_normalized': (collector.contains_negative_keywords, normalized),
+            'categorize_keywords': (collector.categorize_keywords, found),
+            'analyze_sentiment': (collector.analyze_sentiment, texts),
+            'analyze_sentiment_normalized': (collector.analyze_sentiment, normalized),
+        }
+        for func_name, (func, items) in cases.items():
+            name = f"{func_name}[{corpus_name}]"
+            print(f"   {name}", file=sys.stderr)
+            results[name] = measure(func, items, min_time=min_time)
+    return results
+
+
+def bench_keyword_scaling(texts: List[str], collector, sizes: List[int], min_time: float) -> Dict:
+    results = {}
+    original = collector.all_keywords
+    try:
+        for size in sizes:
+            collector.all_keywords = scaled_keywords(original, size)
+            name = f"contains_negative_keywords[keywords={size}]"
+            print(f"   {name}", file=sys.stderr)
+            results[name] = measure(collector.contains_negative_keywords, texts, min_time=min_time)
+    finally:
+        collector.all_keywords = original
+    return results
+
+
+def make_articles(count: int, seed: int = 0) -> List:
+    from article_record import ArticleRecord
+
+    rng = random.Random(seed)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    articles = []
+    for i in range(count):
+        published = now - datetime.timedelta(minutes=rng.randint(0, 60 * 24 * 7))
+        articles.append(ArticleRecord(
+            title=" ".join(rng.choice(FILLER_WORDS) for _ in range(9)),
+            link=f"https://news.example.com/{seed}/{i}",
+            description=" ".join(rng.choice(FILLER_WORDS) for _ in range(40)),
+            published=published.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+            source=f"Source {i % 150}",
+            sentiment_score=rng.uniform(-1.0, 0.4),
+            negative_keywords="layoffs,closure",
+        ))
+    return articles
+
+
+def bench_storage(sizes: List[int], tmp_dir: str) -> Dict:
+    from news_collector import NegativeNewsCollector
+
+    results = {}
+    for size in sizes:
+        db_path = os.path.join(tmp_dir, f"storage_{size}.db")
+        collector = NegativeNewsCollector(db_path)
+        # Story clustering is timed as its own case below
+        stories, collector.stories = collector.stories, None
+        articles = make_articles(size)
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            start = time.perf_counter()
+            collector.save_articles(articles)
+            elapsed = time.perf_counter() - start
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        name = f"save_articles[rows={size}]"
+        print(f"   {name}", file=sys.stderr)
+        results[name] = {'ops_per_s': size / elapsed, 'us_per_op': elapsed / size * 1e6,
+                         'calls': size, 'total_s': elapsed}
+
+        # Cluster the rows just saved in one batch, as save_articles does
+        conn = sqlite3.connect(db_path)
+        fields = ('title', 'link', 'description', 'source', 'published_at')
+        saved = [(row[0], dict(zip(fields, row[1:]))) for row in conn.execute(
+            "SELECT id, title, link, description, source, published_at FROM negative_news"
+        )]
+        start = time.perf_counter()
+        stories.assign(conn.cursor(), saved)
+        elapsed = time.perf_counter() - start
+        conn.commit()
+        conn.close()
+        collector.stories = stories
+        name = f"assign_stories[rows={size}]"
+        print(f"   {name}", file=sys.stderr)
+        results[name] = {'ops_per_s': size / elapsed, 'us_per_op': elapsed / size * 1e6,
+                         'calls': size, 'total_s': elapsed}
+
+        conn = sqlite3.connect(db_path)
+        table_rows = conn.execute("SELECT COUNT(*) FROM negative_news").fetchone()[0]
+        conn.close()
+        for days in (1, 7):
+            best = None
+            for _ in range(3):
+                start = time.perf_counter()
+                rows = collector.get_recent_news(days)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            name = f"get_recent_news[rows={size},days={days}]"
+            print(f"   {name}", file=sys.stderr)
+            results[name] = {'ops_per_s': 1.0 / best, 'us_per_op': best * 1e6, 'calls': 1,
+                             'rows_returned': len(rows), 'table_rows': table_rows}
+    return results
+
+
+def check_thresholds(results: Dict, thresholds: Dict, tolerance: float) -> List[str]:
+    """Names of benchmarks slower than their recorded minimum throughput"""
+    failures = []
+    for name, minimum in thresholds.items():
+        if name not in results:
+            continue
+        actual = results[name]['ops_per_s']
+        if actual < minimum * (1.0 - tolerance):
+            failures.append(f"{name}: {actual:,.1f} ops/s < {minimum:,.1f} ops/s")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmark the per-article hot path")
+    parser.add_argument("--synthetic-size", type=int, default=2000)
+    parser.add_argument("--keyword-sizes", type=int, nargs="+", default=[10, 50, 100, 200, 400])
+    parser.add_argument("--storage-sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per timing repeat")
+    parser.add_argument("--skip-storage", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any threshold regresses")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="allowed fraction below threshold")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    parser.add_argument("--write-thresholds", type=float, metavar="FACTOR",
+                        help="record FACTOR x current throughput as the new thresholds")
+    parser.add_argument("--output", help="write JSON results here instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    from enhanced_collector import EnhancedNegativeNewsCollector
+
+    with tempfile.TemporaryDirectory() as tmp:
+        collector = EnhancedNegativeNewsCollector(os.path.join(tmp, "hot_path.db"))
+        corpora = {
+            'recorded': load_recorded_corpus(),
+            'synthetic': build_synthetic_corpus(args.synthetic_size, collector.all_keywords),
+        }
+
+        print("🔬 Text functions", file=sys.stderr)
+        results = bench_text_functions(corpora, collector, args.min_time)
+        print("🔬 Keyword list scaling", file=sys.stderr)
+        results.update(bench_keyword_scaling(corpora['synthetic'], collector, args.keyword_sizes, args.min_time))
+        if not args.skip_storage:
+            print("🔬 Storage layer", file=sys.stderr)
+            results.update(bench_storage(args.storage_sizes, tmp))
+
+    report = {
+        'benchmark': 'hot_path',
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'corpus_sizes': {name: len(texts) for name, texts in corpora.items()},
+        'results': results,
+    }
+
+    if args.write_thresholds:
+        thresholds = {name: round(r['ops_per_s'] * args.write_thresholds, 1) for name, r in results.items()}
+        with open(args.thresholds, 'w') as f:
+            json.dump(thresholds, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"📝 Thresholds written to {args.thresholds}", file=sys.stderr)
+
+    failures = []
+    if args.check and os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            failures = check_thresholds(results, json.load(f), args.tolerance)
+        report['regressions'] = failures
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for failure in failures:
+        print(f"❌ REGRESSION {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
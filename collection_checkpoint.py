@@ -0,0 +1,146 @@
+"""
+Collection Checkpoint
+Per-source progress for long collection runs. As each source (the API
+group, every RSS feed, the social group) finishes, its articles are saved
+and the source is recorded as done, a few sources at a time, together with its
+feed cursor. A run that is killed partway leaves its checkpoint open; the
+next run of the same method within the collection window resumes it and
+fetches only the sources not yet processed.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+from typing import Callable, Dict, List, Optional
+
+# An unfinished run started this recently is resumed instead of starting over
+CHECKPOINT_WINDOW_HOURS = float(os.getenv("NEWS_CHECKPOINT_WINDOW_HOURS", "6"))
+# Completed sources are persisted in groups of this many, or this often
+FLUSH_SOURCES = 10
+FLUSH_SECONDS = 15.0
+
+
+def create_checkpoint_tables(conn: sqlite3.Connection):
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS collection_checkpoint_runs (
+        run_id TEXT PRIMARY KEY,
+        method TEXT NOT NULL,
+        started_at REAL NOT NULL,
+        finished_at REAL
+    );
+    CREATE TABLE IF NOT EXISTS collection_checkpoints (
+        run_id TEXT NOT NULL,
+        source TEXT NOT NULL,
+        articles INTEGER,
+        completed_at REAL,
+        PRIMARY KEY (run_id, source)
+    ) WITHOUT ROWID;
+    ''')
+
+
+class CollectionCheckpoint:
+    """Progress of one run: which sources are done, and saving their articles as they finish"""
+
+    def __init__(self, db_path: str, method: str, save: Callable[[List], int], feed_state=None,
+                 window_hours: float = None):
+        self.db_path = db_path
+        self.method = method
+        # Saves a batch of articles and returns how many were new
+        self.save = save
+        self.feed_state = feed_state
+        self.window_hours = CHECKPOINT_WINDOW_HOURS if window_hours is None else window_hours
+        self.run_id = None
+        self.done: Dict[str, int] = {}
+        self.pending_sources: Dict[str, int] = {}
+        self.pending_articles = []
+        self.pending_cursors: Dict[str, float] = {}
+        self.last_flush = time.monotonic()
+        self.seen_links = set()
+        self.saved_count = 0
+        self.resumed_articles = 0
+
+    def begin(self) -> bool:
+        """Resume this method's latest unfinished run inside the window, or start a new one.
+        Returns True when resuming."""
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            create_checkpoint_tables(conn)
+            row = conn.execute('''
+            SELECT run_id FROM collection_checkpoint_runs
+            WHERE method = ? AND finished_at IS NULL AND started_at >= ?
+            ORDER BY started_at DESC LIMIT 1
+            ''', (self.method, now - self.window_hours * 3600)).fetchone()
+            if row:
+                self.run_id = row[0]
+                self.done = dict(conn.execute(
+                    "SELECT source, articles FROM collection_checkpoints WHERE run_id = ?", (self.run_id,)
+                ).fetchall())
+            else:
+                self.run_id = uuid.uuid4().hex
+                conn.execute("INSERT INTO collection_checkpoint_runs (run_id, method, started_at) VALUES (?, ?, ?)",
+                             (self.run_id, self.method, now))
+            # Drop the progress of runs older than a week
+            stale = [r for (r,) in conn.execute(
+                "SELECT run_id FROM collection_checkpoint_runs WHERE started_at < ?", (now - 7 * 86400,)
+            )]
+            conn.executemany("DELETE FROM collection_checkpoints WHERE run_id = ?", [(r,) for r in stale])
+            conn.executemany("DELETE FROM collection_checkpoint_runs WHERE run_id = ?", [(r,) for r in stale])
+            conn.commit()
+        finally:
+            conn.close()
+        self.resumed_articles = sum(self.done.values())
+        return bool(self.done)
+
+    def is_done(self, source: str) -> bool:
+        return source in self.done or source in self.pending_sources
+
+    def record(self, source: str, articles: List, cursor: Optional[float] = None):
+        """Mark ``source`` finished with ``articles``; persisted at the next flush"""
+        self.pending_sources[source] = len(articles)
+        self.pending_articles.extend(articles)
+        if cursor is not None:
+            self.pending_cursors[source] = cursor
+        if len(self.pending_sources) >= FLUSH_SOURCES or time.monotonic() - self.last_flush >= FLUSH_SECONDS:
+            self.flush()
+
+    def flush(self):
+        """Save pending articles, then persist their sources and cursors as done"""
+        self.last_flush = time.monotonic()
+        if not self.pending_sources:
+            return
+        articles = []
+        for article in self.pending_articles:
+            if article.link and article.link not in self.seen_links:
+                self.seen_links.add(article.link)
+                articles.append(article)
+        self.saved_count += self.save(articles)
+        if self.feed_state is not None:
+            self.feed_state.update_last_seen(self.pending_cursors)
+
+        now = time.time()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.executemany('''
+            INSERT OR REPLACE INTO collection_checkpoints (run_id, source, articles, completed_at)
+            VALUES (?, ?, ?, ?)
+            ''', [(self.run_id, source, count, now) for source, count in self.pending_sources.items()])
+            conn.commit()
+        finally:
+            conn.close()
+        self.done.update(self.pending_sources)
+        self.pending_sources = {}
+        self.pending_articles = []
+        self.pending_cursors = {}
+
+    def finish(self):
+        """Flush what is left and close the run so it is not resumed"""
+        self.flush()
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("UPDATE collection_checkpoint_runs SET finished_at = ? WHERE run_id = ?",
+                         (time.time(), self.run_id))
+            conn.commit()
+        finally:
+            conn.close()
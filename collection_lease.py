@@ -0,0 +1,277 @@
+"""
+Collection Lease
+Single-flight guard for collections that write to the same database. The
+first caller takes a lease row in SQLite and keeps renewing it while it runs;
+anyone else making the same call meanwhile (the Modal jobs, the dashboard's
+update buttons, another process) waits for that run and returns its stored
+result instead of collecting again. A different call waits for the lease and
+then runs, so collections never overlap; interactive callers pass
+``wait=False`` to fail fast instead. A lease whose holder stopped renewing
+it (a crashed or killed run) expires and is taken over, and a run that lost
+its lease is stopped before it saves.
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import hashlib
+import sqlite3
+import threading
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+# A lease not renewed for this long is considered abandoned
+LEASE_TTL = float(os.getenv("NEWS_LEASE_TTL", "120"))
+# Longest a caller waits for someone else's collection before giving up
+JOIN_TIMEOUT = float(os.getenv("NEWS_LEASE_JOIN_TIMEOUT", "1800"))
+POLL_INTERVAL = 0.5
+
+
+class CollectionBusyError(TimeoutError):
+    """Another collection held the lease for longer than the caller was willing to wait"""
+
+
+class CollectionLeaseLost(RuntimeError):
+    """The run's lease expired and was taken over, so it must not write"""
+
+
+# The lease held by the run executing on this thread, if any
+_active = threading.local()
+
+
+def create_lease_tables(conn: sqlite3.Connection):
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS collection_lease (
+        name TEXT PRIMARY KEY,
+        run_id TEXT NOT NULL,
+        call_key TEXT NOT NULL,
+        method TEXT,
+        owner TEXT,
+        acquired_at REAL,
+        expires_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS collection_runs (
+        run_id TEXT PRIMARY KEY,
+        name TEXT,
+        call_key TEXT,
+        method TEXT,
+        owner TEXT,
+        started_at REAL,
+        finished_at REAL,
+        status TEXT,
+        result TEXT
+    );
+    ''')
+
+
+def call_key(method: str, args, kwargs) -> str:
+    """Identity of a call; only identical calls share a result (arguments are hashed, never stored)"""
+    payload = repr((method, args, sorted(kwargs.items())))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _encode(result) -> str:
+    return json.dumps({'tuple': isinstance(result, tuple), 'value': result}, default=str)
+
+
+def _decode(payload: str):
+    data = json.loads(payload)
+    return tuple(data['value']) if data['tuple'] else data['value']
+
+
+class CollectionLease:
+    """Take, renew and release the collection lease on one database"""
+
+    def __init__(self, db_path: str, name: str = "collection", ttl: float = None):
+        self.db_path = db_path
+        self.name = name
+        self.ttl = LEASE_TTL if ttl is None else ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.run_id = None
+        # Set once the lease is found taken over while this run still thinks it holds it
+        self.lost = threading.Event()
+
+    def connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        create_lease_tables(conn)
+        return conn
+
+    def try_acquire(self, key: str, method: str = None) -> Optional[Dict]:
+        """Take the lease if it is free or expired. Returns None when taken,
+        otherwise the live lease held by someone else."""
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            now = time.time()
+            held = conn.execute("SELECT * FROM collection_lease WHERE name = ?", (self.name,)).fetchone()
+            if held and held['expires_at'] > now:
+                conn.execute("COMMIT")
+                return dict(held)
+            if held:
+                print(f"♻️ Recovering stale collection lease from {held['owner']} ({held['method']})")
+                conn.execute('''
+                UPDATE collection_runs SET status = 'abandoned', finished_at = ?
+                WHERE run_id = ? AND finished_at IS NULL
+                ''', (now, held['run_id']))
+
+            run_id = uuid.uuid4().hex
+            conn.execute('''
+            INSERT OR REPLACE INTO collection_lease (name, run_id, call_key, method, owner, acquired_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (self.name, run_id, key, method, self.owner, now, now + self.ttl))
+            conn.execute('''
+            INSERT INTO collection_runs (run_id, name, call_key, method, owner, started_at, status)
+            VALUES (?, ?, ?, ?, ?, ?, 'running')
+            ''', (run_id, self.name, key, method, self.owner, now))
+            # Keep only recent run records
+            conn.execute("DELETE FROM collection_runs WHERE started_at < ?", (now - 7 * 86400,))
+            conn.execute("COMMIT")
+            self.run_id = run_id
+            return None
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def renew(self) -> bool:
+        """Push the expiry out by ``ttl``; False if the lease was lost (taken over as stale)"""
+        conn = self.connect()
+        try:
+            cursor = conn.execute('''
+            UPDATE collection_lease SET expires_at = ? WHERE name = ? AND run_id = ?
+            ''', (time.time() + self.ttl, self.name, self.run_id))
+            return cursor.rowcount > 0
+        finally:
+            conn.close()
+
+    def release(self, status: str, result=None):
+        """Record the run's outcome for anyone who joined it and free the lease"""
+        conn = self.connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute('''
+            UPDATE collection_runs SET status = ?, result = ?, finished_at = ? WHERE run_id = ?
+            ''', (status, _encode(result) if status == 'ok' else None, time.time(), self.run_id))
+            conn.execute("DELETE FROM collection_lease WHERE name = ? AND run_id = ?", (self.name, self.run_id))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self.run_id = None
+
+    def wait_for(self, run_id: str, deadline: float) -> Optional[Dict]:
+        """Block until ``run_id`` finishes; returns its run record, or None if it
+        was abandoned (the caller may then take the lease over)"""
+        while time.monotonic() < deadline:
+            conn = self.connect()
+            try:
+                run = conn.execute("SELECT * FROM collection_runs WHERE run_id = ?", (run_id,)).fetchone()
+                held = conn.execute("SELECT run_id, expires_at FROM collection_lease WHERE name = ?",
+                                    (self.name,)).fetchone()
+            finally:
+                conn.close()
+            if run is None or run['finished_at'] is not None:
+                return dict(run) if run else None
+            if held is None or held['run_id'] != run_id or held['expires_at'] <= time.time():
+                return None
+            time.sleep(POLL_INTERVAL)
+        raise CollectionBusyError(f"collection {run_id} still running after {JOIN_TIMEOUT:g}s")
+
+
+def lease_holder(db_path: str, name: str = "collection") -> Optional[Dict]:
+    """The unexpired lease on ``name``, or None if it is free (or was never taken)"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    try:
+        held = conn.execute("SELECT * FROM collection_lease WHERE name = ? AND expires_at > ?",
+                            (name, time.time())).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return dict(held) if held else None
+
+
+def ensure_lease_held():
+    """Raise ``CollectionLeaseLost`` if this thread's run no longer holds its
+    lease; collectors call it right before saving (a no-op outside a run)"""
+    lease = getattr(_active, 'lease', None)
+    if lease is None:
+        return
+    if lease.lost.is_set() or not lease.renew():
+        lease.lost.set()
+        raise CollectionLeaseLost(f"collection lease {lease.name!r} was taken over; not saving")
+
+
+def run_single_flight(db_path: str, method: str, fn: Callable, key: str = None, name: str = "collection",
+                      wait: bool = True):
+    """Run ``fn`` under the database's collection lease, or join an identical run already in flight.
+
+    With ``wait=False`` a held lease raises ``CollectionBusyError`` at once
+    instead of joining or waiting, for callers that must not block.
+    """
+    key = key or call_key(method, (), {})
+    lease = CollectionLease(db_path, name)
+    deadline = time.monotonic() + JOIN_TIMEOUT
+    while True:
+        held = lease.try_acquire(key, method)
+        if held is None:
+            break
+        if not wait:
+            raise CollectionBusyError(f"{held['method']} is already running ({held['owner']}); "
+                                      f"try again when it finishes")
+        joining = held['call_key'] == key
+        print(f"⏳ {held['method']} already running ({held['owner']}); "
+              f"{'joining it' if joining else 'waiting for it to finish'}...")
+        run = lease.wait_for(held['run_id'], deadline)
+        if joining and run and run['status'] == 'ok':
+            print(f"🤝 Joined {held['method']} run {held['run_id'][:8]}")
+            return _decode(run['result'])
+        # A different call, a failed run or an abandoned lease: try to take it
+
+    stop = threading.Event()
+
+    def keep_renewing():
+        while not stop.wait(lease.ttl / 3):
+            try:
+                if not lease.renew():
+                    print("⚠️ Collection lease lost (taken over as stale); the run will not save")
+                    lease.lost.set()
+                    return
+            except sqlite3.Error as e:
+                print(f"Lease renewal failed: {e}")
+
+    renewer = threading.Thread(target=keep_renewing, name="lease-renewer", daemon=True)
+    renewer.start()
+    outer = getattr(_active, 'lease', None)
+    _active.lease = lease
+    try:
+        result = fn()
+    except BaseException:
+        stop.set()
+        lease.release('error')
+        raise
+    finally:
+        _active.lease = outer
+    stop.set()
+    lease.release('ok', result)
+    return result
+
+
+def single_flight(method: str):
+    """Decorator for collector update methods: at most one collection per
+    database (``self.db_path``) at a time, and identical concurrent calls
+    share one run's result. The wrapped method also takes ``wait=False`` to
+    raise ``CollectionBusyError`` instead of waiting for another run."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, wait: bool = True, **kwargs):
+            key = call_key(method, args, kwargs)
+            return run_single_flight(self.db_path, method, lambda: func(self, *args, **kwargs), key,
+                                     wait=wait)
+        return wrapper
+    return decorator
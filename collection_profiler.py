@@ -0,0 +1,197 @@
+"""
+Collection Profiler
+Opt-in profiling of collection runs: cProfile pstats, sampled flamegraph
+stacks and tracemalloc allocation reports written next to the database
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import datetime
+import functools
+import threading
+import tracemalloc
+from collections import Counter
+
+# COLLECTOR_PROFILE=1|all        cProfile + sampler + tracemalloc
+# COLLECTOR_PROFILE=cprofile     deterministic profile only (plus tracemalloc)
+# COLLECTOR_PROFILE=sample       sampling profile only (plus tracemalloc)
+PROFILE_ENV = "COLLECTOR_PROFILE"
+PROFILE_DIR_ENV = "COLLECTOR_PROFILE_DIR"
+SAMPLE_INTERVAL_ENV = "COLLECTOR_PROFILE_INTERVAL_MS"
+TOP_ALLOCATIONS = 25
+
+
+def profile_mode() -> set:
+    """Profilers enabled by the environment (empty when profiling is off)"""
+    value = os.getenv(PROFILE_ENV, "").strip().lower()
+    if value in ("", "0", "false", "off", "no"):
+        return set()
+    if value in ("1", "true", "on", "yes", "all"):
+        return {"cprofile", "sample"}
+    return {mode.strip() for mode in value.split(",") if mode.strip()}
+
+
+def enable_from_argv(argv=None):
+    """Turn profiling on for this process when ``--profile[=mode]`` is passed"""
+    for arg in (argv if argv is not None else sys.argv[1:]):
+        if arg == "--profile":
+            os.environ[PROFILE_ENV] = "all"
+        elif arg.startswith("--profile="):
+            os.environ[PROFILE_ENV] = arg.split("=", 1)[1]
+
+
+class StackSampler:
+    """Wall-clock sampling profiler over all threads.
+
+    Produces stacks in the collapsed ``frame;frame;frame count`` format read
+    by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write_folded(self, path: str):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def write_allocation_report(path: str, snapshot, peak: int, top: int = TOP_ALLOCATIONS):
+    """Top-N allocation sites by size still held at the end of the run"""
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    stats = snapshot.statistics("lineno")
+    total = sum(stat.size for stat in stats)
+    with open(path, "w") as f:
+        f.write(f"Peak traced memory: {peak / 1024:.1f} KiB\n")
+        f.write(f"Retained at end of run: {total / 1024:.1f} KiB in {len(stats)} sites\n\n")
+        f.write(f"Top {top} allocation sites:\n")
+        for index, stat in enumerate(stats[:top], 1):
+            frame = stat.traceback[0]
+            f.write(f"#{index:>2} {frame.filename}:{frame.lineno}: "
+                    f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+
+
+class CollectionProfiler:
+    """Profile one collection run and write its reports to ``output_dir``"""
+
+    def __init__(self, name: str, output_dir: str, modes: set):
+        self.name = name
+        self.output_dir = output_dir
+        self.modes = modes
+        self.profile = cProfile.Profile() if "cprofile" in modes else None
+        interval_ms = float(os.getenv(SAMPLE_INTERVAL_ENV, "5"))
+        self.sampler = StackSampler(interval_ms / 1000.0) if "sample" in modes else None
+        self.started_tracemalloc = False
+        self.paths = {}
+
+    def __enter__(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        tracemalloc.reset_peak()
+        if self.sampler:
+            self.sampler.start()
+        if self.profile:
+            self.profile.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        if self.profile:
+            self.profile.disable()
+        if self.sampler:
+            self.sampler.stop()
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+
+        try:
+            self.write_reports(snapshot, peak, elapsed)
+        except OSError as e:
+            print(f"Could not write profile for {self.name}: {e}")
+        return False
+
+    def write_reports(self, snapshot, peak: int, elapsed: float):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.output_dir, f"{self.name}-{stamp}-{os.getpid()}")
+
+        if self.profile:
+            self.paths["pstats"] = f"{base}.pstats"
+            self.profile.dump_stats(self.paths["pstats"])
+            self.paths["pstats_txt"] = f"{base}.pstats.txt"
+            with open(self.paths["pstats_txt"], "w") as f:
+                stats = pstats.Stats(self.profile, stream=f)
+                stats.sort_stats("cumulative").print_stats(40)
+        if self.sampler:
+            self.paths["folded"] = f"{base}.folded"
+            self.sampler.write_folded(self.paths["folded"])
+        self.paths["allocations"] = f"{base}.alloc.txt"
+        write_allocation_report(self.paths["allocations"], snapshot, peak)
+
+        print(f"🔬 Profiled {self.name} ({elapsed:.1f}s, peak traced {peak / 1024 / 1024:.1f} MiB):")
+        for kind, path in self.paths.items():
+            print(f"   • {kind}: {path}")
+
+
+def profile_output_dir(db_path: str) -> str:
+    override = os.getenv(PROFILE_DIR_ENV)
+    if override:
+        return override
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "profiles")
+
+
+def profiled(name: str):
+    """Decorate a collector update method so it is profiled when enabled.
+
+    The switch is read on every call, so a long-lived process can turn
+    profiling on without restarting. The decorated method's ``self`` must
+    have a ``db_path``.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            modes = profile_mode()
+            if not modes:
+                return method(self, *args, **kwargs)
+            with CollectionProfiler(name, profile_output_dir(self.db_path), modes):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,379 @@
+"""
+Collector Metrics
+Per-stage and per-source instrumentation for collection runs, exposed as a
+JSON run summary and as Prometheus text
+"""
+
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+# Fetch latency histogram buckets in seconds
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram in the Prometheus style"""
+
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = []
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def merge(self, other: "LatencyHistogram"):
+        self.count += other.count
+        self.sum += other.sum
+        for i, count in enumerate(other.counts):
+            self.counts[i] += count
+
+    def percentile(self, pct: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'sum_s': round(self.sum, 4),
+            'p50_s': round(self.percentile(50), 4),
+            'p95_s': round(self.percentile(95), 4),
+            'max_s': round(max(self.samples), 4) if self.samples else 0.0,
+            'buckets': {str(bound): count for bound, count in zip(self.buckets, self.counts)},
+        }
+
+
+class CollectionMetrics:
+    """Timings and counters for one collection run.
+
+    Stages are wall time and may nest, so they are inclusive and do not sum
+    to the run's elapsed time. Work done inside worker threads (``scoring``)
+    is a CPU stage instead: thread CPU seconds summed across workers, which
+    can exceed the elapsed time when workers overlap. Safe to update from
+    worker threads.
+    """
+
+    def __init__(self, collector: str, method: str = None):
+        self.collector = collector
+        self.method = method
+        self.started_at = datetime.datetime.now(datetime.timezone.utc)
+        self.start = time.perf_counter()
+        self.elapsed = None
+        self.stages = {}
+        self.cpu_stages = {}
+        self.counters = {
+            'entries_parsed': 0,
+            'entries_scored': 0,
+            'keyword_hits': 0,
+            'articles_matched': 0,
+            'articles_unique': 0,
+            'rows_inserted': 0,
+            'sources_missed_deadline': 0,
+        }
+        self.sources = {}
+        self.missed_deadline = []
+        self.fetch_latency = LatencyHistogram()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Accumulate wall time spent in ``name``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name] = self.stages.get(name, 0.0) + elapsed
+
+    @contextmanager
+    def cpu_stage(self, name: str):
+        """Accumulate this thread's CPU time spent in ``name``"""
+        start = time.thread_time()
+        try:
+            yield
+        finally:
+            elapsed = time.thread_time() - start
+            with self._lock:
+                self.cpu_stages[name] = self.cpu_stages.get(name, 0.0) + elapsed
+
+    def _source(self, source: str) -> Dict:
+        if source not in self.sources:
+            self.sources[source] = {
+                'fetch_s': 0.0, 'bytes': 0, 'entries': 0, 'scored': 0,
+                'keyword_hits': 0, 'matched': 0, 'error': None,
+            }
+        return self.sources[source]
+
+    def record_fetch(self, source: str, seconds: float, nbytes: int, entries: int, error: str = None):
+        with self._lock:
+            stats = self._source(source)
+            stats['fetch_s'] += seconds
+            stats['bytes'] += nbytes
+            stats['entries'] += entries
+            stats['error'] = error
+            self.counters['entries_parsed'] += entries
+            self.fetch_latency.observe(seconds)
+
+    def record_entry(self, source: str, keyword_hit: bool):
+        """Count one scored entry and whether it matched any keyword"""
+        with self._lock:
+            stats = self._source(source)
+            stats['scored'] += 1
+            self.counters['entries_scored'] += 1
+            if keyword_hit:
+                stats['keyword_hits'] += 1
+                self.counters['keyword_hits'] += 1
+
+    def record_match(self, source: str, count: int = 1):
+        """Count articles that passed the keyword + sentiment filter"""
+        with self._lock:
+            self._source(source)['matched'] += count
+            self.counters['articles_matched'] += count
+
+    def record_missed(self, sources: List[str]):
+        """Note sources still in flight (or queued) when the run's deadline passed"""
+        with self._lock:
+            for source in sources:
+                self._source(source)['error'] = 'DeadlineExceeded'
+                self.missed_deadline.append(source)
+            self.counters['sources_missed_deadline'] += len(sources)
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def finish(self) -> Dict:
+        """Close the run, publish it to the process registry and return its summary"""
+        self.elapsed = time.perf_counter() - self.start
+        summary = self.summary()
+        REGISTRY.record_run(self, summary)
+        return summary
+
+    def summary(self) -> Dict:
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.start
+        with self._lock:
+            scored = self.counters['entries_scored']
+            totals = dict(self.counters)
+            totals['sources'] = len(self.sources)
+            totals['sources_failed'] = sum(1 for s in self.sources.values() if s['error'])
+            totals['bytes_downloaded'] = sum(s['bytes'] for s in self.sources.values())
+            totals['keyword_hit_rate'] = round(self.counters['keyword_hits'] / scored, 4) if scored else 0.0
+            return {
+                'collector': self.collector,
+                'method': self.method,
+                'started_at': self.started_at.isoformat(),
+                'elapsed_s': round(elapsed, 4),
+                'stages': {name: round(seconds, 4) for name, seconds in self.stages.items()},
+                'cpu_stages': {name: round(seconds, 4) for name, seconds in self.cpu_stages.items()},
+                'totals': totals,
+                'fetch_latency': self.fetch_latency.summary(),
+                'missed_deadline': list(self.missed_deadline),
+                'sources': {
+                    source: dict(stats, fetch_s=round(stats['fetch_s'], 4))
+                    for source, stats in self.sources.items()
+                },
+            }
+
+
+def _escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + '}'
+
+
+class MetricsRegistry:
+    """Process-wide totals across collection runs for the Prometheus endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.runs = {}
+        self.stages = {}
+        self.cpu_stages = {}
+        self.counters = {}
+        self.fetch_latency = {}
+        self.sources = {}
+        self.last_summaries = {}
+
+    def record_run(self, metrics: CollectionMetrics, summary: Dict = None):
+        key = (metrics.collector, metrics.method or '')
+        summary = summary or metrics.summary()
+        # Copy under the run's own lock: abandoned workers may still be updating it
+        with metrics._lock:
+            stages = dict(metrics.stages)
+            cpu_stages = dict(metrics.cpu_stages)
+            counters = dict(metrics.counters)
+            sources = {source: dict(stats) for source, stats in metrics.sources.items()}
+            fetch_latency = LatencyHistogram(metrics.fetch_latency.buckets)
+            fetch_latency.merge(metrics.fetch_latency)
+
+        with self._lock:
+            run = self.runs.setdefault(key, {'count': 0, 'seconds': 0.0, 'last_seconds': 0.0})
+            run['count'] += 1
+            run['seconds'] += metrics.elapsed or 0.0
+            run['last_seconds'] = metrics.elapsed or 0.0
+
+            for stage, seconds in stages.items():
+                self.stages[key + (stage,)] = self.stages.get(key + (stage,), 0.0) + seconds
+            for stage, seconds in cpu_stages.items():
+                self.cpu_stages[key + (stage,)] = self.cpu_stages.get(key + (stage,), 0.0) + seconds
+            for name, value in counters.items():
+                self.counters[key + (name,)] = self.counters.get(key + (name,), 0) + value
+
+            histogram = self.fetch_latency.setdefault(metrics.collector, LatencyHistogram())
+            histogram.merge(fetch_latency)
+
+            for source, stats in sources.items():
+                totals = self.sources.setdefault(source, {
+                    'fetches': 0, 'errors': 0, 'bytes': 0, 'entries': 0, 'scored': 0,
+                    'keyword_hits': 0, 'matched': 0, 'last_fetch_s': 0.0,
+                })
+                totals['fetches'] += 1
+                totals['errors'] += 1 if stats['error'] else 0
+                totals['bytes'] += stats['bytes']
+                totals['entries'] += stats['entries']
+                totals['scored'] += stats['scored']
+                totals['keyword_hits'] += stats['keyword_hits']
+                totals['matched'] += stats['matched']
+                totals['last_fetch_s'] = stats['fetch_s']
+
+            self.last_summaries['.'.join(filter(None, key))] = summary
+
+        textfile = os.getenv('COLLECTOR_METRICS_TEXTFILE')
+        if textfile:
+            self.write_textfile(textfile)
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("news_collector_runs_total", "counter", "Completed collection runs")
+            for (collector, method), run in sorted(self.runs.items()):
+                lines.append(f"news_collector_runs_total{_labels(collector=collector, method=method)} {run['count']}")
+            family("news_collector_run_seconds_total", "counter", "Wall time spent in collection runs")
+            for (collector, method), run in sorted(self.runs.items()):
+                lines.append(f"news_collector_run_seconds_total{_labels(collector=collector, method=method)} {run['seconds']:.6f}")
+            family("news_collector_last_run_seconds", "gauge", "Wall time of the most recent run")
+            for (collector, method), run in sorted(self.runs.items()):
+                lines.append(f"news_collector_last_run_seconds{_labels(collector=collector, method=method)} {run['last_seconds']:.6f}")
+
+            family("news_collector_stage_seconds_total", "counter", "Wall time per collection stage (stages may nest)")
+            for (collector, method, stage), seconds in sorted(self.stages.items()):
+                lines.append(f"news_collector_stage_seconds_total{_labels(collector=collector, method=method, stage=stage)} {seconds:.6f}")
+            family("news_collector_stage_cpu_seconds_total", "counter", "Thread CPU time per stage summed across workers")
+            for (collector, method, stage), seconds in sorted(self.cpu_stages.items()):
+                lines.append(f"news_collector_stage_cpu_seconds_total{_labels(collector=collector, method=method, stage=stage)} {seconds:.6f}")
+
+            for counter in ('entries_parsed', 'entries_scored', 'keyword_hits', 'articles_matched', 'articles_unique', 'rows_inserted',
+                            'sources_missed_deadline', 'sources_skipped'):
+                name = f"news_collector_{counter}_total"
+                family(name, "counter", counter.replace('_', ' ').capitalize())
+                for (collector, method, key), value in sorted(self.counters.items()):
+                    if key == counter:
+                        lines.append(f"{name}{_labels(collector=collector, method=method)} {value}")
+
+            family("news_collector_fetch_duration_seconds", "histogram", "Feed fetch latency")
+            for collector, histogram in sorted(self.fetch_latency.items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"news_collector_fetch_duration_seconds_bucket{_labels(collector=collector, le=bound)} {count}")
+                lines.append(f"news_collector_fetch_duration_seconds_bucket{_labels(collector=collector, le='+Inf')} {histogram.count}")
+                lines.append(f"news_collector_fetch_duration_seconds_sum{_labels(collector=collector)} {histogram.sum:.6f}")
+                lines.append(f"news_collector_fetch_duration_seconds_count{_labels(collector=collector)} {histogram.count}")
+
+            source_families = [
+                ('fetches', 'news_source_fetches_total', 'counter', 'Fetch attempts per source'),
+                ('errors', 'news_source_fetch_errors_total', 'counter', 'Failed fetches per source'),
+                ('bytes', 'news_source_bytes_total', 'counter', 'Bytes downloaded per source'),
+                ('entries', 'news_source_entries_parsed_total', 'counter', 'Entries parsed per source'),
+                ('scored', 'news_source_entries_scored_total', 'counter', 'Entries run through keyword matching per source'),
+                ('keyword_hits', 'news_source_keyword_hits_total', 'counter', 'Entries with keyword hits per source'),
+                ('matched', 'news_source_articles_matched_total', 'counter', 'Articles kept per source'),
+                ('last_fetch_s', 'news_source_last_fetch_seconds', 'gauge', 'Latency of the latest fetch per source'),
+            ]
+            for key, name, kind, help_text in source_families:
+                family(name, kind, help_text)
+                for source, totals in sorted(self.sources.items()):
+                    lines.append(f"{name}{_labels(source=source)} {totals[key]}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write metrics for a node_exporter textfile collector (atomic replace)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def summaries(self) -> Dict:
+        with self._lock:
+            return dict(self.last_summaries)
+
+
+REGISTRY = MetricsRegistry()
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY):
+    """Serve ``/metrics`` (Prometheus text) and ``/metrics.json`` (last run summaries)"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split('?')[0]
+            if path == '/metrics':
+                body = registry.render_prometheus().encode()
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif path == '/metrics.json':
+                body = json.dumps(registry.summaries(), indent=2).encode()
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def maybe_start_metrics_server():
+    """Start the metrics endpoint if ``COLLECTOR_METRICS_PORT`` is set"""
+    port = os.getenv('COLLECTOR_METRICS_PORT')
+    if not port:
+        return None
+    try:
+        server = start_metrics_server(int(port))
+        print(f"📈 Collector metrics on :{port}/metrics")
+        return server
+    except (OSError, ValueError) as e:
+        print(f"Could not start metrics server on {port}: {e}")
+        return None
@@ -0,0 +1,328 @@
+"""
+Company Entities
+Company names found in each article at ingest. A curated gazetteer of
+companies and their aliases is compiled once into a word trie that is walked
+over the article's tokens, finding the longest alias at each word in one
+pass; matches must be capitalized like a name, so "target" or "shell" in
+running text are not companies. Aliases that are also common words (Target,
+Shell, Gap) carry no case signal in title-cased or all-caps text, so there
+they also need a possessive or a legal suffix; otherwise only a mention in
+the sentence-case description counts. Names the gazetteer does not know are
+picked up from capitalized words ending in a legal suffix ("Acme Widgets
+Inc."). Results are stored in the indexed article_companies table, which
+outlives archiving, so per-company counts and timelines are index range
+scans over both the hot table and the archive.
+"""
+
+import sqlite3
+from typing import Dict, List, Tuple
+
+# Canonical company name -> other names it appears under
+COMPANY_GAZETTEER = {
+    # Retail and consumer
+    'Walmart': ['Wal-Mart'],
+    'Target': [],
+    'Amazon': ['Amazon.com'],
+    'Costco': [],
+    'Kroger': [],
+    'Walgreens': ['Walgreens Boots Alliance'],
+    'CVS Health': ['CVS'],
+    'Rite Aid': [],
+    'Macy\'s': ['Macys'],
+    'Kohl\'s': ['Kohls'],
+    'Nordstrom': [],
+    'JCPenney': ['J.C. Penney', 'JC Penney'],
+    'Sears': [],
+    'Best Buy': [],
+    'Home Depot': [],
+    'Lowe\'s': [],
+    'Dollar General': [],
+    'Dollar Tree': ['Family Dollar'],
+    'Big Lots': [],
+    'Bed Bath & Beyond': ['Bed Bath and Beyond'],
+    'Party City': [],
+    'Joann': ['Jo-Ann Stores', 'Joann Fabrics'],
+    'Gap': ['Gap Inc', 'Old Navy'],
+    'Foot Locker': [],
+    'Nike': [],
+    'Starbucks': [],
+    'McDonald\'s': ['McDonalds'],
+    'Red Lobster': [],
+    'TGI Fridays': ['TGI Friday\'s'],
+    'Hooters': [],
+    'Nestle': ['Nestlé'],
+    'Procter & Gamble': ['Procter and Gamble', 'P&G'],
+    'Unilever': [],
+    'PepsiCo': ['Pepsi'],
+    'Coca-Cola': ['Coca Cola'],
+    'Kraft Heinz': [],
+    'Tyson Foods': ['Tyson'],
+    # Technology and telecom
+    'Apple': [],
+    'Microsoft': [],
+    'Alphabet': ['Google'],
+    'Meta': ['Meta Platforms', 'Facebook'],
+    'Netflix': [],
+    'Nvidia': ['NVIDIA'],
+    'Intel': [],
+    'AMD': ['Advanced Micro Devices'],
+    'IBM': [],
+    'Oracle': [],
+    'Salesforce': [],
+    'Cisco': [],
+    'Dell': ['Dell Technologies'],
+    'HP': ['Hewlett Packard', 'Hewlett-Packard', 'HPE'],
+    'Qualcomm': [],
+    'Micron': [],
+    'Samsung': [],
+    'Sony': [],
+    'Tesla': [],
+    'Twitter': ['X Corp'],
+    'OpenAI': [],
+    'Uber': [],
+    'Lyft': [],
+    'Airbnb': [],
+    'DoorDash': [],
+    'Snap Inc': ['Snapchat'],
+    'Spotify': [],
+    'PayPal': [],
+    'Shopify': [],
+    'Zoom Video': ['Zoom Video Communications'],
+    'Peloton': [],
+    'WeWork': [],
+    'Rivian': [],
+    'Lucid Motors': ['Lucid Group'],
+    'Nikola': [],
+    'AT&T': [],
+    'Verizon': [],
+    'T-Mobile': [],
+    'Comcast': [],
+    'Charter Communications': [],
+    # Finance
+    'JPMorgan Chase': ['JPMorgan', 'JP Morgan'],
+    'Bank of America': ['BofA'],
+    'Wells Fargo': [],
+    'Citigroup': ['Citi', 'Citibank'],
+    'Goldman Sachs': ['Goldman'],
+    'Morgan Stanley': [],
+    'Charles Schwab': ['Schwab'],
+    'BlackRock': [],
+    'Credit Suisse': [],
+    'UBS': [],
+    'HSBC': [],
+    'Barclays': [],
+    'Deutsche Bank': [],
+    'Silicon Valley Bank': ['SVB'],
+    'Signature Bank': [],
+    'First Republic': ['First Republic Bank'],
+    'New York Community Bank': ['NYCB', 'Flagstar'],
+    'Berkshire Hathaway': [],
+    'FTX': [],
+    'Binance': [],
+    'Coinbase': [],
+    'Visa': [],
+    'Mastercard': [],
+    'American Express': ['Amex'],
+    # Industrial, energy and transport
+    'Boeing': [],
+    'Airbus': [],
+    'Lockheed Martin': [],
+    'General Electric': ['GE', 'GE Aerospace', 'GE Vernova'],
+    'Caterpillar': [],
+    'Honeywell': [],
+    'General Motors': ['GM'],
+    'Ford': ['Ford Motor'],
+    'Stellantis': ['Chrysler', 'Jeep'],
+    'Toyota': [],
+    'Volkswagen': ['VW'],
+    'Nissan': [],
+    'Honda': [],
+    'ExxonMobil': ['Exxon', 'Exxon Mobil'],
+    'Chevron': [],
+    'Shell': [],
+    'BP': [],
+    'Spirit Airlines': [],
+    'American Airlines': [],
+    'Delta Air Lines': ['Delta Airlines', 'Delta'],
+    'United Airlines': [],
+    'Southwest Airlines': [],
+    'JetBlue': [],
+    'FedEx': [],
+    'UPS': [],
+    'Yellow Corp': [],
+    'Norfolk Southern': [],
+    'US Steel': ['U.S. Steel'],
+    # Health and pharma
+    'Pfizer': [],
+    'Johnson & Johnson': ['J&J'],
+    'Moderna': [],
+    'Merck': [],
+    'Bayer': [],
+    'UnitedHealth': ['UnitedHealth Group', 'UnitedHealthcare'],
+    'Purdue Pharma': [],
+    # Media and entertainment
+    'Disney': ['Walt Disney'],
+    'Warner Bros. Discovery': ['Warner Bros Discovery', 'Warner Bros.', 'WBD'],
+    'Paramount': ['Paramount Global'],
+    'AMC Entertainment': ['AMC'],
+    'Fox Corp': ['Fox News'],
+    'CNN': [],
+    'Vice Media': [],
+    'BuzzFeed': [],
+    'Evergrande': ['China Evergrande'],
+    'Country Garden': [],
+}
+
+# Legal-form suffixes that mark a capitalized phrase as a company name
+LEGAL_SUFFIXES = ('Inc', 'Incorporated', 'Corp', 'Corporation', 'LLC', 'Ltd', 'Limited', 'PLC',
+                  'AG', 'SE', 'NV', 'N.V', 'SA', 'S.A', 'GmbH', 'Co')
+LEGAL_SUFFIX_SET = frozenset(LEGAL_SUFFIXES)
+LEGAL_SUFFIX_KEYS = frozenset(suffix.lower().rstrip('.') for suffix in LEGAL_SUFFIXES)
+# Aliases that are ordinary English words when written in title case
+AMBIGUOUS_ALIASES = frozenset('''
+Alphabet Amazon Apple Caterpillar Chevron Delta Dell Ford Gap Intel Jeep Meta Micron Oracle Paramount Shell
+Target Visa
+'''.split())
+# Capitalized words that start or join a headline rather than a name
+NAME_BREAKERS = frozenset('''
+A An And As At After Against Amid Before By For From How In Into Is Its New Of On Or Over The To Under Why With
+Company Group
+Announces Beats Buys Closes Closing Cut Cuts Files Filed Hit Hits Lays Layoffs Misses Plans Reports Said Says
+Sells Sued Sues Warns
+'''.split())
+
+# Punctuation around a word that is not part of a name; closing marks end a name
+OPENING = '("\'“‘['
+CLOSING = ',;:!?)]"”'
+
+
+def create_company_tables(conn: sqlite3.Connection):
+    """Company links keyed for per-company range scans, plus a window index for counts"""
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS article_companies (
+        company TEXT NOT NULL,
+        published_at REAL NOT NULL,
+        article_id INTEGER NOT NULL,
+        PRIMARY KEY (company, published_at, article_id)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_article_companies_published_at ON article_companies (published_at, company);
+    ''')
+
+
+def _token_key(word: str) -> str:
+    """Case- and punctuation-insensitive form of a word (J.C. Penney, Macy’s, Inc.)"""
+    return word.strip(OPENING + CLOSING).lower().replace('’', "'").rstrip(".'-")
+
+
+def _build_trie() -> Tuple[Dict, Dict[str, str]]:
+    """Word trie over every alias (terminal nodes hold ``(company, alias)`` under ``None``)
+    and the canonical company of each alias key"""
+    trie: Dict = {}
+    aliases = {}
+    for company, names in COMPANY_GAZETTEER.items():
+        for name in [company] + names:
+            keys = [_token_key(word) for word in name.split()]
+            node = trie
+            for key in keys:
+                node = node.setdefault(key, {})
+            node.setdefault(None, (company, name))
+            aliases.setdefault(' '.join(keys), company)
+    return trie, aliases
+
+
+COMPANY_TRIE, ALIASES = _build_trie()
+
+
+def _is_capitalized_like(found: str, alias: str) -> bool:
+    """True if ``found`` is written the way a name would be (``alias`` is the gazetteer spelling)"""
+    if alias[0].isupper() and not found[0].isupper():
+        return False
+    # All-caps aliases (BP, GM, UPS) must match in capitals, not as ordinary words
+    return not alias.isupper() or found.isupper()
+
+
+def _is_title_cased(words: List[str]) -> bool:
+    """True for headline-style text where every longer word is capitalized (or all caps)"""
+    return not any(word[0].islower() for word in words if len(word) > 3)
+
+
+def _has_name_signal(words: List[str], end: int) -> bool:
+    """A possessive ("Target's") or a legal suffix ("Shell Plc") on the alias ending before ``end``"""
+    if _token_key(words[end - 1]).endswith("'s"):
+        return True
+    return end < len(words) and _token_key(words[end]) in LEGAL_SUFFIX_KEYS
+
+
+def _companies_in(text: str, companies: List[str]):
+    """Append the companies named in ``text``: the longest gazetteer alias starting at
+    each capitalized word, else a capitalized run ending in a legal suffix"""
+    if text.islower():
+        # No capitals at all, so no names (the usual case for descriptions)
+        return
+    words = text.split()
+    count = len(words)
+    title_cased = None
+    resume = 0
+    # Every alias and legal suffix is written with a leading capital or digit
+    for i in [i for i, word in enumerate(words) if not word[0].islower()]:
+        if i < resume:
+            continue
+        word = words[i].lstrip(OPENING)
+        if not word or not (word[0].isupper() or word[0].isdigit()):
+            continue
+
+        node, found, j = COMPANY_TRIE, None, i
+        while j < count:
+            key = _token_key(words[j])
+            child = node.get(key)
+            if child is None and key.endswith("'s"):
+                child = node.get(key[:-2])
+            if child is None:
+                break
+            node = child
+            j += 1
+            if None in node:
+                found = (j, node[None])
+            if words[j - 1][-1] in CLOSING:
+                break
+        if found and _is_capitalized_like(word, found[1][1]):
+            company, alias = found[1]
+            if alias in AMBIGUOUS_ALIASES:
+                if title_cased is None:
+                    title_cased = _is_title_cased(words)
+                if title_cased and not _has_name_signal(words, found[0]):
+                    # "Layoffs Target Workers": the capital says nothing here
+                    continue
+            if company not in companies:
+                companies.append(company)
+            resume = found[0]
+            continue
+
+        if i and word.rstrip(CLOSING + '.') in LEGAL_SUFFIX_SET:
+            # Keep the trailing run of name words: "Shares Of Acme Widgets Inc" -> "Acme Widgets"
+            start = i
+            while start > 0 and i - start < 3:
+                previous = words[start - 1]
+                if previous[-1] in CLOSING or not previous[0].isupper() or previous in NAME_BREAKERS:
+                    break
+                start -= 1
+            name = ' '.join(words[start:i]).strip(OPENING + " .'")
+            if name and (i - start > 1 or len(name) > 2):
+                company = ALIASES.get(' '.join(_token_key(w) for w in words[start:i]), name)
+                if company not in companies:
+                    companies.append(company)
+
+
+def extract_companies(title: str, description: str = '') -> Tuple[str, ...]:
+    """Distinct company names mentioned in an article, in order of mention (an
+    ambiguous alias in a title-cased headline counts from its description mention)"""
+    companies = []
+    for text in (title, description):
+        if text:
+            _companies_in(text, companies)
+    return tuple(companies)
+
+
+def canonical_company(name: str) -> str:
+    """Gazetteer name for ``name`` or any of its aliases (``name`` itself if unknown)"""
+    return ALIASES.get(' '.join(_token_key(word) for word in name.split()), name.strip())
@@ -10,6 +10,7 @@ import time
 from typing import List, Dict
 import os
 from datetime import datetime, timedelta
+from article_record import ArticleRecord
 
 class ComprehensiveNewsAggregator:
     
@@ -280,7 +281,7 @@ class ComprehensiveNewsAggregator:
             print(f"Error fetching from NewsData.io: {e}")
         return []
     
-    def fetch_from_reddit_business(self) -> List[Dict]:
+    def fetch_from_reddit_business(self) -> List[ArticleRecord]:
         """Fetch business crisis discussions from Reddit"""
         articles = []
         for subreddit_url in self.social_sources['reddit_business']:
@@ -299,15 +300,17 @@ class ComprehensiveNewsAggregator:
                         # Check for crisis keywords
                         if any(keyword in title.lower() for keyword in 
                               ['bankruptcy', 'layoff', 'closure', 'crisis', 'struggling', 'fail']):
-                            articles.append({
-                                'title': title,
-                                'link': f"https://reddit.com{post_data.get('permalink', '')}",
-                                'description': post_data.get('selftext', '')[:200],
-                                'published': datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat(),
-                                'source': 'Reddit Business',
-                                'sentiment_score': -0.2,
-                                'negative_keywords': 'reddit_discussion'
-                            })
+                            articles.append(ArticleRecord(
+                                title=title,
+                                link=f"https://reddit.com{post_data.get('permalink', '')}",
+                                description=post_data.get('selftext', '')[:200],
+                                published=datetime.fromtimestamp(post_data.get('created_utc', 0)).isoformat(),
+                                source='Reddit Business',
+                                sentiment_score=-0.2,
+                                negative_keywords='reddit_discussion',
+                                source_type='reddit',
+                                published_at=post_data.get('created_utc') or None
+                            ))
                 
                 time.sleep(1)  # Rate limiting
             except Exception as e:
@@ -316,7 +319,7 @@ class ComprehensiveNewsAggregator:
         
         return articles
     
-    def fetch_from_hackernews(self) -> List[Dict]:
+    def fetch_from_hackernews(self) -> List[ArticleRecord]:
         """Fetch business crisis stories from Hacker News"""
         articles = []
         try:
@@ -337,15 +340,17 @@ class ComprehensiveNewsAggregator:
                             # Check for business crisis keywords
                             if any(keyword in title.lower() for keyword in 
                                   ['startup', 'layoff', 'shutdown', 'bankruptcy', 'closure', 'fail']):
-                                articles.append({
-                                    'title': title,
-                                    'link': story_data.get('url', f"https://news.ycombinator.com/item?id={story_id}"),
-                                    'description': f"Hacker News discussion: {title}",
-                                    'published': datetime.fromtimestamp(story_data.get('time', 0)).isoformat(),
-                                    'source': 'Hacker News',
-                                    'sentiment_score': -0.1,
-                                    'negative_keywords': 'tech_discussion'
-                                })
+                                articles.append(ArticleRecord(
+                                    title=title,
+                                    link=story_data.get('url', f"https://news.ycombinator.com/item?id={story_id}"),
+                                    description=f"Hacker News discussion: {title}",
+                                    published=datetime.fromtimestamp(story_data.get('time', 0)).isoformat(),
+                                    source='Hacker News',
+                                    sentiment_score=-0.1,
+                                    negative_keywords='tech_discussion',
+                                    source_type='hackernews',
+                                    published_at=story_data.get('time') or None
+                                ))
                         
                         time.sleep(0.1)  # Rate limiting
                     except Exception as e:
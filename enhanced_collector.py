@@ -15,6 +15,20 @@ import re
 from typing import List, Dict
 from comprehensive_news_sources import ComprehensiveNewsAggregator
 from local_news_sources import LocalNewsSourcesCollector
+from collector_metrics import CollectionMetrics
+from collection_profiler import profiled, enable_from_argv
+from collection_lease import ensure_lease_held, single_flight
+from collection_checkpoint import CollectionCheckpoint
+from feed_fetcher import fetch_feed, feed_cursor
+from feed_state import FeedStateStore
+from news_snapshots import SnapshotStore
+from read_snapshot import publish_read_snapshot
+from news_archive import archive_expired, HOT_RETENTION_HOURS
+from story_clusters import StoryClusterer
+from watchlists import WatchlistMatcher, deliver_notifications
+from news_schema import migrate_database, insert_articles, ArticleLinkWriter, KEYWORD_CATEGORIES
+from text_normalizer import normalize_entry, clean_text, as_normalized
+from article_record import ArticleRecord
 
 class EnhancedNegativeNewsCollector:
     def __init__(self, db_path="news_data.db"):
@@ -23,46 +37,29 @@ class EnhancedNegativeNewsCollector:
         self.local_collector = LocalNewsSourcesCollector()
         
         # Enhanced negative keywords with categories
-        self.negative_keywords = {
-            'bankruptcy': [
-                "bankruptcy", "bankrupt", "chapter 11", "chapter 7", "insolvency",
-                "filed for bankruptcy", "liquidation", "financial collapse", "receivership"
-            ],
-            'closures': [
-                "closure", "shutdown", "closing down", "going out of business",
-                "ceased operations", "wind down", "store closures", "closing stores",
-                "plant closure", "facility shutdown", "business closure", "shuttering"
-            ],
-            'layoffs': [
-                "layoffs", "mass layoffs", "cutting jobs", "firing", "downsizing",
-                "job cuts", "workforce reduction", "eliminating jobs", "staff reduction",
-                "redundancies", "pink slips", "employment cuts", "terminations", "RIF"
-            ],
-            'financial_distress': [
-                "losses", "failing", "collapse", "decline", "crisis", "struggling",
-                "financial troubles", "cash flow problems", "debt crisis", "revenue decline",
-                "profit decline", "financial distress", "funding crisis", "cost cutting"
-            ],
-            'corporate_issues': [
-                "restructuring", "reorganization", "asset sales", "divestiture",
-                "spin off", "breakup", "rightsizing", "cost reduction", "warn notice"
-            ],
-            'market_troubles': [
-                "shares fall", "stock drops", "market decline", "investor concerns",
-                "disappointing results", "missed earnings", "guidance cut", "outlook lowered",
-                "warning issued", "profit warning", "revenue warning"
-            ],
-            'legal_troubles': [
-                "investigation", "lawsuit", "legal troubles", "scandal", "fraud",
-                "misconduct", "penalty", "fine", "settlement", "violation"
-            ]
-        }
+        self.negative_keywords = KEYWORD_CATEGORIES
         
         self.all_keywords = []
         for category, keywords in self.negative_keywords.items():
             self.all_keywords.extend(keywords)
         
+        # Metrics for the current (or most recent) collection run
+        self.metrics = CollectionMetrics("enhanced_collector")
+        
+        # Per-feed newest-entry cursors: loaded at the start of a run, advanced after saving
+        self.last_seen = {}
+        self.feed_cursors = {}
+        
+        # Per-source progress of the running comprehensive_update (None outside one)
+        self.checkpoint = None
+        
         self.setup_database()
+        self.feed_state = FeedStateStore(db_path)
+        self.snapshots = SnapshotStore(db_path)
+        # Sliding window of recent article vectors, kept between saves
+        self.stories = StoryClusterer()
+        # Standing queries, recompiled when they change
+        self.watchlists = WatchlistMatcher()
         
     def setup_database(self):
         """Initialize SQLite database (use existing schema)"""
@@ -82,23 +79,22 @@ class EnhancedNegativeNewsCollector:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        migrate_database(conn)
         
         conn.commit()
         conn.close()
     
-    def analyze_sentiment(self, text: str) -> float:
-        """Analyze sentiment using TextBlob"""
+    def analyze_sentiment(self, text) -> float:
+        """Analyze sentiment using TextBlob (raw text or NormalizedText)"""
         try:
-            clean_text = self.clean_html(text)
-            blob = TextBlob(clean_text)
+            blob = TextBlob(as_normalized(text).full_text)
             return blob.sentiment.polarity
         except:
             return 0.0
     
     def clean_html(self, text: str) -> str:
-        """Remove HTML tags from text"""
-        clean = re.compile('<.*?>')
-        return re.sub(clean, '', text)
+        """Remove HTML tags and entities from text"""
+        return clean_text(text)
     
     def categorize_keywords(self, found_keywords: List[str]) -> str:
         """Categorize found keywords into crisis types"""
@@ -108,9 +104,9 @@ class EnhancedNegativeNewsCollector:
                 categories.append(category)
         return ','.join(categories) if categories else 'general'
     
-    def contains_negative_keywords(self, text: str) -> List[str]:
-        """Check if text contains negative business keywords"""
-        text_lower = self.clean_html(text).lower()
+    def contains_negative_keywords(self, text) -> List[str]:
+        """Check if text (raw or NormalizedText) contains negative business keywords"""
+        text_lower = as_normalized(text).lower
         found_keywords = []
         
         for keyword in self.all_keywords:
@@ -119,7 +115,7 @@ class EnhancedNegativeNewsCollector:
         
         return found_keywords
     
-    def fetch_from_multiple_apis(self) -> List[Dict]:
+    def fetch_from_multiple_apis(self) -> List[ArticleRecord]:
         """Fetch from multiple news APIs"""
         all_articles = []
         
@@ -174,120 +170,150 @@ class EnhancedNegativeNewsCollector:
         
         return all_articles
     
-    def process_newsapi_articles(self, articles: List[Dict]) -> List[Dict]:
+    def process_newsapi_articles(self, articles: List[Dict]) -> List[ArticleRecord]:
         """Process NewsAPI articles"""
         processed = []
         for article in articles:
             title = article.get('title', '')
             description = article.get('description', '')
-            full_text = f"{title} {description}"
+            text = normalize_entry(title, description)
             
-            found_keywords = self.contains_negative_keywords(full_text)
+            with self.metrics.cpu_stage('scoring'):
+                found_keywords = self.contains_negative_keywords(text)
+                sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+            self.metrics.record_entry('newsapi', bool(found_keywords))
             if found_keywords:
-                sentiment = self.analyze_sentiment(full_text)
                 if sentiment <= 0.4 or len(found_keywords) >= 2:
-                    processed.append({
-                        'title': title,
-                        'link': article.get('url', ''),
-                        'description': description,
-                        'published': article.get('publishedAt', ''),
-                        'source': article.get('source', {}).get('name', 'NewsAPI'),
-                        'source_type': 'newsapi',
-                        'sentiment_score': sentiment,
-                        'negative_keywords': ','.join(found_keywords),
-                        'keyword_category': self.categorize_keywords(found_keywords)
-                    })
+                    self.metrics.record_match('newsapi')
+                    processed.append(ArticleRecord(
+                        title=text.title,
+                        link=article.get('url', ''),
+                        description=text.description,
+                        published=article.get('publishedAt', ''),
+                        source=article.get('source', {}).get('name', 'NewsAPI'),
+                        source_type='newsapi',
+                        sentiment_score=sentiment,
+                        negative_keywords=','.join(found_keywords),
+                        keyword_category=self.categorize_keywords(found_keywords)
+                    ))
         return processed
     
-    def process_mediastack_articles(self, articles: List[Dict]) -> List[Dict]:
+    def process_mediastack_articles(self, articles: List[Dict]) -> List[ArticleRecord]:
         """Process Mediastack articles"""
         processed = []
         for article in articles:
             title = article.get('title', '')
             description = article.get('description', '')
-            full_text = f"{title} {description}"
+            text = normalize_entry(title, description)
             
-            found_keywords = self.contains_negative_keywords(full_text)
+            with self.metrics.cpu_stage('scoring'):
+                found_keywords = self.contains_negative_keywords(text)
+                sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+            self.metrics.record_entry('mediastack', bool(found_keywords))
             if found_keywords:
-                sentiment = self.analyze_sentiment(full_text)
                 if sentiment <= 0.4 or len(found_keywords) >= 2:
-                    processed.append({
-                        'title': title,
-                        'link': article.get('url', ''),
-                        'description': description,
-                        'published': article.get('published_at', ''),
-                        'source': article.get('source', 'Mediastack'),
-                        'source_type': 'mediastack',
-                        'sentiment_score': sentiment,
-                        'negative_keywords': ','.join(found_keywords),
-                        'keyword_category': self.categorize_keywords(found_keywords)
-                    })
+                    self.metrics.record_match('mediastack')
+                    processed.append(ArticleRecord(
+                        title=text.title,
+                        link=article.get('url', ''),
+                        description=text.description,
+                        published=article.get('published_at', ''),
+                        source=article.get('source', 'Mediastack'),
+                        source_type='mediastack',
+                        sentiment_score=sentiment,
+                        negative_keywords=','.join(found_keywords),
+                        keyword_category=self.categorize_keywords(found_keywords)
+                    ))
         return processed
     
-    def process_newsdata_articles(self, articles: List[Dict]) -> List[Dict]:
+    def process_newsdata_articles(self, articles: List[Dict]) -> List[ArticleRecord]:
         """Process NewsData.io articles"""
         processed = []
         for article in articles:
             title = article.get('title', '')
             description = article.get('description', '')
-            full_text = f"{title} {description}"
+            text = normalize_entry(title, description)
             
-            found_keywords = self.contains_negative_keywords(full_text)
+            with self.metrics.cpu_stage('scoring'):
+                found_keywords = self.contains_negative_keywords(text)
+                sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+            self.metrics.record_entry('newsdata', bool(found_keywords))
             if found_keywords:
-                sentiment = self.analyze_sentiment(full_text)
                 if sentiment <= 0.4 or len(found_keywords) >= 2:
-                    processed.append({
-                        'title': title,
-                        'link': article.get('link', ''),
-                        'description': description,
-                        'published': article.get('pubDate', ''),
-                        'source': article.get('source_id', 'NewsData'),
-                        'source_type': 'newsdata',
-                        'sentiment_score': sentiment,
-                        'negative_keywords': ','.join(found_keywords),
-                        'keyword_category': self.categorize_keywords(found_keywords)
-                    })
+                    self.metrics.record_match('newsdata')
+                    processed.append(ArticleRecord(
+                        title=text.title,
+                        link=article.get('link', ''),
+                        description=text.description,
+                        published=article.get('pubDate', ''),
+                        source=article.get('source_id', 'NewsData'),
+                        source_type='newsdata',
+                        sentiment_score=sentiment,
+                        negative_keywords=','.join(found_keywords),
+                        keyword_category=self.categorize_keywords(found_keywords)
+                    ))
         return processed
     
-    def fetch_from_comprehensive_rss(self) -> List[Dict]:
-        """Fetch from all comprehensive RSS feeds including local sources"""
+    def all_rss_feeds(self) -> List[str]:
+        """The full national + local RSS catalog"""
+        return self.aggregator.comprehensive_rss_feeds + self.local_collector.local_news_rss_feeds
+    
+    def process_feed(self, feed_url: str) -> List[ArticleRecord]:
+        """Fetch one RSS feed and return its matching articles; raises on fetch errors"""
+        articles = []
+        feed = fetch_feed(feed_url, self.metrics, max_entries=20, since=self.last_seen.get(feed_url))
+        self.feed_cursors[feed_url] = feed_cursor(feed)
+        
+        for entry in feed.entries:
+            title = entry.get('title', '')
+            description = entry.get('description', '') or entry.get('summary', '')
+            text = normalize_entry(title, description)
+            
+            with self.metrics.cpu_stage('scoring'):
+                found_keywords = self.contains_negative_keywords(text)
+                sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+            self.metrics.record_entry(feed_url, bool(found_keywords))
+            
+            if found_keywords:
+                if sentiment <= 0.4 or len(found_keywords) >= 2:
+                    self.metrics.record_match(feed_url)
+                    published = entry.get('published', '')
+                    if not published:
+                        published = entry.get('updated', '')
+                    
+                    articles.append(ArticleRecord(
+                        title=text.title,
+                        link=entry.get('link', ''),
+                        description=text.description,
+                        published=published,
+                        source=feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
+                        source_type='rss',
+                        sentiment_score=sentiment,
+                        negative_keywords=','.join(found_keywords),
+                        keyword_category=self.categorize_keywords(found_keywords)
+                    ))
+        return articles
+    
+    def fetch_from_comprehensive_rss(self, feeds: List[str] = None) -> List[ArticleRecord]:
+        """Fetch from all comprehensive RSS feeds including local sources (or only ``feeds``)"""
         all_articles = []
         
-        # Combine national and local RSS feeds
-        all_rss_feeds = self.aggregator.comprehensive_rss_feeds + self.local_collector.local_news_rss_feeds
-        print(f"Fetching from {len(all_rss_feeds)} RSS sources ({len(self.aggregator.comprehensive_rss_feeds)} national + {len(self.local_collector.local_news_rss_feeds)} local)...")
+        if feeds is None:
+            # Combine national and local RSS feeds
+            all_rss_feeds = self.all_rss_feeds()
+            print(f"Fetching from {len(all_rss_feeds)} RSS sources ({len(self.aggregator.comprehensive_rss_feeds)} national + {len(self.local_collector.local_news_rss_feeds)} local)...")
+        else:
+            all_rss_feeds = feeds
+            print(f"Fetching from {len(all_rss_feeds)} RSS sources...")
         
         for feed_url in all_rss_feeds:
+            if not self.source_pending(feed_url):
+                continue
             try:
                 print(f"Processing: {feed_url}")
-                feed = feedparser.parse(feed_url)
-                
-                for entry in feed.entries[:20]:  # Limit per feed
-                    title = entry.get('title', '')
-                    description = entry.get('description', '') or entry.get('summary', '')
-                    full_text = f"{title} {description}"
-                    
-                    found_keywords = self.contains_negative_keywords(full_text)
-                    
-                    if found_keywords:
-                        sentiment = self.analyze_sentiment(full_text)
-                        
-                        if sentiment <= 0.4 or len(found_keywords) >= 2:
-                            published = entry.get('published', '')
-                            if not published:
-                                published = entry.get('updated', '')
-                            
-                            all_articles.append({
-                                'title': title,
-                                'link': entry.get('link', ''),
-                                'description': self.clean_html(description),
-                                'published': published,
-                                'source': feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
-                                'source_type': 'rss',
-                                'sentiment_score': sentiment,
-                                'negative_keywords': ','.join(found_keywords),
-                                'keyword_category': self.categorize_keywords(found_keywords)
-                            })
+                feed_articles = self.process_feed(feed_url)
+                all_articles.extend(feed_articles)
+                self.source_finished(feed_url, feed_articles)
                 
                 time.sleep(0.2)  # Faster rate limiting for real-time
                 
@@ -297,107 +323,182 @@ class EnhancedNegativeNewsCollector:
         
         return all_articles
     
-    def fetch_from_social_sources(self) -> List[Dict]:
+    def fetch_from_social_sources(self) -> List[ArticleRecord]:
         """Fetch from Reddit and Hacker News"""
         all_articles = []
         
         print("Fetching from Reddit business discussions...")
-        reddit_articles = self.aggregator.fetch_from_reddit_business()
+        with self.metrics.stage('fetch_reddit'):
+            reddit_articles = self.aggregator.fetch_from_reddit_business()
         all_articles.extend(reddit_articles)
+        self.metrics.record_match('reddit', len(reddit_articles))
         
         print("Fetching from Hacker News...")
-        hn_articles = self.aggregator.fetch_from_hackernews()
+        with self.metrics.stage('fetch_hackernews'):
+            hn_articles = self.aggregator.fetch_from_hackernews()
         all_articles.extend(hn_articles)
+        self.metrics.record_match('hackernews', len(hn_articles))
         
         return all_articles
     
-    def save_articles(self, articles: List[Dict]):
-        """Save articles to database (compatible with existing schema)"""
+    def save_articles(self, articles: List[ArticleRecord]):
+        """Save articles to database with their keyword and category links, archiving expired ones"""
+        # A run whose collection lease was taken over must not write
+        ensure_lease_held()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        saved_count = 0
+        links = ArticleLinkWriter(self.stories, self.watchlists)
         
-        for article in articles:
-            try:
-                # Use existing schema (without source_type and keyword_category)
-                cursor.execute('''
-                INSERT OR IGNORE INTO negative_news 
-                (title, link, description, published, source, sentiment_score, negative_keywords)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    article['title'],
-                    article['link'],
-                    article['description'],
-                    article['published'],
-                    article['source'],
-                    article['sentiment_score'],
-                    article['negative_keywords']
-                ))
-                
-                if cursor.rowcount > 0:
-                    saved_count += 1
-                    
-            except Exception as e:
-                print(f"Error saving article: {e}")
-                continue
-        
-        conn.commit()
-        conn.close()
+        try:
+            # Locked or busy raises: the whole batch rolls back and the caller retries it
+            saved_count = insert_articles(cursor, articles, links)
+            links.flush(cursor)
+            
+            # Keep the hot table to the recent window; older articles move to the archive
+            if saved_count >= 5:
+                archived_count = archive_expired(cursor)
+                if archived_count > 0:
+                    print(f"🗄️ Archived {archived_count} articles older than {HOT_RETENTION_HOURS:g} hours")
+            
+            conn.commit()
+        finally:
+            # Closing without a commit rolls the batch back
+            conn.close()
         
         return saved_count
     
-    def comprehensive_update(self, min_articles=100, real_time_mode=False):
-        """Comprehensive update from all available sources"""
-        if real_time_mode:
-            print("⚡ REAL-TIME NEWS COLLECTION...")
-            print(f"Target: {min_articles}+ articles (real-time mode)")
-        else:
-            print("🚀 COMPREHENSIVE NEWS COLLECTION STARTING...")
-            print(f"Target: {min_articles}+ articles")
-        print("=" * 60)
-        
+    def refresh_snapshots(self):
+        """Rewrite the daily snapshots for days that gained articles and republish
+        the read-only database (never fails the run)"""
+        try:
+            self.snapshots.refresh()
+            publish_read_snapshot(self.db_path)
+        except Exception as e:
+            print(f"Snapshot refresh failed: {e}")
+    
+    def notify_watchlists(self):
+        """Deliver queued watchlist matches to the configured sinks (never fails the run)"""
+        try:
+            delivered = deliver_notifications(self.db_path)
+            if delivered:
+                print(f"📬 Delivered {delivered} watchlist notifications")
+        except Exception as e:
+            print(f"Watchlist notification failed: {e}")
+    
+    def source_pending(self, source: str) -> bool:
+        """False when a resumed run already processed ``source``"""
+        return self.checkpoint is None or not self.checkpoint.is_done(source)
+    
+    def source_finished(self, source: str, articles: List[ArticleRecord]):
+        """Checkpoint a finished source (its articles are saved at the next flush)"""
+        if self.checkpoint is not None:
+            self.checkpoint.record(source, articles, self.feed_cursors.get(source))
+    
+    def save_checkpointed(self, articles: List[ArticleRecord]) -> int:
+        with self.metrics.stage('db_write'):
+            return self.save_articles(articles)
+    
+    def collect_articles(self, feeds: List[str] = None, include_apis=True, include_social=True) -> List[ArticleRecord]:
+        """Fetch and dedup articles without saving them; ``feeds`` restricts the RSS stage"""
         all_articles = []
         
         # 1. Multiple News APIs
-        api_articles = self.fetch_from_multiple_apis()
-        all_articles.extend(api_articles)
-        print(f"✅ APIs collected: {len(api_articles)} articles")
+        if include_apis and self.source_pending('apis'):
+            with self.metrics.stage('fetch_apis'):
+                api_articles = self.fetch_from_multiple_apis()
+            all_articles.extend(api_articles)
+            self.source_finished('apis', api_articles)
+            print(f"✅ APIs collected: {len(api_articles)} articles")
         
         # 2. Comprehensive RSS Feeds  
-        rss_articles = self.fetch_from_comprehensive_rss()
+        with self.metrics.stage('fetch_rss'):
+            rss_articles = self.fetch_from_comprehensive_rss(feeds)
         all_articles.extend(rss_articles)
         print(f"✅ RSS collected: {len(rss_articles)} articles")
         
         # 3. Social Sources
-        social_articles = self.fetch_from_social_sources()
-        all_articles.extend(social_articles)
-        print(f"✅ Social collected: {len(social_articles)} articles")
+        if include_social and self.source_pending('social'):
+            with self.metrics.stage('fetch_social'):
+                social_articles = self.fetch_from_social_sources()
+            all_articles.extend(social_articles)
+            self.source_finished('social', social_articles)
+            print(f"✅ Social collected: {len(social_articles)} articles")
         
         # Remove duplicates
-        unique_articles = []
-        seen_urls = set()
-        for article in all_articles:
-            if article['link'] not in seen_urls and article['link']:
-                unique_articles.append(article)
-                seen_urls.add(article['link'])
+        with self.metrics.stage('dedup'):
+            unique_articles = []
+            seen_urls = set()
+            for article in all_articles:
+                if article.link not in seen_urls and article.link:
+                    unique_articles.append(article)
+                    seen_urls.add(article.link)
+        self.metrics.count('articles_unique', len(unique_articles))
         
         print(f"📊 Total unique articles: {len(unique_articles)}")
         
-        # Save to database
-        saved_count = self.save_articles(unique_articles)
+        return unique_articles
+    
+    @single_flight("comprehensive_update")
+    @profiled("comprehensive_update")
+    def comprehensive_update(self, min_articles=100, real_time_mode=False, with_metrics=False):
+        """Comprehensive update from all available sources
+
+        Articles are saved as sources finish. An earlier run that was killed
+        within the checkpoint window is resumed: only the sources it had not
+        processed are fetched, and its articles count toward the total.
+        Returns ``(saved, total)``, with the metrics summary appended as a
+        third element when ``with_metrics`` is set.
+        """
+        self.metrics = CollectionMetrics("enhanced_collector", "comprehensive_update")
+        self.last_seen = self.feed_state.load_last_seen()
+        self.feed_cursors = {}
+        if real_time_mode:
+            print("⚡ REAL-TIME NEWS COLLECTION...")
+            print(f"Target: {min_articles}+ articles (real-time mode)")
+        else:
+            print("🚀 COMPREHENSIVE NEWS COLLECTION STARTING...")
+            print(f"Target: {min_articles}+ articles")
+        print("=" * 60)
+        
+        self.checkpoint = CollectionCheckpoint(self.db_path, "comprehensive_update", self.save_checkpointed,
+                                               self.feed_state)
+        if self.checkpoint.begin():
+            print(f"♻️ Resuming interrupted run: {len(self.checkpoint.done)} sources already processed "
+                  f"({self.checkpoint.resumed_articles} articles kept)")
+        try:
+            unique_articles = self.collect_articles()
+            # Save what is left to database and close the checkpoint
+            self.checkpoint.finish()
+        except BaseException:
+            # Keep the sources finished so far for the next run to resume from
+            self.checkpoint.flush()
+            raise
+        finally:
+            checkpoint, self.checkpoint = self.checkpoint, None
+        saved_count = checkpoint.saved_count
+        total = len(unique_articles) + checkpoint.resumed_articles
+        with self.metrics.stage('snapshot'):
+            self.refresh_snapshots()
+        with self.metrics.stage('notify'):
+            self.notify_watchlists()
+        self.metrics.count('rows_inserted', saved_count)
         print(f"💾 Saved {saved_count} new articles to database")
         
         # Check if we met the target
-        if len(unique_articles) >= min_articles:
-            print(f"🎯 TARGET MET: {len(unique_articles)}/{min_articles} articles collected!")
+        if total >= min_articles:
+            print(f"🎯 TARGET MET: {total}/{min_articles} articles collected!")
         else:
-            print(f"⚠️  Target missed: {len(unique_articles)}/{min_articles} articles")
+            print(f"⚠️  Target missed: {total}/{min_articles} articles")
             print("Consider enabling more API keys for better coverage")
         
-        return saved_count, len(unique_articles)
+        summary = self.metrics.finish()
+        if with_metrics:
+            return saved_count, total, summary
+        return saved_count, total
 
 if __name__ == "__main__":
+    enable_from_argv()
     collector = EnhancedNegativeNewsCollector()
     saved, total = collector.comprehensive_update(min_articles=100)
     print(f"\n🏁 COLLECTION COMPLETE")
@@ -11,9 +11,29 @@ from textblob import TextBlob
 import time
 import os
 import re
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 import concurrent.futures
 from threading import Lock
+from collector_metrics import CollectionMetrics
+from collection_profiler import profiled, enable_from_argv
+from collection_lease import ensure_lease_held, single_flight
+from feed_fetcher import fetch_feed, feed_cursor, FeedDeadlineExceeded
+from feed_state import FeedStateStore
+from news_snapshots import SnapshotStore
+from read_snapshot import publish_read_snapshot
+from news_archive import archive_expired, HOT_RETENTION_HOURS
+from story_clusters import StoryClusterer
+from watchlists import WatchlistMatcher, deliver_notifications
+from news_schema import migrate_database, insert_articles, ArticleLinkWriter
+from text_normalizer import normalize_entry, clean_text, as_normalized
+from article_record import ArticleRecord
+
+COLLECTION_BUDGET_SECONDS = float(os.getenv("FAST_UPDATE_BUDGET_SECONDS", 25))
+
+# Assumed new articles per fetch for feeds without history; hand-picked
+# priority feeds start ahead of secondary ones until real yields take over
+PRIORITY_PRIOR_NEW = 2.0
+SECONDARY_PRIOR_NEW = 1.0
 
 class FastNewsCollector:
     def __init__(self, db_path="news_data.db"):
@@ -73,7 +93,25 @@ class FastNewsCollector:
             "https://www.bizjournals.com/houston/feeds/news",
         ]
         
+        # Metrics for the current (or most recent) collection run
+        self.metrics = CollectionMetrics("fast_collector")
+        
+        # Per-feed newest-entry cursors: loaded at the start of a run, advanced after saving
+        self.last_seen = {}
+        self.feed_cursors = {}
+        
+        # Seconds a fast_update may spend fetching; late sources are reported, not awaited
+        self.time_budget = COLLECTION_BUDGET_SECONDS
+        self.missed_sources = []
+        self.dispatched_sources = []
+        
         self.setup_database()
+        self.feed_state = FeedStateStore(db_path)
+        self.snapshots = SnapshotStore(db_path)
+        # Sliding window of recent article vectors, kept between saves
+        self.stories = StoryClusterer()
+        # Standing queries, recompiled when they change
+        self.watchlists = WatchlistMatcher()
     
     def setup_database(self):
         """Initialize SQLite database"""
@@ -92,177 +130,323 @@ class FastNewsCollector:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        migrate_database(conn)
         conn.commit()
         conn.close()
     
     def clean_html(self, text: str) -> str:
-        """Remove HTML tags from text"""
-        if not text:
-            return ""
-        clean = re.compile('<.*?>')
-        return re.sub(clean, '', text)
+        """Remove HTML tags and entities from text"""
+        return clean_text(text)
     
-    def analyze_sentiment(self, text: str) -> float:
-        """Quick sentiment analysis"""
+    def analyze_sentiment(self, text) -> float:
+        """Quick sentiment analysis (raw text or NormalizedText)"""
         try:
-            clean_text = self.clean_html(text)
-            blob = TextBlob(clean_text)
+            blob = TextBlob(as_normalized(text).full_text)
             return blob.sentiment.polarity
         except:
             return 0.0
     
-    def contains_negative_keywords(self, text: str) -> List[str]:
-        """Fast keyword check"""
+    def contains_negative_keywords(self, text) -> List[str]:
+        """Fast keyword check (raw text or NormalizedText)"""
         if not text:
             return []
-        text_lower = self.clean_html(text).lower()
+        text_lower = as_normalized(text).lower
         found_keywords = []
         for keyword in self.negative_keywords:
             if keyword in text_lower:
                 found_keywords.append(keyword)
         return found_keywords
     
-    def fetch_single_feed(self, feed_url: str, max_entries: int = 15) -> List[Dict]:
-        """Fetch a single RSS feed with timeout"""
+    def fetch_single_feed(self, feed_url: str, max_entries: int = 15, deadline: float = None,
+                          metrics: CollectionMetrics = None) -> Tuple[List[ArticleRecord], Optional[float]]:
+        """Fetch a single RSS feed with timeout; returns its articles and last-seen cursor
+
+        Abandoned at ``deadline`` (a time.monotonic() value). Nothing is
+        written to the collector itself, so a fetch still running after its
+        run gave up on it cannot touch the cursors or the next run's metrics.
+        """
+        metrics = metrics or self.metrics
         articles = []
+        cursor = None
         try:
-            # Fast timeout
-            feed = feedparser.parse(feed_url)
+            # Stop reading at max_entries or at entries a previous run already saw
+            feed = fetch_feed(feed_url, metrics, max_entries=max_entries,
+                              since=self.last_seen.get(feed_url), deadline=deadline)
             
-            for entry in feed.entries[:max_entries]:
+            for entry in feed.entries:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise FeedDeadlineExceeded(f"{feed_url} still scoring at the deadline")
                 title = entry.get('title', '')
                 description = entry.get('description', '') or entry.get('summary', '')
-                full_text = f"{title} {description}"
+                text = normalize_entry(title, description)
                 
-                found_keywords = self.contains_negative_keywords(full_text)
+                with metrics.cpu_stage('scoring'):
+                    found_keywords = self.contains_negative_keywords(text)
+                    sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+                metrics.record_entry(feed_url, bool(found_keywords))
                 
                 if found_keywords:
-                    sentiment = self.analyze_sentiment(full_text)
                     if sentiment <= 0.4 or len(found_keywords) >= 2:
                         published = entry.get('published', '') or entry.get('updated', '')
-                        articles.append({
-                            'title': title,
-                            'link': entry.get('link', ''),
-                            'description': self.clean_html(description)[:300],
-                            'published': published,
-                            'source': feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
-                            'sentiment_score': sentiment,
-                            'negative_keywords': ','.join(found_keywords)
-                        })
+                        articles.append(ArticleRecord(
+                            title=text.title,
+                            link=entry.get('link', ''),
+                            description=text.description,
+                            published=published,
+                            source=feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
+                            sentiment_score=sentiment,
+                            negative_keywords=','.join(found_keywords),
+                            feed_url=feed_url
+                        ))
+                        metrics.record_match(feed_url)
+            # Only a fully scored feed moves its cursor
+            cursor = feed_cursor(feed)
         except Exception as e:
+            if deadline is not None and time.monotonic() >= deadline:
+                # Cut off by the deadline rather than a broken feed
+                raise FeedDeadlineExceeded(feed_url) from e
             # Silently skip failed feeds for speed
             pass
         
-        return articles
+        return articles, cursor
     
-    def fast_parallel_fetch(self, feeds: List[str], max_workers: int = 10) -> List[Dict]:
-        """Fetch multiple feeds in parallel with timeout"""
+    def fast_parallel_fetch(self, feeds: List[str], max_workers: int = 10, deadline: float = None,
+                            target_articles: int = None) -> List[ArticleRecord]:
+        """Fetch feeds in parallel, in list order, keeping whatever finished by ``deadline``
+
+        At most ``max_workers`` fetches are in flight; the next feed is
+        dispatched as one completes. Once ``target_articles`` unique articles
+        are in, no further feeds are dispatched. Feeds still in flight at the
+        deadline are abandoned and added to ``self.missed_sources``; results
+        gathered before it are kept.
+        """
         all_articles = []
+        if deadline is None:
+            deadline = time.monotonic() + self.time_budget
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all feed fetches with timeout
-            future_to_url = {
-                executor.submit(self.fetch_single_feed, feed_url): feed_url 
-                for feed_url in feeds
-            }
-            
-            # Collect results with timeout
-            for future in concurrent.futures.as_completed(future_to_url, timeout=25):
-                try:
-                    articles = future.result(timeout=5)  # 5 second timeout per feed
-                    all_articles.extend(articles)
-                except:
-                    # Skip failed feeds for speed
-                    continue
+        queue = iter(feeds)
+        seen_links = set()
+        future_to_url = {}
+        pending = set()
+        missed = []
+        metrics = self.metrics
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        
+        def dispatch():
+            feed_url = next(queue, None)
+            if feed_url is None:
+                return
+            future = executor.submit(self.fetch_single_feed, feed_url, 15, deadline, metrics)
+            future_to_url[future] = feed_url
+            pending.add(future)
+            self.dispatched_sources.append(feed_url)
+        
+        def collect(future):
+            pending.discard(future)
+            try:
+                articles, cursor = future.result()
+            except FeedDeadlineExceeded:
+                missed.append(future_to_url[future])
+                return
+            except Exception:
+                # Skip failed feeds for speed
+                return
+            self.feed_cursors[future_to_url[future]] = cursor
+            all_articles.extend(articles)
+            seen_links.update(article.link for article in articles)
+        
+        try:
+            for _ in range(max_workers):
+                dispatch()
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, _ = concurrent.futures.wait(pending, timeout=remaining,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+                    if target_articles is None or len(seen_links) < target_articles:
+                        dispatch()
+            for future in list(pending):
+                if future.done():
+                    collect(future)
+                else:
+                    missed.append(future_to_url[future])
+        finally:
+            # Don't wait for stragglers: running fetches give up at the
+            # deadline via their socket timeouts and their results are dropped
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        skipped = len(feeds) - len(future_to_url)
+        if skipped:
+            self.metrics.count('sources_skipped', skipped)
+        if missed:
+            self.missed_sources.extend(missed)
+            self.metrics.record_missed(missed)
+            print(f"⏰ Deadline reached: keeping {len(all_articles)} articles, {len(missed)} sources missed the cut")
         
         return all_articles
     
-    def save_articles(self, articles: List[Dict]) -> int:
-        """Save articles to database (thread-safe) with auto-cleanup"""
+    def existing_links(self, links: List[str]) -> set:
+        """Links already stored, checked in batches against the UNIQUE index"""
+        existing = set()
+        links = list(links)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            for i in range(0, len(links), 500):
+                batch = links[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = conn.execute(f"SELECT link FROM negative_news WHERE link IN ({placeholders})", batch)
+                existing.update(row[0] for row in rows)
+        finally:
+            conn.close()
+        return existing
+    
+    def record_feed_yield(self, unique_articles: List[ArticleRecord], existing: set, budget: float):
+        """Persist this run's per-feed yield (matched, new after dedup, latency) for ranking"""
+        new_counts = {}
+        for article in unique_articles:
+            if article.link not in existing:
+                new_counts[article.feed_url] = new_counts.get(article.feed_url, 0) + 1
+        
+        sources = self.metrics.summary()['sources']
+        missed = set(self.missed_sources)
+        results = {}
+        for feed_url in self.dispatched_sources:
+            stats = sources.get(feed_url, {})
+            results[feed_url] = {
+                'matched': stats.get('matched', 0),
+                'new': new_counts.get(feed_url, 0),
+                # A late feed is charged the whole budget it was allowed to use
+                'latency': budget if feed_url in missed else stats.get('fetch_s', budget),
+            }
+        self.feed_state.record_yield(results)
+    
+    def ranked_feeds(self) -> List[str]:
+        """All priority and secondary feeds, best expected new articles per second first"""
+        feeds = list(dict.fromkeys(self.priority_feeds + self.secondary_feeds))
+        priors = {url: SECONDARY_PRIOR_NEW for url in self.secondary_feeds}
+        priors.update({url: PRIORITY_PRIOR_NEW for url in self.priority_feeds})
+        return self.feed_state.rank_feeds(feeds, priors)
+    
+    def save_articles(self, articles: List[ArticleRecord]) -> int:
+        """Save articles to database (thread-safe), archiving expired ones"""
         if not articles:
             return 0
             
+        # A run whose collection lease was taken over must not write
+        ensure_lease_held()
         with self.db_lock:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
-            saved_count = 0
-            for article in articles:
-                try:
-                    cursor.execute('''
-                    INSERT OR IGNORE INTO negative_news 
-                    (title, link, description, published, source, sentiment_score, negative_keywords)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        article['title'],
-                        article['link'],
-                        article['description'],
-                        article['published'],
-                        article['source'],
-                        article['sentiment_score'],
-                        article['negative_keywords']
-                    ))
-                    if cursor.rowcount > 0:
-                        saved_count += 1
-                except:
-                    continue
+            links = ArticleLinkWriter(self.stories, self.watchlists)
+            saved_count = insert_articles(cursor, articles, links)
+            links.flush(cursor)
             
-            # Auto-cleanup: Delete old articles after every 5 new articles
+            # Move old articles to the archive after every 5 new articles
             if saved_count >= 5:
-                cursor.execute('''
-                DELETE FROM negative_news 
-                WHERE created_at < datetime('now', '-48 hours')
-                ''')
-                deleted_count = cursor.rowcount
-                if deleted_count > 0:
-                    print(f"🧹 Auto-cleanup: Deleted {deleted_count} articles older than 48 hours")
+                archived_count = archive_expired(cursor)
+                if archived_count > 0:
+                    print(f"🗄️ Archived {archived_count} articles older than {HOT_RETENTION_HOURS:g} hours")
             
             conn.commit()
             conn.close()
             return saved_count
     
-    def fast_update(self, target_articles: int = 50) -> tuple:
-        """Fast update - completes in under 30 seconds"""
+    def refresh_snapshots(self):
+        """Rewrite the daily snapshots for days that gained articles and republish
+        the read-only database (never fails the run)"""
+        try:
+            self.snapshots.refresh()
+            publish_read_snapshot(self.db_path)
+        except Exception as e:
+            print(f"Snapshot refresh failed: {e}")
+    
+    def notify_watchlists(self):
+        """Deliver queued watchlist matches to the configured sinks (never fails the run)"""
+        try:
+            delivered = deliver_notifications(self.db_path)
+            if delivered:
+                print(f"📬 Delivered {delivered} watchlist notifications")
+        except Exception as e:
+            print(f"Watchlist notification failed: {e}")
+    
+    @single_flight("fast_update")
+    @profiled("fast_update")
+    def fast_update(self, target_articles: int = 50, with_metrics: bool = False, time_budget: float = None) -> tuple:
+        """Fast update - completes in under 30 seconds
+
+        Feeds are dispatched best historical yield first until
+        ``target_articles`` are collected. Fetching stops at ``time_budget``
+        seconds (default ``self.time_budget``); articles gathered by then are
+        saved and late sources are listed in ``self.missed_sources`` and the
+        metrics summary. Returns ``(saved, total, elapsed)``, with the metrics
+        summary appended as a fourth element when ``with_metrics`` is set.
+        """
         start_time = time.time()
+        budget = time_budget if time_budget is not None else self.time_budget
+        deadline = time.monotonic() + budget
+        self.metrics = CollectionMetrics("fast_collector", "fast_update")
+        self.last_seen = self.feed_state.load_last_seen()
+        self.feed_cursors = {}
+        self.missed_sources = []
+        self.dispatched_sources = []
         print("⚡ FAST NEWS COLLECTION (Target: 30 seconds)")
         print("=" * 50)
         
-        # Phase 1: Priority feeds (highest quality)
-        print(f"Phase 1: Fetching from {len(self.priority_feeds)} priority sources...")
-        priority_articles = self.fast_parallel_fetch(self.priority_feeds, max_workers=15)
-        print(f"✅ Priority: {len(priority_articles)} articles")
-        
-        # Phase 2: Secondary feeds (only if needed)
-        secondary_articles = []
-        if len(priority_articles) < target_articles:
-            print(f"Phase 2: Fetching from {len(self.secondary_feeds)} secondary sources...")
-            secondary_articles = self.fast_parallel_fetch(self.secondary_feeds, max_workers=10)
-            print(f"✅ Secondary: {len(secondary_articles)} articles")
+        # Most productive feeds first (historical new articles per second);
+        # dispatching stops once the target is in
+        feeds = self.ranked_feeds()
+        print(f"Fetching from up to {len(feeds)} sources, best yield first...")
+        with self.metrics.stage('fetch_ranked'):
+            all_articles = self.fast_parallel_fetch(feeds, max_workers=15, deadline=deadline,
+                                                    target_articles=target_articles)
+        print(f"✅ Fetched: {len(all_articles)} articles from {len(self.dispatched_sources)} sources")
         
-        # Combine and deduplicate
-        all_articles = priority_articles + secondary_articles
+        # Deduplicate
         unique_articles = []
         seen_urls = set()
         
-        for article in all_articles:
-            if article['link'] and article['link'] not in seen_urls:
-                unique_articles.append(article)
-                seen_urls.add(article['link'])
+        with self.metrics.stage('dedup'):
+            for article in all_articles:
+                if article.link and article.link not in seen_urls:
+                    unique_articles.append(article)
+                    seen_urls.add(article.link)
+        self.metrics.count('articles_unique', len(unique_articles))
         
         # Save to database
-        saved_count = self.save_articles(unique_articles)
+        with self.metrics.stage('db_write'):
+            existing = self.existing_links(article.link for article in unique_articles)
+            saved_count = self.save_articles(unique_articles)
+            self.feed_state.update_last_seen(self.feed_cursors)
+            self.record_feed_yield(unique_articles, existing, budget)
+        with self.metrics.stage('snapshot'):
+            self.refresh_snapshots()
+        with self.metrics.stage('notify'):
+            self.notify_watchlists()
+        self.metrics.count('rows_inserted', saved_count)
         
         elapsed_time = time.time() - start_time
+        summary = self.metrics.finish()
         
         print(f"📊 Results:")
         print(f"   • Total collected: {len(unique_articles)}")
         print(f"   • New articles saved: {saved_count}")  
         print(f"   • Time elapsed: {elapsed_time:.1f} seconds")
+        if self.missed_sources:
+            print(f"   • Missed deadline: {len(self.missed_sources)} sources")
+            for url in self.missed_sources:
+                print(f"     - {url}")
         print(f"   • Speed: {'✅ FAST' if elapsed_time < 30 else '⚠️  SLOW'}")
         
+        if with_metrics:
+            return saved_count, len(unique_articles), elapsed_time, summary
         return saved_count, len(unique_articles), elapsed_time
 
 if __name__ == "__main__":
+    enable_from_argv()
     collector = FastNewsCollector()
     saved, total, elapsed = collector.fast_update(target_articles=50)
     
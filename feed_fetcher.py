@@ -0,0 +1,318 @@
+"""
+Feed Fetcher
+Shared download + parse step for RSS/Atom/JSON feeds used by all collectors.
+
+Feeds are streamed: entries are parsed incrementally as bytes arrive, and the
+download stops once ``max_entries`` entries are read or an entry older than the
+feed's last-seen timestamp appears. The last-seen cursor only advances past
+reads the limit did not cut short. A hard byte cap keeps one huge or hostile
+feed from spiking memory. Documents the strict XML parser rejects are handed
+to feedparser (still within the byte cap).
+"""
+
+import io
+import os
+import json
+import time
+import datetime
+import email.utils
+import xml.etree.ElementTree as ET
+from typing import Dict, Iterator, Optional
+import requests
+import feedparser
+
+USER_AGENT = "BusinessCrisisMonitor/1.0"
+
+# Hard cap on bytes read per feed (FEED_MAX_BYTES overrides)
+MAX_FEED_BYTES = int(os.getenv("FEED_MAX_BYTES", 5 * 1024 * 1024))
+CHUNK_SIZE = 16 * 1024
+
+# Per-socket-operation timeouts (connect, read) in seconds; a hung server can
+# otherwise pin a worker thread forever
+CONNECT_TIMEOUT = float(os.getenv("FEED_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("FEED_READ_TIMEOUT", 10))
+
+# FEED_STREAMING=0 falls back to downloading and feedparser-parsing every feed
+STREAMING_ENABLED = os.getenv("FEED_STREAMING", "1").lower() not in ("0", "false", "off", "no")
+
+ENTRY_TAGS = ('item', 'entry')
+FEED_TAGS = ('channel', 'feed')
+
+
+class FeedTooLarge(Exception):
+    """Raised when a feed exceeds the byte cap before yielding enough entries"""
+
+
+class FeedDeadlineExceeded(Exception):
+    """Raised when a fetch is still running at its caller's deadline"""
+
+
+def request_timeout(deadline: float = None):
+    """(connect, read) timeout for requests, shortened to fit a monotonic deadline"""
+    if deadline is None:
+        return (CONNECT_TIMEOUT, READ_TIMEOUT)
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise FeedDeadlineExceeded("deadline passed before the request started")
+    return (min(CONNECT_TIMEOUT, remaining), min(READ_TIMEOUT, remaining))
+
+
+class StreamedFeed:
+    """feedparser-shaped result: ``feed`` metadata plus an ``entries`` list"""
+
+    def __init__(self):
+        self.feed = {}
+        self.entries = []
+        self.bytes_read = 0
+        self.stopped_early = False
+        # Stopped by max_entries with unread entries left (not by the cursor)
+        self.truncated = False
+        self.parser = 'stream'
+        self.newest_timestamp = None
+
+
+def parse_feed_timestamp(value: str) -> Optional[float]:
+    """Parse an RFC 822 or ISO 8601 feed date into a UTC epoch (None if unparseable)"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed.timestamp()
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit('}', 1)[-1] if '}' in tag else tag
+
+
+def _entry_from_element(elem) -> Dict:
+    """Map an RSS <item> / Atom <entry> to the keys collectors read"""
+    entry = {}
+    for child in elem:
+        tag = _local(child.tag)
+        if tag == 'link':
+            href = child.get('href')
+            if href is not None:
+                if child.get('rel', 'alternate') == 'alternate' and 'link' not in entry:
+                    entry['link'] = href
+            elif child.text and 'link' not in entry:
+                entry['link'] = child.text.strip()
+            continue
+        text = ''.join(child.itertext()) if len(child) else (child.text or '')
+        if tag == 'title':
+            entry['title'] = text.strip()
+        elif tag in ('description', 'summary'):
+            entry.setdefault('description', text)
+            entry.setdefault('summary', text)
+        elif tag in ('encoded', 'content'):
+            entry.setdefault('content', text)
+        elif tag in ('pubDate', 'published', 'issued', 'date'):
+            entry.setdefault('published', text.strip())
+        elif tag in ('updated', 'modified'):
+            entry.setdefault('updated', text.strip())
+        elif tag in ('guid', 'id'):
+            entry.setdefault('id', text.strip())
+    if 'description' not in entry and 'content' in entry:
+        entry['description'] = entry['summary'] = entry['content']
+    return entry
+
+
+def _iter_xml_entries(chunks: Iterator[bytes], result: StreamedFeed) -> Iterator[Dict]:
+    """Yield entries as soon as their closing tag has been read"""
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    stack = []
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, elem in parser.read_events():
+            if event == 'start':
+                stack.append(elem)
+                continue
+            stack.pop()
+            tag = _local(elem.tag)
+            if tag in ENTRY_TAGS:
+                yield _entry_from_element(elem)
+                # Drop the finished entry so memory stays flat over long feeds
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
+            elif tag == 'title' and stack and _local(stack[-1].tag) in FEED_TAGS and 'title' not in result.feed:
+                result.feed['title'] = (elem.text or '').strip()
+    parser.close()
+
+
+def _iter_json_entries(body: bytes, result: StreamedFeed) -> Iterator[Dict]:
+    """Yield entries from a JSON Feed (jsonfeed.org) document"""
+    document = json.loads(body)
+    if document.get('title'):
+        result.feed['title'] = document['title']
+    for item in document.get('items', []):
+        description = item.get('summary') or item.get('content_html') or item.get('content_text') or ''
+        yield {
+            'title': item.get('title', ''),
+            'link': item.get('url') or item.get('external_url', ''),
+            'description': description,
+            'summary': description,
+            'published': item.get('date_published', ''),
+            'updated': item.get('date_modified', ''),
+            'id': item.get('id', ''),
+        }
+
+
+def _iter_feedparser_entries(body: bytes, headers: Dict, result: StreamedFeed) -> Iterator[Dict]:
+    parsed = feedparser.parse(io.BytesIO(body), response_headers=headers)
+    if parsed.feed.get('title'):
+        result.feed['title'] = parsed.feed.get('title')
+    yield from parsed.entries
+
+
+def _select_entries(entries: Iterator[Dict], result: StreamedFeed, max_entries: Optional[int], since: Optional[float]):
+    """Collect entries until the limit or the first entry older than ``since``.
+
+    The ``since`` cut-off only applies while the feed has been newest-first so
+    far; aggregator feeds that mix dates are read up to ``max_entries``. The
+    entry after the limit is looked at, not kept, so a read that ends exactly
+    at the cursor does not count as truncated.
+    """
+    previous = None
+    newest_first = True
+    for entry in entries:
+        timestamp = parse_feed_timestamp(entry.get('published') or entry.get('updated'))
+        if timestamp is not None:
+            if previous is not None and timestamp > previous:
+                newest_first = False
+            previous = timestamp
+            if since is not None and newest_first and timestamp < since:
+                result.stopped_early = True
+                return
+        if max_entries is not None and len(result.entries) >= max_entries:
+            result.stopped_early = True
+            result.truncated = True
+            return
+        if timestamp is not None and (result.newest_timestamp is None or timestamp > result.newest_timestamp):
+            result.newest_timestamp = timestamp
+        result.entries.append(entry)
+
+
+def stream_feed(feed_url: str, max_entries: int = None, since: float = None,
+                max_bytes: int = MAX_FEED_BYTES, deadline: float = None) -> StreamedFeed:
+    """Download a feed incrementally, parsing only as far as needed"""
+    result = StreamedFeed()
+    timeout = request_timeout(deadline)
+    with requests.get(feed_url, headers={'User-Agent': USER_AGENT}, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        headers['content-location'] = response.url
+        buffer = bytearray()
+
+        def chunks():
+            for chunk in response.iter_content(CHUNK_SIZE):
+                if deadline is not None and time.monotonic() > deadline:
+                    raise FeedDeadlineExceeded(f"{feed_url} still downloading at the deadline")
+                result.bytes_read += len(chunk)
+                if result.bytes_read > max_bytes:
+                    raise FeedTooLarge(f"{feed_url} exceeded {max_bytes} bytes")
+                buffer.extend(chunk)
+                yield chunk
+
+        source = chunks()
+        first = next(source, b'')
+        is_json = 'json' in headers.get('content-type', '') or first.lstrip()[:1] in (b'{', b'[')
+
+        if is_json:
+            body = first + b''.join(source)
+            _select_entries(_iter_json_entries(body, result), result, max_entries, since)
+            result.parser = 'json'
+            return result
+
+        def replay():
+            yield first
+            yield from source
+
+        try:
+            _select_entries(_iter_xml_entries(replay(), result), result, max_entries, since)
+        except ET.ParseError:
+            # Not well-formed XML (HTML entities, truncation...): let feedparser
+            # recover what it can from the bounded body
+            for _ in source:
+                pass
+            result.entries = []
+            result.newest_timestamp = None
+            result.stopped_early = False
+            result.truncated = False
+            result.parser = 'feedparser'
+            _select_entries(_iter_feedparser_entries(bytes(buffer), headers, result), result, max_entries, since)
+    return result
+
+
+def fetch_feed(feed_url: str, metrics=None, max_entries: int = None, since: float = None,
+               deadline: float = None):
+    """Download and parse a feed, recording latency, size and entry count.
+
+    Only the first ``max_entries`` entries newer than ``since`` (a UTC epoch)
+    are returned; with streaming enabled, reading also stops there. ``deadline`` is a
+    ``time.monotonic()`` value: socket timeouts are shortened to fit it and a
+    streaming download still running when it passes is abandoned. Raises on
+    network errors, timeouts, HTTP error statuses and oversized feeds so
+    callers' existing per-feed error handling applies.
+    """
+    start = time.perf_counter()
+    nbytes = 0
+    entries = 0
+    error = None
+    try:
+        if STREAMING_ENABLED:
+            feed = stream_feed(feed_url, max_entries=max_entries, since=since, deadline=deadline)
+            nbytes = feed.bytes_read
+            entries = len(feed.entries)
+            return feed
+
+        response = requests.get(feed_url, headers={'User-Agent': USER_AGENT}, timeout=request_timeout(deadline))
+        nbytes = len(response.content)
+        response.raise_for_status()
+
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        headers['content-location'] = response.url
+        # The whole body is parsed, but the limit and cursor still apply
+        feed = StreamedFeed()
+        feed.bytes_read = nbytes
+        feed.parser = 'feedparser'
+        _select_entries(_iter_feedparser_entries(response.content, headers, feed), feed, max_entries, since)
+        entries = len(feed.entries)
+        return feed
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        if metrics is not None:
+            metrics.record_fetch(feed_url, time.perf_counter() - start, nbytes, entries, error)
+
+
+def newest_entry_timestamp(feed) -> Optional[float]:
+    """Newest published/updated time in a fetched feed (streamed or feedparser)"""
+    if isinstance(feed, StreamedFeed):
+        return feed.newest_timestamp
+    timestamps = [parse_feed_timestamp(entry.get('published') or entry.get('updated')) for entry in feed.entries]
+    timestamps = [ts for ts in timestamps if ts is not None]
+    return max(timestamps) if timestamps else None
+
+
+def feed_cursor(feed) -> Optional[float]:
+    """Last-seen cursor to store after processing a fetched feed.
+
+    Cursors are shared by collectors with different entry limits, so one only
+    advances to the newest entry when the read reached the previous cursor or
+    the end of the feed. A read cut short by ``max_entries`` returns ``None``
+    and leaves the stored cursor alone: entries between the oldest one read
+    and the old cursor were never seen, and a collector with a larger limit
+    must still reach them.
+    """
+    if getattr(feed, 'truncated', False):
+        return None
+    return newest_entry_timestamp(feed)
@@ -0,0 +1,211 @@
+"""
+Feed State
+Per-feed bookkeeping persisted alongside the articles: the newest entry
+timestamp each feed has been read up to without gaps, used to stop reading a
+feed once it reaches entries an earlier run already processed, each feed's historical yield,
+used to fetch the most productive feeds first, and the ingest daemon's poll
+schedule.
+"""
+
+import time
+import sqlite3
+from typing import Dict, List
+
+# Weight of the latest fetch in the moving averages; older fetches fade out
+YIELD_ALPHA = 0.3
+# Hours after which an unvisited feed's stats have moved halfway back to its prior
+STALE_HALF_LIFE_HOURS = 24.0
+# Assumed new articles per fetch / latency for feeds with no history
+DEFAULT_PRIOR_NEW = 1.0
+PRIOR_LATENCY = 1.0
+MIN_LATENCY = 0.25
+
+YIELD_COLUMNS = {
+    'fetches': 'INTEGER DEFAULT 0',
+    'avg_matched': 'REAL',
+    'avg_new': 'REAL',
+    'avg_latency': 'REAL',
+    'last_fetched_at': 'REAL',
+}
+
+SCHEDULE_COLUMNS = {
+    'poll_interval': 'REAL',
+    'next_poll_at': 'REAL',
+    'poll_failures': 'INTEGER DEFAULT 0',
+}
+
+
+class FeedStateStore:
+    """Read and advance per-feed cursors, yield statistics and poll schedules in the news database"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.setup_database()
+
+    def setup_database(self):
+        """Create the feed_state table if needed and add any missing yield and schedule columns"""
+        conn = sqlite3.connect(self.db_path)
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS feed_state (
+            feed_url TEXT PRIMARY KEY,
+            last_seen_published REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(feed_state)")}
+        for column, definition in {**YIELD_COLUMNS, **SCHEDULE_COLUMNS}.items():
+            if column not in existing:
+                conn.execute(f"ALTER TABLE feed_state ADD COLUMN {column} {definition}")
+        conn.commit()
+        conn.close()
+
+    def load_last_seen(self) -> Dict[str, float]:
+        """Last-seen entry timestamp (UTC epoch) for every known feed"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT feed_url, last_seen_published FROM feed_state WHERE last_seen_published IS NOT NULL"
+            ).fetchall()
+        finally:
+            conn.close()
+        return dict(rows)
+
+    def update_last_seen(self, cursors: Dict[str, float]):
+        """Advance cursors; a cursor never moves backwards"""
+        cursors = {url: ts for url, ts in cursors.items() if ts is not None}
+        if not cursors:
+            return
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany('''
+            INSERT INTO feed_state (feed_url, last_seen_published, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(feed_url) DO UPDATE SET
+                last_seen_published = MAX(COALESCE(last_seen_published, 0), excluded.last_seen_published),
+                updated_at = CURRENT_TIMESTAMP
+            ''', list(cursors.items()))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load_yield_stats(self) -> Dict[str, Dict]:
+        """Moving-average yield per feed that has been fetched at least once"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute('''
+            SELECT feed_url, fetches, avg_matched, avg_new, avg_latency, last_fetched_at
+            FROM feed_state WHERE fetches > 0
+            ''').fetchall()
+        finally:
+            conn.close()
+        return {row['feed_url']: dict(row) for row in rows}
+
+    def record_yield(self, results: Dict[str, Dict]):
+        """Fold one run's per-feed results into the moving averages.
+
+        ``results`` maps feed URL to ``{'matched', 'new', 'latency'}``: articles
+        that passed the filters, articles that were new after dedup, and fetch
+        seconds (failed or late fetches count with zero yield).
+        """
+        if not results:
+            return
+        stats = self.load_yield_stats()
+        now = time.time()
+        rows = []
+        for url, result in results.items():
+            previous = stats.get(url)
+            if previous is None:
+                fetches, matched, new, latency = 1, result['matched'], result['new'], result['latency']
+            else:
+                fetches = previous['fetches'] + 1
+                matched = _ewma(previous['avg_matched'], result['matched'])
+                new = _ewma(previous['avg_new'], result['new'])
+                latency = _ewma(previous['avg_latency'], result['latency'])
+            rows.append((url, fetches, matched, new, latency, now))
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany('''
+            INSERT INTO feed_state (feed_url, fetches, avg_matched, avg_new, avg_latency, last_fetched_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(feed_url) DO UPDATE SET
+                fetches = excluded.fetches,
+                avg_matched = excluded.avg_matched,
+                avg_new = excluded.avg_new,
+                avg_latency = excluded.avg_latency,
+                last_fetched_at = excluded.last_fetched_at,
+                updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def load_schedule(self) -> Dict[str, Dict]:
+        """Persisted poll interval, next due time and consecutive failures per scheduled feed"""
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute('''
+            SELECT feed_url, poll_interval, next_poll_at, poll_failures
+            FROM feed_state WHERE next_poll_at IS NOT NULL
+            ''').fetchall()
+        finally:
+            conn.close()
+        return {row['feed_url']: dict(row) for row in rows}
+
+    def save_schedule(self, schedule: Dict[str, Dict]):
+        """Persist poll schedules (``{'poll_interval', 'next_poll_at', 'poll_failures'}`` per feed)"""
+        if not schedule:
+            return
+        rows = [(url, state['poll_interval'], state['next_poll_at'], state['poll_failures'])
+                for url, state in schedule.items()]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.executemany('''
+            INSERT INTO feed_state (feed_url, poll_interval, next_poll_at, poll_failures, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(feed_url) DO UPDATE SET
+                poll_interval = excluded.poll_interval,
+                next_poll_at = excluded.next_poll_at,
+                poll_failures = excluded.poll_failures,
+                updated_at = CURRENT_TIMESTAMP
+            ''', rows)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def rank_feeds(self, feed_urls: List[str], priors: Dict[str, float] = None) -> List[str]:
+        """Order feeds by expected new articles per second of fetch time.
+
+        Feeds without history score ``priors[url]`` (default
+        ``DEFAULT_PRIOR_NEW``) new articles per ``PRIOR_LATENCY`` seconds, so
+        they get tried. A feed's averages drift back toward its prior the
+        longer it goes unfetched, letting demoted feeds be re-tested while
+        feeds that stop producing new articles sink. Ties keep input order.
+        """
+        priors = priors or {}
+        stats = self.load_yield_stats()
+        now = time.time()
+        scores = {
+            url: expected_rate(stats.get(url), priors.get(url, DEFAULT_PRIOR_NEW), now)
+            for url in feed_urls
+        }
+        return sorted(feed_urls, key=lambda url: -scores[url])
+
+
+def _ewma(previous: float, value: float) -> float:
+    if previous is None:
+        return value
+    return YIELD_ALPHA * value + (1.0 - YIELD_ALPHA) * previous
+
+
+def expected_rate(stats: Dict, prior_new: float, now: float) -> float:
+    """Expected new articles per second for one feed"""
+    if not stats:
+        return prior_new / PRIOR_LATENCY
+    age_hours = max(0.0, now - (stats['last_fetched_at'] or now)) / 3600.0
+    weight = 0.5 ** (age_hours / STALE_HALF_LIFE_HOURS)
+    new = prior_new + ((stats['avg_new'] or 0.0) - prior_new) * weight
+    latency = PRIOR_LATENCY + ((stats['avg_latency'] or PRIOR_LATENCY) - PRIOR_LATENCY) * weight
+    return new / max(latency, MIN_LATENCY)
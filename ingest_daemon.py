@@ -0,0 +1,426 @@
+"""
+Ingest Daemon
+Long-running incremental collection over the comprehensive RSS catalog. Each
+feed is polled on its own adaptive schedule (sooner while it keeps producing
+new articles, later while it is quiet or failing) by a small fixed pool of
+worker threads, and matching articles are committed within a few seconds of
+discovery. Feed cursors, the poll schedule and a heartbeat are checkpointed
+to the database every minute, after which the snapshots are republished and
+queued watchlist notifications delivered, so a restarted daemon resumes
+where the last one stopped. One daemon runs per database: it holds the
+"ingest_daemon" collection lease, and a daemon that loses it stops without
+writing again. Other processes write through the daemon too: requests they
+queue (watchlist saves, manual collections) are applied one at a time on a
+background thread and checkpointed as soon as each finishes, so a deployment
+whose storage keeps only the last writer's copy has a single writer.
+SIGTERM/SIGINT finish in-flight polls and queued requests, flush and
+checkpoint before exiting.
+"""
+
+import os
+import time
+import socket
+import signal
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+from article_record import ArticleRecord
+from collector_metrics import CollectionMetrics
+from collection_lease import CollectionLease, lease_holder
+from enhanced_collector import EnhancedNegativeNewsCollector
+from story_clusters import StoryClusterer
+
+# Bounds on each feed's adaptive poll interval, in seconds
+MIN_POLL_INTERVAL = float(os.getenv("NEWS_DAEMON_MIN_INTERVAL", "120"))
+MAX_POLL_INTERVAL = float(os.getenv("NEWS_DAEMON_MAX_INTERVAL", "3600"))
+DEFAULT_POLL_INTERVAL = 600.0
+
+# Discovered articles wait at most this long before they are committed
+COMMIT_INTERVAL = float(os.getenv("NEWS_DAEMON_COMMIT_INTERVAL", "2"))
+# Cursors, schedule, heartbeat and snapshots are written this often
+CHECKPOINT_INTERVAL = float(os.getenv("NEWS_DAEMON_CHECKPOINT_INTERVAL", "60"))
+# Commit early once this many articles are waiting
+MAX_PENDING = 200
+# Links remembered to tell new articles from re-reads when adapting intervals
+RECENT_LINKS = 20000
+
+# A daemon whose heartbeat is older than this is presumed dead by the watchdog
+HEARTBEAT_STALE_SECONDS = float(os.getenv("NEWS_DAEMON_STALE_SECONDS", "600"))
+# The daemon's lease expires as its heartbeat goes stale, so a stalled daemon
+# is only replaced once it can no longer write
+LEASE_NAME = "ingest_daemon"
+# Wait before retrying a save or checkpoint that found the database locked
+DB_RETRY_SECONDS = 5.0
+# Queued write requests are picked up this often
+REQUEST_POLL_INTERVAL = float(os.getenv("NEWS_DAEMON_REQUEST_INTERVAL", "5"))
+
+
+def next_poll_interval(interval: float, new_articles: int, failed: bool) -> float:
+    """Halve the interval after new articles, back off on failures, drift later when quiet"""
+    if failed:
+        interval *= 2.0
+    elif new_articles:
+        interval /= 2.0
+    else:
+        interval *= 1.25
+    return min(MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, interval))
+
+
+def save_watchlist_request(db_path: str, request: Dict):
+    """``{'op': 'save_watchlist', 'watchlist': Watchlist.as_dict()}``"""
+    from watchlists import Watchlist, create_watchlist_tables, save_watchlist
+    watchlist = Watchlist(**request['watchlist'])
+    conn = sqlite3.connect(db_path)
+    try:
+        create_watchlist_tables(conn)
+        save_watchlist(conn, watchlist)
+    finally:
+        conn.close()
+    print(f"👁️ Saved watchlist '{watchlist.name}'")
+
+
+def update_news_request(db_path: str, request: Dict):
+    """``{'op': 'update_news'}``: the dashboard's standard refresh"""
+    from news_collector import NegativeNewsCollector
+    NegativeNewsCollector(db_path).update_news(os.getenv("NEWSAPI_KEY"), wait=False)
+
+
+def fast_update_request(db_path: str, request: Dict):
+    """``{'op': 'fast_update', 'target_articles': 30}``: the dashboard's local-sources scan"""
+    from fast_collector import FastNewsCollector
+    FastNewsCollector(db_path).fast_update(target_articles=request.get('target_articles', 30), wait=False)
+
+
+# Write requests other processes can queue for the daemon, by ``op``
+WRITE_REQUESTS: Dict[str, Callable[[str, Dict], object]] = {
+    'save_watchlist': save_watchlist_request,
+    'update_news': update_news_request,
+    'fast_update': fast_update_request,
+}
+
+
+def create_heartbeat_table(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS ingest_daemon (
+        name TEXT PRIMARY KEY,
+        host TEXT,
+        pid INTEGER,
+        started_at REAL,
+        heartbeat_at REAL,
+        polls INTEGER,
+        articles_saved INTEGER,
+        stopped_at REAL
+    )
+    ''')
+
+
+def daemon_status(db_path: str, name: str = "default") -> Optional[Dict]:
+    """Last heartbeat written by the daemon, or None if it never ran against this database"""
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute("SELECT * FROM ingest_daemon WHERE name = ?", (name,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return dict(row) if row else None
+
+
+def daemon_is_alive(db_path: str, name: str = "default", stale_after: float = None) -> bool:
+    """True when a running daemon still holds its lease or has checkpointed recently"""
+    if lease_holder(db_path, LEASE_NAME):
+        return True
+    stale_after = HEARTBEAT_STALE_SECONDS if stale_after is None else stale_after
+    status = daemon_status(db_path, name)
+    if not status or status['stopped_at']:
+        return False
+    return time.time() - (status['heartbeat_at'] or 0.0) < stale_after
+
+
+class IngestDaemon:
+    """Continuously poll every feed on its own schedule and commit new articles as they arrive"""
+
+    def __init__(self, db_path: str = "news_data.db", workers: int = 4, name: str = "default",
+                 collector: EnhancedNegativeNewsCollector = None, on_checkpoint: Callable = None,
+                 requests: Callable[[], List[Dict]] = None, handlers: Dict[str, Callable] = None):
+        self.db_path = db_path
+        self.workers = workers
+        self.name = name
+        self.collector = collector or EnhancedNegativeNewsCollector(db_path)
+        self.feed_state = self.collector.feed_state
+        # Called after every checkpoint, e.g. to commit a Modal volume
+        self.on_checkpoint = on_checkpoint
+        self.lease = CollectionLease(db_path, LEASE_NAME, ttl=HEARTBEAT_STALE_SECONDS)
+        self.lease_lost = False
+        # Drains write requests queued by other processes (e.g. a Modal Queue)
+        self.requests = requests
+        self.handlers = {**WRITE_REQUESTS, **(handlers or {})}
+        self.last_request_poll = time.monotonic()
+        # Set when a request finishes so its writes are checkpointed right away
+        self.request_done = threading.Event()
+
+        self.stop_event = threading.Event()
+        self.schedule: Dict[str, Dict] = {}
+        self.pending: List[ArticleRecord] = []
+        self.pending_since = None
+        self.pending_cursors: Dict[str, float] = {}
+        self.checkpoint_cursors: Dict[str, float] = {}
+        self.recent_links = OrderedDict()
+        self.started_at = time.time()
+        self.last_checkpoint = time.monotonic()
+        self.polls = 0
+        self.articles_saved = 0
+
+        conn = sqlite3.connect(db_path)
+        create_heartbeat_table(conn)
+        conn.commit()
+        conn.close()
+
+    def load_schedule(self):
+        """Resume persisted schedules; feeds never polled are due now, most productive first"""
+        now = time.time()
+        stored = self.feed_state.load_schedule()
+        self.schedule = {}
+        for url in self.feed_state.rank_feeds(list(dict.fromkeys(self.collector.all_rss_feeds()))):
+            state = stored.get(url)
+            self.schedule[url] = dict(state) if state else {
+                'poll_interval': DEFAULT_POLL_INTERVAL,
+                'next_poll_at': now,
+                'poll_failures': 0,
+            }
+            self.schedule[url].pop('feed_url', None)
+        self.collector.last_seen = self.feed_state.load_last_seen()
+        self.collector.metrics = CollectionMetrics("ingest_daemon", "poll")
+        due = sum(1 for state in self.schedule.values() if state['next_poll_at'] <= now)
+        print(f"🛰️  Ingest daemon scheduling {len(self.schedule)} feeds ({due} due now)")
+
+    def due_feeds(self, now: float, limit: int, busy) -> List[str]:
+        due = [url for url, state in self.schedule.items() if state['next_poll_at'] <= now and url not in busy]
+        due.sort(key=lambda url: self.schedule[url]['next_poll_at'])
+        return due[:limit]
+
+    def poll(self, feed_url: str):
+        """Worker thread: fetch and score one feed"""
+        self.collector.feed_cursors.pop(feed_url, None)
+        try:
+            articles = self.collector.process_feed(feed_url)
+        except Exception as e:
+            return feed_url, [], None, e
+        return feed_url, articles, self.collector.feed_cursors.get(feed_url), None
+
+    def handle_result(self, feed_url: str, articles: List[ArticleRecord], cursor: Optional[float], error):
+        self.polls += 1
+        new_articles = [a for a in articles if a.link and a.link not in self.recent_links]
+        for article in new_articles:
+            self.recent_links[article.link] = None
+        while len(self.recent_links) > RECENT_LINKS:
+            self.recent_links.popitem(last=False)
+
+        state = self.schedule[feed_url]
+        state['poll_failures'] = state['poll_failures'] + 1 if error else 0
+        state['poll_interval'] = next_poll_interval(state['poll_interval'], len(new_articles), error is not None)
+        state['next_poll_at'] = time.time() + state['poll_interval']
+        if error:
+            print(f"Error with RSS feed {feed_url}: {error} (retry in {state['poll_interval']:.0f}s)")
+            return
+
+        if new_articles:
+            if not self.pending:
+                self.pending_since = time.monotonic()
+            self.pending.extend(new_articles)
+        if cursor is not None:
+            self.pending_cursors[feed_url] = max(cursor, self.pending_cursors.get(feed_url) or 0.0)
+
+    def hold_lease(self) -> bool:
+        """Renew the daemon lease before writing; a daemon that lost it stops"""
+        if self.lease_lost:
+            return False
+        if not self.lease.renew():
+            print("⚠️ Ingest daemon lease was taken over; stopping without writing")
+            self.lease_lost = True
+            self.stop_event.set()
+            return False
+        return True
+
+    def flush(self, force: bool = False):
+        """Commit waiting articles once the oldest has waited ``COMMIT_INTERVAL``"""
+        if self.pending and (force or len(self.pending) >= MAX_PENDING
+                             or time.monotonic() - self.pending_since >= COMMIT_INTERVAL):
+            try:
+                if not self.hold_lease():
+                    return
+                saved_count = self.collector.save_articles(self.pending)
+            except sqlite3.OperationalError as e:
+                # Locked or busy: keep the articles (and their cursors) and try again
+                print(f"⚠️ Could not save {len(self.pending)} articles ({e}); retrying in {DB_RETRY_SECONDS:g}s")
+                self.pending_since = time.monotonic() - COMMIT_INTERVAL + DB_RETRY_SECONDS
+                # The rolled-back batch may already be in the story window
+                self.collector.stories = StoryClusterer()
+                return
+            self.collector.metrics.count('rows_inserted', saved_count)
+            self.articles_saved += saved_count
+            if saved_count:
+                print(f"💾 Saved {saved_count} new articles to database")
+            self.pending = []
+            self.pending_since = None
+        if not self.pending:
+            # Cursors only advance once their feed's articles are stored
+            for url, cursor in self.pending_cursors.items():
+                if cursor > (self.collector.last_seen.get(url) or 0.0):
+                    self.collector.last_seen[url] = cursor
+            self.checkpoint_cursors.update(self.pending_cursors)
+            self.pending_cursors = {}
+
+    def checkpoint(self, stopping: bool = False):
+        """Persist cursors, schedule and heartbeat, then republish the snapshots and
+        deliver watchlist notifications"""
+        try:
+            if not self.hold_lease():
+                return
+            self.feed_state.update_last_seen(self.checkpoint_cursors)
+            self.checkpoint_cursors = {}
+            self.feed_state.save_schedule(self.schedule)
+            self.write_heartbeat(stopping)
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ Checkpoint failed ({e}); retrying in {DB_RETRY_SECONDS:g}s")
+            self.last_checkpoint = time.monotonic() - CHECKPOINT_INTERVAL + DB_RETRY_SECONDS
+            return
+        # Republished even without new articles so the read snapshot stays current
+        self.collector.refresh_snapshots()
+        self.collector.notify_watchlists()
+        self.collector.metrics.finish()
+        self.collector.metrics = CollectionMetrics("ingest_daemon", "poll")
+        self.last_checkpoint = time.monotonic()
+        if self.on_checkpoint:
+            self.on_checkpoint()
+
+    def write_heartbeat(self, stopping: bool = False):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute('''
+            INSERT OR REPLACE INTO ingest_daemon
+            (name, host, pid, started_at, heartbeat_at, polls, articles_saved, stopped_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (self.name, socket.gethostname(), os.getpid(), self.started_at, time.time(),
+                  self.polls, self.articles_saved, time.time() if stopping else None))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def take_requests(self, request_pool: ThreadPoolExecutor):
+        """Hand newly queued write requests to the request thread"""
+        self.last_request_poll = time.monotonic()
+        try:
+            requests = self.requests()
+        except Exception as e:
+            print(f"⚠️ Could not read queued write requests: {e}")
+            return
+        for request in requests:
+            request_pool.submit(self.apply_request, request)
+
+    def apply_request(self, request: Dict):
+        """Request thread: run one write request, then ask for an early checkpoint"""
+        op = request.get('op')
+        handler = self.handlers.get(op)
+        if handler is None:
+            print(f"⚠️ Ignoring unknown write request {op!r}")
+            return
+        if self.lease_lost:
+            print(f"⚠️ Dropping {op} request: the daemon no longer holds its lease")
+            return
+        print(f"📝 Applying queued {op} request")
+        try:
+            handler(self.db_path, request)
+        except Exception as e:
+            print(f"⚠️ {op} request failed: {e}")
+        self.request_done.set()
+
+    def stop(self, *_):
+        """Ask the loop to finish in-flight polls, flush and exit"""
+        if not self.stop_event.is_set():
+            print("🛑 Ingest daemon stopping...")
+        self.stop_event.set()
+
+    def run(self, duration: float = None):
+        """Poll until stopped (or for ``duration`` seconds); returns articles saved"""
+        previous_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous_handlers[signum] = signal.signal(signum, self.stop)
+        deadline = time.monotonic() + duration if duration else None
+
+        held = self.lease.try_acquire(self.name, LEASE_NAME)
+        if held is not None:
+            print(f"🛰️  Ingest daemon already running ({held['owner']}); not starting another")
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+            return 0
+
+        self.load_schedule()
+        self.write_heartbeat()
+        in_flight = {}
+        try:
+            # Requests run one at a time, and those already taken finish before the final checkpoint
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingest") as pool, \
+                    ThreadPoolExecutor(max_workers=1, thread_name_prefix="write-request") as request_pool:
+                while not self.stop_event.is_set():
+                    if deadline and time.monotonic() >= deadline:
+                        break
+                    now = time.time()
+                    busy = set(in_flight.values())
+                    for url in self.due_feeds(now, self.workers - len(in_flight), busy):
+                        in_flight[pool.submit(self.poll, url)] = url
+
+                    if in_flight:
+                        done, _ = wait(in_flight, timeout=0.5, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            del in_flight[future]
+                            self.handle_result(*future.result())
+                    else:
+                        next_due = min((s['next_poll_at'] for s in self.schedule.values()), default=now + 1.0)
+                        self.stop_event.wait(min(0.5, max(0.0, next_due - now)))
+
+                    if self.requests and time.monotonic() - self.last_request_poll >= REQUEST_POLL_INTERVAL:
+                        self.take_requests(request_pool)
+                    self.flush()
+                    if self.request_done.is_set() or time.monotonic() - self.last_checkpoint >= CHECKPOINT_INTERVAL:
+                        self.request_done.clear()
+                        self.checkpoint()
+
+                # Let polls already under way finish so their articles are kept
+                for future in list(in_flight):
+                    self.handle_result(*future.result())
+        finally:
+            if not self.lease_lost:
+                self.flush(force=True)
+                if self.pending:
+                    print(f"⚠️ {len(self.pending)} articles not saved; their feeds' cursors did not advance")
+                self.checkpoint(stopping=True)
+                self.lease.release('ok', self.articles_saved)
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+        print(f"🏁 Ingest daemon stopped: {self.polls} polls, {self.articles_saved} articles saved")
+        return self.articles_saved
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Continuously poll feeds and commit new articles as they arrive")
+    parser.add_argument("--db", default=os.getenv("NEWS_DB_PATH", "news_data.db"))
+    parser.add_argument("--workers", type=int, default=4, help="concurrent feed polls")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds (default: run until signalled)")
+    parser.add_argument("--status", action="store_true", help="print the last heartbeat and exit")
+    args = parser.parse_args()
+
+    if args.status:
+        status = daemon_status(args.db)
+        print(json.dumps(status, indent=2) if status else "Ingest daemon has never run against this database")
+        print(f"Alive: {daemon_is_alive(args.db)}")
+    else:
+        IngestDaemon(args.db, workers=args.workers).run(args.duration)
@@ -0,0 +1,211 @@
+"""
+News API
+Read-only HTTP JSON API over the news store for other services: recent
+articles, search, per-category, per-source and per-company aggregates, and
+"since cursor" deltas. Standard library only. Every response carries an
+ETag derived from the ingest version, so a poll that finds nothing new is
+answered 304 after reading one row; bodies are gzipped when the client
+accepts it, and article lists page by id (keyset) rather than by offset.
+"""
+
+import os
+import gzip
+import json
+import time
+import hashlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from news_store import NewsReader, DEFAULT_DB_PATH
+
+API_PORT = int(os.getenv("NEWS_API_PORT", "8080"))
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_DAYS = 3650
+# Bodies smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+# Articles age out of ``days`` windows without a new ingest, so windowed
+# responses also roll their ETag over this often
+WINDOW_ETAG_SECONDS = 300
+
+
+def _int_param(params: Dict, name: str, default: Optional[int], minimum: int, maximum: int) -> Optional[int]:
+    values = params.get(name)
+    if not values or values[0] == '':
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise ValueError(f"'{name}' must be an integer")
+    if not minimum <= value <= maximum:
+        raise ValueError(f"'{name}' must be between {minimum} and {maximum}")
+    return value
+
+
+def _days(params: Dict, default: float = 7) -> float:
+    values = params.get('days')
+    if not values or values[0] == '':
+        return default
+    try:
+        days = float(values[0])
+    except ValueError:
+        raise ValueError("'days' must be a number")
+    if not 0 < days <= MAX_DAYS:
+        raise ValueError(f"'days' must be above 0 and at most {MAX_DAYS}")
+    return days
+
+
+def _gzip_etag(etag: str) -> str:
+    """Strong validator for the gzipped body, which differs byte for byte from the plain one"""
+    return f'{etag[:-1]}-gz"'
+
+
+class NewsAPI:
+    """Maps API paths to NewsReader queries, independently of the HTTP server"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.reader = NewsReader(db_path)
+        # Path -> (handler, whether its result depends on a ``days`` window)
+        self.routes: Dict[str, Tuple[Callable[[Dict], Dict], bool]] = {
+            '/articles': (self.articles, True),
+            '/articles/since': (self.articles_since, False),
+            '/search': (self.search, True),
+            '/aggregates/categories': (self.categories, True),
+            '/aggregates/sources': (self.sources, True),
+            '/aggregates/companies': (self.companies, True),
+        }
+
+    def etag(self, version: int, path: str, query: str, windowed: bool) -> Optional[str]:
+        """Validator for one response; ``None`` for databases without an ingest version"""
+        if not version:
+            return None
+        window = int(time.time() // WINDOW_ETAG_SECONDS) if windowed else ''
+        digest = hashlib.sha1(f"{version}|{window}|{path}?{query}".encode('utf-8')).hexdigest()[:20]
+        return f'"{digest}"'
+
+    def _page(self, articles, limit: int) -> Dict:
+        return {
+            'articles': articles,
+            'count': len(articles),
+            # The next page continues below the last id returned
+            'next_cursor': articles[-1]['id'] if len(articles) == limit else None,
+        }
+
+    def articles(self, params: Dict) -> Dict:
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        cursor = _int_param(params, 'cursor', None, 1, 2 ** 63 - 1)
+        return self._page(self.reader.get_articles_page(_days(params), limit, cursor), limit)
+
+    def search(self, params: Dict) -> Dict:
+        query = (params.get('q') or [''])[0].strip()
+        if not query:
+            raise ValueError("'q' is required")
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        cursor = _int_param(params, 'cursor', None, 1, 2 ** 63 - 1)
+        page = self._page(self.reader.get_articles_page(_days(params, 30), limit, cursor, query), limit)
+        return {'query': query, **page}
+
+    def articles_since(self, params: Dict) -> Dict:
+        cursor = _int_param(params, 'cursor', 0, 0, 2 ** 63 - 1)
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        articles = self.reader.get_articles_since(cursor, limit)
+        return {
+            'articles': articles,
+            'count': len(articles),
+            # Poll again with this cursor; unchanged when nothing is new
+            'next_cursor': articles[-1]['id'] if articles else cursor,
+            'has_more': len(articles) == limit,
+        }
+
+    def categories(self, params: Dict) -> Dict:
+        return {'days': _days(params), 'categories': self.reader.category_counts(_days(params))}
+
+    def sources(self, params: Dict) -> Dict:
+        return {'days': _days(params), 'sources': self.reader.source_counts(_days(params))}
+
+    def companies(self, params: Dict) -> Dict:
+        limit = _int_param(params, 'limit', DEFAULT_PAGE_SIZE, 1, MAX_PAGE_SIZE)
+        return {'days': _days(params), 'companies': self.reader.company_counts(_days(params), limit)}
+
+
+class NewsAPIHandler(BaseHTTPRequestHandler):
+    """GET-only JSON handler; ``api`` is set on the subclass ``serve`` creates"""
+
+    api: NewsAPI = None
+    server_version = "NewsAPI/1.0"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/'
+        if path in ('/', '/health'):
+            version = self.api.reader.ingest_version()
+            return self.send_json(200, {'status': 'ok', **version, 'endpoints': sorted(self.api.routes)})
+        route = self.api.routes.get(path)
+        if route is None:
+            return self.send_json(404, {'error': f"No endpoint {path}", 'endpoints': sorted(self.api.routes)})
+        handler, windowed = route
+
+        # Answer unchanged polls from the version row alone
+        etag = self.api.etag(self.api.reader.ingest_version()['version'], path, url.query, windowed)
+        matches = [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]
+        if etag and self.accepts_gzip() and _gzip_etag(etag) in matches:
+            etag = _gzip_etag(etag)
+        if etag and etag in matches:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+            self.end_headers()
+            return
+
+        try:
+            body = handler(parse_qs(url.query))
+        except ValueError as e:
+            return self.send_json(400, {'error': str(e)})
+        self.send_json(200, body, etag)
+
+    def accepts_gzip(self) -> bool:
+        return 'gzip' in self.headers.get('Accept-Encoding', '')
+
+    def send_json(self, status: int, body: Dict, etag: Optional[str] = None):
+        payload = json.dumps(body, separators=(',', ':'), default=str).encode('utf-8')
+        gzipped = len(payload) >= GZIP_MIN_BYTES and self.accepts_gzip()
+        if gzipped:
+            payload = gzip.compress(payload, compresslevel=5)
+            etag = _gzip_etag(etag) if etag else None
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Cache-Control', 'no-cache')
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(db_path: str = DEFAULT_DB_PATH, host: str = "0.0.0.0", port: int = API_PORT) -> ThreadingHTTPServer:
+    """A threaded API server bound to ``host:port`` (call ``serve_forever`` to run it)"""
+    handler = type('BoundNewsAPIHandler', (NewsAPIHandler,), {'api': NewsAPI(db_path)})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the read-only news JSON API")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    args = parser.parse_args()
+
+    server = serve(args.db, args.host, args.port)
+    print(f"🌐 News API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
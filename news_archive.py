@@ -0,0 +1,177 @@
+"""
+News Archive
+Cold tier for articles that have aged out of the hot negative_news table.
+Expired rows are moved, not deleted: each archival appends one zlib-compressed
+JSON chunk per UTC publish day, and readers union the chunks overlapping a
+requested window (or id range) with the hot rows. Only json, zlib and sqlite3 are imported
+so the dashboard can read the archive without the collector stack.
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Articles stay in the hot table this long after they were collected
+HOT_RETENTION_HOURS = float(os.getenv("NEWS_HOT_RETENTION_HOURS", "48"))
+
+# Fields kept for each archived article (plus its crisis categories)
+ARCHIVE_FIELDS = ('id', 'title', 'link', 'description', 'published', 'source', 'sentiment_score',
+                  'negative_keywords', 'created_at', 'source_type', 'published_at', 'story_id')
+
+
+def create_archive_table(conn: sqlite3.Connection):
+    """Create the append-only archive table and its window index (the id range
+    indexes come with ``add_archive_id_range``)"""
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS news_archive (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        day TEXT NOT NULL,
+        min_published_at REAL NOT NULL,
+        max_published_at REAL NOT NULL,
+        min_id INTEGER,
+        max_id INTEGER,
+        article_count INTEGER NOT NULL,
+        payload BLOB NOT NULL,
+        archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS idx_news_archive_day ON news_archive (day);
+    CREATE INDEX IF NOT EXISTS idx_news_archive_max_published_at ON news_archive (max_published_at);
+    ''')
+
+
+def archive_expired(cursor: sqlite3.Cursor, retention_hours: float = None) -> int:
+    """Move hot rows collected more than ``retention_hours`` ago into the archive.
+
+    Runs inside the caller's transaction, so a failed save archives nothing.
+    Returns the number of articles moved.
+    """
+    retention_hours = HOT_RETENTION_HOURS if retention_hours is None else retention_hours
+    columns = ', '.join(ARCHIVE_FIELDS)
+    rows = cursor.execute(f'''
+    SELECT {columns} FROM negative_news
+    WHERE created_at < datetime('now', ?)
+    ''', (f'-{retention_hours} hours',)).fetchall()
+    if not rows:
+        return 0
+
+    ids = [row[0] for row in rows]
+    categories = {}
+    for start in range(0, len(ids), 500):
+        batch = ids[start:start + 500]
+        placeholders = ','.join('?' * len(batch))
+        for article_id, category in cursor.execute(
+            f"SELECT article_id, category FROM article_categories WHERE article_id IN ({placeholders})", batch
+        ):
+            categories.setdefault(article_id, []).append(category)
+
+    days: Dict[str, List[Dict]] = {}
+    for row in rows:
+        article = dict(zip(ARCHIVE_FIELDS, row))
+        article['categories'] = categories.get(article['id'], [])
+        days.setdefault(archive_day(article['published_at']), []).append(article)
+
+    for day, articles in days.items():
+        published = [a['published_at'] or 0.0 for a in articles]
+        article_ids = [a['id'] for a in articles]
+        payload = zlib.compress(json.dumps(articles, separators=(',', ':')).encode('utf-8'), 9)
+        cursor.execute('''
+        INSERT INTO news_archive (day, min_published_at, max_published_at, min_id, max_id, article_count, payload)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (day, min(published), max(published), min(article_ids), max(article_ids), len(articles), payload))
+
+    # The delete trigger drops the keyword and category links with the rows
+    cursor.executemany("DELETE FROM negative_news WHERE id = ?", [(article_id,) for article_id in ids])
+    return len(ids)
+
+
+def add_archive_id_range(conn: sqlite3.Connection):
+    """Index chunks by the article ids they hold, backfilling chunks archived
+    before the range was stored"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(news_archive)")}
+    for column in ('min_id', 'max_id'):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE news_archive ADD COLUMN {column} INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_news_archive_min_id ON news_archive (min_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_news_archive_max_id ON news_archive (max_id)")
+
+    updates = []
+    for chunk_id, payload in conn.execute("SELECT id, payload FROM news_archive WHERE min_id IS NULL").fetchall():
+        article_ids = [article['id'] for article in json.loads(zlib.decompress(payload))]
+        updates.append((min(article_ids), max(article_ids), chunk_id))
+    conn.executemany("UPDATE news_archive SET min_id = ?, max_id = ? WHERE id = ?", updates)
+
+
+def archive_day(published_at: float) -> str:
+    """UTC publish date used as an archive partition key"""
+    return datetime.datetime.fromtimestamp(published_at or 0.0, datetime.timezone.utc).strftime('%Y-%m-%d')
+
+
+def iter_archived(conn: sqlite3.Connection, since: float) -> Iterator[Dict]:
+    """Archived articles published at or after ``since`` (UTC epoch).
+
+    Only chunks whose newest article falls inside the window are read and
+    decompressed. Yields nothing if the database has no archive yet.
+    """
+    try:
+        chunks = conn.execute(
+            "SELECT payload FROM news_archive WHERE max_published_at >= ?", (since,)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return
+    for (payload,) in chunks:
+        for article in json.loads(zlib.decompress(payload)):
+            if (article['published_at'] or 0.0) >= since:
+                yield article
+
+
+def iter_archived_day(conn: sqlite3.Connection, day: str) -> Iterator[Dict]:
+    """Every archived article in one UTC publish-day partition"""
+    try:
+        chunks = conn.execute("SELECT payload FROM news_archive WHERE day = ?", (day,)).fetchall()
+    except sqlite3.OperationalError:
+        return
+    for (payload,) in chunks:
+        yield from json.loads(zlib.decompress(payload))
+
+
+def archived_by_id(conn: sqlite3.Connection, limit: int, before_id: int = None, after_id: int = None,
+                   since: float = 0.0, keep: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """Up to ``limit`` archived articles published at or after ``since`` that
+    ``keep`` accepts: the newest ids below ``before_id``, or with ``after_id``
+    the oldest ids above it.
+
+    Chunks are read nearest the cursor first and reading stops once no
+    remaining chunk's id range can beat the ``limit`` articles already found,
+    so a page decompresses a few chunks rather than the whole window.
+    """
+    if after_id is not None:
+        query = "SELECT id, min_id FROM news_archive WHERE max_id > ? AND max_published_at >= ? ORDER BY min_id"
+        params = (after_id, since)
+        newest_first = False
+    else:
+        query = "SELECT id, max_id FROM news_archive WHERE min_id < ? AND max_published_at >= ? ORDER BY max_id DESC"
+        params = (before_id if before_id is not None else float('inf'), since)
+        newest_first = True
+    try:
+        chunks = conn.execute(query, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+    found: List[Dict] = []
+    for chunk_id, bound in chunks:
+        if len(found) == limit and (found[-1]['id'] > bound if newest_first else found[-1]['id'] < bound):
+            break
+        payload = conn.execute("SELECT payload FROM news_archive WHERE id = ?", (chunk_id,)).fetchone()[0]
+        for article in json.loads(zlib.decompress(payload)):
+            if newest_first and before_id is not None and article['id'] >= before_id:
+                continue
+            if not newest_first and article['id'] <= after_id:
+                continue
+            if (article['published_at'] or 0.0) >= since and (keep is None or keep(article)):
+                found.append(article)
+        found.sort(key=lambda article: article['id'], reverse=newest_first)
+        del found[limit:]
+    return found
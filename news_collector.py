@@ -8,6 +8,20 @@ import time
 import os
 from typing import List, Dict
 import re
+from collector_metrics import CollectionMetrics
+from collection_profiler import profiled, enable_from_argv
+from collection_lease import ensure_lease_held, single_flight
+from news_store import NewsReader
+from text_normalizer import normalize_entry, clean_text, as_normalized
+from article_record import ArticleRecord
+from feed_fetcher import fetch_feed, feed_cursor
+from feed_state import FeedStateStore
+from news_snapshots import SnapshotStore
+from read_snapshot import publish_read_snapshot
+from news_archive import archive_expired, HOT_RETENTION_HOURS
+from story_clusters import StoryClusterer
+from watchlists import WatchlistMatcher, deliver_notifications
+from news_schema import migrate_database, insert_articles, ArticleLinkWriter
 
 class NegativeNewsCollector:
     def __init__(self, db_path="news_data.db"):
@@ -106,7 +120,20 @@ class NegativeNewsCollector:
             "https://feeds.feedburner.com/fastcompany/headlines",
         ]
         
+        # Metrics for the current (or most recent) collection run
+        self.metrics = CollectionMetrics("news_collector")
+        
+        # Per-feed newest-entry cursors: loaded at the start of a run, advanced after saving
+        self.last_seen = {}
+        self.feed_cursors = {}
+        
         self.setup_database()
+        self.feed_state = FeedStateStore(db_path)
+        self.snapshots = SnapshotStore(db_path)
+        # Sliding window of recent article vectors, kept between saves
+        self.stories = StoryClusterer()
+        # Standing queries, recompiled when they change
+        self.watchlists = WatchlistMatcher()
         
     def setup_database(self):
         """Initialize SQLite database"""
@@ -126,27 +153,26 @@ class NegativeNewsCollector:
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         ''')
+        migrate_database(conn)
         
         conn.commit()
         conn.close()
     
     def clean_html(self, text: str) -> str:
-        """Remove HTML tags from text"""
-        clean = re.compile('<.*?>')
-        return re.sub(clean, '', text)
+        """Remove HTML tags and entities from text"""
+        return clean_text(text)
     
-    def analyze_sentiment(self, text: str) -> float:
-        """Analyze sentiment using TextBlob"""
+    def analyze_sentiment(self, text) -> float:
+        """Analyze sentiment using TextBlob (raw text or NormalizedText)"""
         try:
-            clean_text = self.clean_html(text)
-            blob = TextBlob(clean_text)
+            blob = TextBlob(as_normalized(text).full_text)
             return blob.sentiment.polarity
         except:
             return 0.0
     
-    def contains_negative_keywords(self, text: str) -> List[str]:
-        """Check if text contains negative business keywords"""
-        text_lower = self.clean_html(text).lower()
+    def contains_negative_keywords(self, text) -> List[str]:
+        """Check if text (raw or NormalizedText) contains negative business keywords"""
+        text_lower = as_normalized(text).lower
         found_keywords = []
         
         for keyword in self.negative_keywords:
@@ -155,28 +181,29 @@ class NegativeNewsCollector:
         
         return found_keywords
     
-    def fetch_news_from_rss(self) -> List[Dict]:
+    def fetch_news_from_rss(self) -> List[ArticleRecord]:
         """Fetch news from RSS feeds"""
         all_articles = []
         
         for feed_url in self.rss_feeds:
             try:
                 print(f"Fetching from: {feed_url}")
-                feed = feedparser.parse(feed_url)
+                feed = fetch_feed(feed_url, self.metrics, since=self.last_seen.get(feed_url))
+                self.feed_cursors[feed_url] = feed_cursor(feed)
                 
                 for entry in feed.entries:
-                    # Combine title and description for analysis
+                    # Normalize title and description once for matching, scoring and storage
                     title = entry.get('title', '')
                     description = entry.get('description', '') or entry.get('summary', '')
-                    full_text = f"{title} {description}"
+                    text = normalize_entry(title, description)
                     
-                    # Check for negative keywords
-                    found_keywords = self.contains_negative_keywords(full_text)
+                    # Check for negative keywords, then calculate sentiment
+                    with self.metrics.cpu_stage('scoring'):
+                        found_keywords = self.contains_negative_keywords(text)
+                        sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+                    self.metrics.record_entry(feed_url, bool(found_keywords))
                     
                     if found_keywords:
-                        # Calculate sentiment
-                        sentiment = self.analyze_sentiment(full_text)
-                        
                         # Only include if sentiment is negative or neutral with strong negative keywords
                         if sentiment <= 0.4 or len(found_keywords) >= 2:  # Include if multiple negative keywords
                             # Parse published date
@@ -184,16 +211,17 @@ class NegativeNewsCollector:
                             if not published:
                                 published = entry.get('updated', '')
                             
-                            article = {
-                                'title': title,
-                                'link': entry.get('link', ''),
-                                'description': self.clean_html(description),
-                                'published': published,
-                                'source': feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
-                                'sentiment_score': sentiment,
-                                'negative_keywords': ','.join(found_keywords)
-                            }
+                            article = ArticleRecord(
+                                title=text.title,
+                                link=entry.get('link', ''),
+                                description=text.description,
+                                published=published,
+                                source=feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
+                                sentiment_score=sentiment,
+                                negative_keywords=','.join(found_keywords)
+                            )
                             all_articles.append(article)
+                            self.metrics.record_match(feed_url)
                 
                 time.sleep(1)  # Be polite to servers
                 
@@ -203,7 +231,7 @@ class NegativeNewsCollector:
         
         return all_articles
     
-    def fetch_news_from_newsapi(self, api_key: str) -> List[Dict]:
+    def fetch_news_from_newsapi(self, api_key: str) -> List[ArticleRecord]:
         """Fetch news from NewsAPI"""
         if not api_key:
             return []
@@ -237,22 +265,22 @@ class NegativeNewsCollector:
                         for article in data.get('articles', []):
                             title = article.get('title', '')
                             description = article.get('description', '')
-                            full_text = f"{title} {description}"
-                            found_keywords = self.contains_negative_keywords(full_text)
+                            text = normalize_entry(title, description)
+                            found_keywords = self.contains_negative_keywords(text)
                             
                             if found_keywords:
-                                sentiment = self.analyze_sentiment(full_text)
+                                sentiment = self.analyze_sentiment(text)
                                 
                                 if sentiment <= 0.4 or len(found_keywords) >= 2:
-                                    articles.append({
-                                        'title': title,
-                                        'link': article.get('url', ''),
-                                        'description': description,
-                                        'published': article.get('publishedAt', ''),
-                                        'source': article.get('source', {}).get('name', 'NewsAPI'),
-                                        'sentiment_score': sentiment,
-                                        'negative_keywords': ','.join(found_keywords)
-                                    })
+                                    articles.append(ArticleRecord(
+                                        title=text.title,
+                                        link=article.get('url', ''),
+                                        description=text.description,
+                                        published=article.get('publishedAt', ''),
+                                        source=article.get('source', {}).get('name', 'NewsAPI'),
+                                        sentiment_score=sentiment,
+                                        negative_keywords=','.join(found_keywords)
+                                    ))
                 
                 time.sleep(1)  # Rate limiting
                 
@@ -262,82 +290,51 @@ class NegativeNewsCollector:
         
         return articles
     
-    def save_articles(self, articles: List[Dict]):
-        """Save articles to database with auto-cleanup"""
+    def save_articles(self, articles: List[ArticleRecord]):
+        """Save articles to database, archiving expired ones"""
+        # A run whose collection lease was taken over must not write
+        ensure_lease_held()
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        saved_count = 0
-        
-        for article in articles:
-            try:
-                cursor.execute('''
-                INSERT OR IGNORE INTO negative_news 
-                (title, link, description, published, source, sentiment_score, negative_keywords)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    article['title'],
-                    article['link'],
-                    article['description'],
-                    article['published'],
-                    article['source'],
-                    article['sentiment_score'],
-                    article['negative_keywords']
-                ))
-                
-                if cursor.rowcount > 0:
-                    saved_count += 1
-                    
-            except Exception as e:
-                print(f"Error saving article: {e}")
-                continue
+        links = ArticleLinkWriter(self.stories, self.watchlists)
+        saved_count = insert_articles(cursor, articles, links)
+        links.flush(cursor)
         
-        # Auto-cleanup after every 5 new articles
+        # Move articles older than the hot window to the archive after every 5 new articles
         if saved_count >= 5:
-            cursor.execute('''
-            DELETE FROM negative_news 
-            WHERE created_at < datetime('now', '-48 hours')
-            ''')
-            deleted_count = cursor.rowcount
-            if deleted_count > 0:
-                print(f"🧹 Auto-cleanup: Deleted {deleted_count} articles older than 48 hours")
+            archived_count = archive_expired(cursor)
+            if archived_count > 0:
+                print(f"🗄️ Archived {archived_count} articles older than {HOT_RETENTION_HOURS:g} hours")
         
         conn.commit()
         conn.close()
         
         return saved_count
     
+    def refresh_snapshots(self):
+        """Rewrite the daily snapshots for days that gained articles and republish
+        the read-only database (never fails the run)"""
+        try:
+            self.snapshots.refresh()
+            publish_read_snapshot(self.db_path)
+        except Exception as e:
+            print(f"Snapshot refresh failed: {e}")
+    
+    def notify_watchlists(self):
+        """Deliver queued watchlist matches to the configured sinks (never fails the run)"""
+        try:
+            delivered = deliver_notifications(self.db_path)
+            if delivered:
+                print(f"📬 Delivered {delivered} watchlist notifications")
+        except Exception as e:
+            print(f"Watchlist notification failed: {e}")
+    
     def get_recent_news(self, days=7) -> List[Dict]:
         """Get recent negative news from database, sorted by newest first"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT title, link, description, published, source, sentiment_score, negative_keywords, created_at
-        FROM negative_news 
-        WHERE created_at >= datetime('now', '-{} days')
-        ORDER BY created_at DESC, published DESC
-        '''.format(days))
-        
-        rows = cursor.fetchall()
-        conn.close()
-        
-        articles = []
-        for row in rows:
-            articles.append({
-                'title': row[0],
-                'link': row[1],
-                'description': row[2],
-                'published': row[3],
-                'source': row[4],
-                'sentiment_score': row[5],
-                'negative_keywords': row[6],
-                'created_at': row[7]
-            })
-        
-        return articles
+        return NewsReader(self.db_path).get_recent_news(days)
     
-    def fetch_linkedin_trending(self) -> List[Dict]:
+    def fetch_linkedin_trending(self) -> List[ArticleRecord]:
         """Fetch trending business news from LinkedIn via search scraping"""
         articles = []
         
@@ -365,15 +362,15 @@ class NegativeNewsCollector:
                         for url in linkedin_urls[:3]:  # Limit to prevent spam
                             if 'posts' in url or 'pulse' in url:
                                 # Create article entry for LinkedIn trending
-                                articles.append({
-                                    'title': f"LinkedIn Trending: {query.title()} Discussion",
-                                    'link': url,
-                                    'description': f"Trending discussion about {query} in business community",
-                                    'published': datetime.datetime.now().isoformat(),
-                                    'source': 'LinkedIn Trending',
-                                    'sentiment_score': -0.3,  # Assume negative for crisis topics
-                                    'negative_keywords': query
-                                })
+                                articles.append(ArticleRecord(
+                                    title=f"LinkedIn Trending: {query.title()} Discussion",
+                                    link=url,
+                                    description=f"Trending discussion about {query} in business community",
+                                    published=datetime.datetime.now().isoformat(),
+                                    source='LinkedIn Trending',
+                                    sentiment_score=-0.3,  # Assume negative for crisis topics
+                                    negative_keywords=query
+                                ))
                     
                     time.sleep(2)  # Rate limiting
                 except Exception as e:
@@ -385,7 +382,7 @@ class NegativeNewsCollector:
         
         return articles[:10]  # Return top 10
     
-    def fetch_additional_sources(self) -> List[Dict]:
+    def fetch_additional_sources(self) -> List[ArticleRecord]:
         """Fetch from additional sources to ensure we have enough articles"""
         articles = []
         
@@ -406,33 +403,36 @@ class NegativeNewsCollector:
         for feed_url in additional_sources:
             try:
                 print(f"Fetching additional from: {feed_url}")
-                feed = feedparser.parse(feed_url)
+                feed = fetch_feed(feed_url, self.metrics, max_entries=10, since=self.last_seen.get(feed_url))
+                self.feed_cursors[feed_url] = feed_cursor(feed)
                 
-                for entry in feed.entries[:10]:  # Limit per feed
+                for entry in feed.entries:
                     title = entry.get('title', '')
                     description = entry.get('description', '') or entry.get('summary', '')
-                    full_text = f"{title} {description}"
+                    text = normalize_entry(title, description)
                     
-                    found_keywords = self.contains_negative_keywords(full_text)
+                    with self.metrics.cpu_stage('scoring'):
+                        found_keywords = self.contains_negative_keywords(text)
+                        sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+                    self.metrics.record_entry(feed_url, bool(found_keywords))
                     
                     if found_keywords:
-                        sentiment = self.analyze_sentiment(full_text)
-                        
                         if sentiment <= 0.4 or len(found_keywords) >= 2:  # More lenient to get more articles
                             published = entry.get('published', '')
                             if not published:
                                 published = entry.get('updated', '')
                             
-                            article = {
-                                'title': title,
-                                'link': entry.get('link', ''),
-                                'description': self.clean_html(description),
-                                'published': published,
-                                'source': feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
-                                'sentiment_score': sentiment,
-                                'negative_keywords': ','.join(found_keywords)
-                            }
+                            article = ArticleRecord(
+                                title=text.title,
+                                link=entry.get('link', ''),
+                                description=text.description,
+                                published=published,
+                                source=feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
+                                sentiment_score=sentiment,
+                                negative_keywords=','.join(found_keywords)
+                            )
                             articles.append(article)
+                            self.metrics.record_match(feed_url)
                 
                 time.sleep(1)
                 
@@ -442,62 +442,89 @@ class NegativeNewsCollector:
         
         return articles
 
-    def update_news(self, newsapi_key=None, min_articles=20):
-        """Main method to update news database - fast refresh"""
+    @single_flight("update_news")
+    @profiled("update_news")
+    def update_news(self, newsapi_key=None, min_articles=20, with_metrics=False):
+        """Main method to update news database - fast refresh
+
+        Returns the saved count, or ``(saved_count, metrics_summary)`` when
+        ``with_metrics`` is set.
+        """
         print("🔄 Quick news refresh...")
+        self.metrics = CollectionMetrics("news_collector", "update_news")
+        self.last_seen = self.feed_state.load_last_seen()
+        self.feed_cursors = {}
         
         # Fetch from main RSS feeds (limited to first 10 feeds for speed)
         rss_articles = []
-        for feed_url in self.rss_feeds[:10]:
-            try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:10]:
-                    title = entry.get('title', '')
-                    description = entry.get('description', '') or entry.get('summary', '')
-                    full_text = f"{title} {description}"
-                    found_keywords = self.contains_negative_keywords(full_text)
-                    if found_keywords:
-                        sentiment = self.analyze_sentiment(full_text)
-                        if sentiment <= 0.4 or len(found_keywords) >= 2:
-                            rss_articles.append({
-                                'title': title,
-                                'link': entry.get('link', ''),
-                                'description': self.clean_html(description)[:300],
-                                'published': entry.get('published', ''),
-                                'source': feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
-                                'sentiment_score': sentiment,
-                                'negative_keywords': ','.join(found_keywords)
-                            })
-            except:
-                continue
+        with self.metrics.stage('fetch_rss'):
+            for feed_url in self.rss_feeds[:10]:
+                try:
+                    feed = fetch_feed(feed_url, self.metrics, max_entries=10, since=self.last_seen.get(feed_url))
+                    self.feed_cursors[feed_url] = feed_cursor(feed)
+                    for entry in feed.entries:
+                        title = entry.get('title', '')
+                        description = entry.get('description', '') or entry.get('summary', '')
+                        text = normalize_entry(title, description)
+                        with self.metrics.cpu_stage('scoring'):
+                            found_keywords = self.contains_negative_keywords(text)
+                            sentiment = self.analyze_sentiment(text) if found_keywords else 0.0
+                        self.metrics.record_entry(feed_url, bool(found_keywords))
+                        if found_keywords:
+                            if sentiment <= 0.4 or len(found_keywords) >= 2:
+                                rss_articles.append(ArticleRecord(
+                                    title=text.title,
+                                    link=entry.get('link', ''),
+                                    description=text.description,
+                                    published=entry.get('published', ''),
+                                    source=feed.feed.get('title', feed_url.split('//')[1].split('/')[0]),
+                                    sentiment_score=sentiment,
+                                    negative_keywords=','.join(found_keywords)
+                                ))
+                                self.metrics.record_match(feed_url)
+                except:
+                    continue
         print(f"Found {len(rss_articles)} negative articles from RSS feeds")
         
         # Fetch from NewsAPI if key provided
         newsapi_articles = []
         if newsapi_key:
-            newsapi_articles = self.fetch_news_from_newsapi(newsapi_key)
+            with self.metrics.stage('fetch_newsapi'):
+                newsapi_articles = self.fetch_news_from_newsapi(newsapi_key)
             print(f"Found {len(newsapi_articles)} negative articles from NewsAPI")
         
         # Combine all articles (skip slow LinkedIn and additional sources)
         all_articles = rss_articles + newsapi_articles
         
         # Remove duplicates based on URL
-        unique_articles = []
-        seen_urls = set()
-        for article in all_articles:
-            if article['link'] not in seen_urls and article['link']:
-                unique_articles.append(article)
-                seen_urls.add(article['link'])
+        with self.metrics.stage('dedup'):
+            unique_articles = []
+            seen_urls = set()
+            for article in all_articles:
+                if article.link not in seen_urls and article.link:
+                    unique_articles.append(article)
+                    seen_urls.add(article.link)
+        self.metrics.count('articles_unique', len(unique_articles))
         
         print(f"Total unique articles collected: {len(unique_articles)}")
         
         # Save to database
-        saved_count = self.save_articles(unique_articles)
+        with self.metrics.stage('db_write'):
+            saved_count = self.save_articles(unique_articles)
+            self.feed_state.update_last_seen(self.feed_cursors)
+        with self.metrics.stage('snapshot'):
+            self.refresh_snapshots()
+        with self.metrics.stage('notify'):
+            self.notify_watchlists()
+        self.metrics.count('rows_inserted', saved_count)
         print(f"Saved {saved_count} new articles to database")
         
-        return saved_count
+        summary = self.metrics.finish()
+        return (saved_count, summary) if with_metrics else saved_count
 
 if __name__ == "__main__":
+    enable_from_argv()
+    
     # Try enhanced collector first, fallback to standard
     try:
         from enhanced_collector import EnhancedNegativeNewsCollector
@@ -0,0 +1,358 @@
+"""
+News Schema
+Versioned migrations shared by every collector on top of the base
+negative_news table: indexed link, entity, story, watchlist and archive
+tables that turn the read paths into lookups instead of scans, and the
+ingest_version counter readers poll for changes. ArticleLinkWriter fills
+them for each batch of newly saved articles.
+"""
+
+import time
+import sqlite3
+import calendar
+import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from article_record import ingest_timestamp
+from news_archive import add_archive_id_range, create_archive_table, iter_archived
+from company_entities import create_company_tables, extract_companies
+from story_clusters import StoryClusterer, create_story_tables
+from watchlists import WatchlistMatcher, create_watchlist_tables
+
+SCHEMA_VERSION = 9
+
+# Crisis categories and the keywords that place an article in them
+KEYWORD_CATEGORIES = {
+    'bankruptcy': [
+        "bankruptcy", "bankrupt", "chapter 11", "chapter 7", "insolvency",
+        "filed for bankruptcy", "liquidation", "financial collapse", "receivership"
+    ],
+    'closures': [
+        "closure", "shutdown", "closing down", "going out of business",
+        "ceased operations", "wind down", "store closures", "closing stores",
+        "plant closure", "facility shutdown", "business closure", "shuttering"
+    ],
+    'layoffs': [
+        "layoffs", "mass layoffs", "cutting jobs", "firing", "downsizing",
+        "job cuts", "workforce reduction", "eliminating jobs", "staff reduction",
+        "redundancies", "pink slips", "employment cuts", "terminations", "RIF"
+    ],
+    'financial_distress': [
+        "losses", "failing", "collapse", "decline", "crisis", "struggling",
+        "financial troubles", "cash flow problems", "debt crisis", "revenue decline",
+        "profit decline", "financial distress", "funding crisis", "cost cutting"
+    ],
+    'corporate_issues': [
+        "restructuring", "reorganization", "asset sales", "divestiture",
+        "spin off", "breakup", "rightsizing", "cost reduction", "warn notice"
+    ],
+    'market_troubles': [
+        "shares fall", "stock drops", "market decline", "investor concerns",
+        "disappointing results", "missed earnings", "guidance cut", "outlook lowered",
+        "warning issued", "profit warning", "revenue warning"
+    ],
+    'legal_troubles': [
+        "investigation", "lawsuit", "legal troubles", "scandal", "fraud",
+        "misconduct", "penalty", "fine", "settlement", "violation"
+    ]
+}
+
+_CATEGORIES_BY_KEYWORD: Dict[str, List[str]] = {}
+for _category, _keywords in KEYWORD_CATEGORIES.items():
+    for _keyword in _keywords:
+        _CATEGORIES_BY_KEYWORD.setdefault(_keyword.lower(), []).append(_category)
+
+
+def split_keywords(value: str) -> List[str]:
+    """Distinct lower-cased keywords from a comma-joined negative_keywords value"""
+    if not value:
+        return []
+    return list(dict.fromkeys(k.strip().lower() for k in value.split(',') if k.strip()))
+
+
+def categories_for_keywords(keywords: Iterable[str]) -> List[str]:
+    """Crisis categories implied by a set of keyword hits"""
+    categories = []
+    for keyword in keywords:
+        for category in _CATEGORIES_BY_KEYWORD.get(keyword.lower(), ()):
+            if category not in categories:
+                categories.append(category)
+    return categories
+
+
+@lru_cache(maxsize=4096)
+def article_links(negative_keywords: str, keyword_category: str = None) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Keywords and categories to link an article to. Its own
+    ``keyword_category`` wins when the collector set one; otherwise the
+    categories are implied by its keywords. Keyword strings repeat heavily
+    across a run, so results are cached."""
+    keywords = split_keywords(negative_keywords)
+    categories = [c for c in split_keywords(keyword_category) if c != 'general']
+    return tuple(keywords), tuple(categories or categories_for_keywords(keywords))
+
+
+def migrate_database(conn: sqlite3.Connection):
+    """Bring a database with the base negative_news table up to ``SCHEMA_VERSION``.
+
+    Safe to run on every start; existing articles are backfilled the first
+    time each step runs.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    if version < 1:
+        _add_link_tables(conn)
+    if version < 2:
+        _add_published_at(conn)
+    if version < 3:
+        create_archive_table(conn)
+    if version < 4:
+        _add_stories(conn)
+    if version < 5:
+        _add_company_links(conn)
+    if version < 6:
+        create_watchlist_tables(conn)
+    if version < 7:
+        _add_ingest_version(conn)
+    if version < 8:
+        add_archive_id_range(conn)
+    if version < 9:
+        # Nothing filters on source_type, so its index only slowed every insert
+        conn.execute("DROP INDEX IF EXISTS idx_negative_news_source_type")
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
+
+
+def _add_link_tables(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(negative_news)")}
+    if 'source_type' not in columns:
+        conn.execute("ALTER TABLE negative_news ADD COLUMN source_type TEXT DEFAULT 'rss'")
+
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS article_keywords (
+        article_id INTEGER NOT NULL,
+        keyword TEXT NOT NULL,
+        PRIMARY KEY (article_id, keyword)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS article_categories (
+        article_id INTEGER NOT NULL,
+        category TEXT NOT NULL,
+        PRIMARY KEY (article_id, category)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_article_keywords_keyword ON article_keywords (keyword, article_id);
+    CREATE INDEX IF NOT EXISTS idx_article_categories_category ON article_categories (category, article_id);
+    CREATE TRIGGER IF NOT EXISTS negative_news_delete_links AFTER DELETE ON negative_news
+    BEGIN
+        DELETE FROM article_keywords WHERE article_id = OLD.id;
+        DELETE FROM article_categories WHERE article_id = OLD.id;
+    END;
+    ''')
+
+    rows = conn.execute('''
+    SELECT id, negative_keywords FROM negative_news
+    WHERE id NOT IN (SELECT article_id FROM article_keywords)
+    ''').fetchall()
+    keyword_rows, category_rows = [], []
+    for article_id, negative_keywords in rows:
+        keywords, categories = article_links(negative_keywords)
+        keyword_rows.extend((article_id, keyword) for keyword in keywords)
+        category_rows.extend((article_id, category) for category in categories)
+    _insert_links(conn, keyword_rows, category_rows)
+
+
+def _add_published_at(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(negative_news)")}
+    if 'published_at' not in columns:
+        conn.execute("ALTER TABLE negative_news ADD COLUMN published_at REAL")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_negative_news_published_at ON negative_news (published_at)")
+    # Time windows now read published_at, so the created_at index only slows writes
+    conn.execute("DROP INDEX IF EXISTS idx_negative_news_created_at")
+
+    # Existing rows fall back to when they were collected
+    rows = conn.execute("SELECT id, published, created_at FROM negative_news WHERE published_at IS NULL").fetchall()
+    updates = []
+    for article_id, published, created_at in rows:
+        collected_at = _sqlite_timestamp(created_at)
+        updates.append((ingest_timestamp(published, collected_at), article_id))
+    conn.executemany("UPDATE negative_news SET published_at = ? WHERE id = ?", updates)
+
+
+def _add_stories(conn: sqlite3.Connection):
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(negative_news)")}
+    if 'story_id' not in columns:
+        conn.execute("ALTER TABLE negative_news ADD COLUMN story_id INTEGER")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_negative_news_story_id ON negative_news (story_id)")
+    create_story_tables(conn)
+
+    # Cluster the hot table's existing articles, oldest first
+    rows = conn.execute('''
+    SELECT id, title, link, description, source, published_at FROM negative_news WHERE story_id IS NULL
+    ''').fetchall()
+    fields = ('title', 'link', 'description', 'source', 'published_at')
+    articles = [(row[0], dict(zip(fields, row[1:]))) for row in rows]
+    StoryClusterer().assign(conn.cursor(), articles)
+
+
+def _add_company_links(conn: sqlite3.Connection):
+    create_company_tables(conn)
+    # Archived articles keep their ids, so they are indexed too
+    rows = conn.execute("SELECT id, title, description, published_at FROM negative_news").fetchall()
+    articles = list(rows) + [(a['id'], a['title'], a['description'], a['published_at'])
+                             for a in iter_archived(conn, 0.0)]
+    company_rows = []
+    for article_id, title, description, published_at in articles:
+        company_rows.extend((company, published_at or 0.0, article_id)
+                            for company in extract_companies(title, description))
+    _insert_companies(conn, company_rows)
+
+
+def _add_ingest_version(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS ingest_version (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        articles INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO ingest_version (id, version, articles, updated_at) VALUES (1, 1, 0, ?)",
+                 (time.time(),))
+
+
+def bump_ingest_version(cursor, articles: int):
+    """Record that a save added ``articles`` new articles (inside its transaction)"""
+    cursor.execute('''
+    INSERT INTO ingest_version (id, version, articles, updated_at) VALUES (1, 1, ?, ?)
+    ON CONFLICT (id) DO UPDATE SET
+        version = version + 1, articles = articles + excluded.articles, updated_at = excluded.updated_at
+    ''', (articles, time.time()))
+
+
+def _sqlite_timestamp(value: str) -> float:
+    """UTC epoch of a CURRENT_TIMESTAMP value (now if missing or malformed)"""
+    try:
+        parsed = datetime.datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    except (TypeError, ValueError):
+        return datetime.datetime.now(datetime.timezone.utc).timestamp()
+    return float(calendar.timegm(parsed.timetuple()))
+
+
+class ArticleLinkWriter:
+    """Collects link and company rows for the articles one save inserts and writes them
+    in one batch, assigning the articles to stories when given a ``StoryClusterer`` and
+    queueing watchlist notifications when given a ``WatchlistMatcher``. Bumps the
+    ingest version when the batch added any articles."""
+
+    def __init__(self, stories: StoryClusterer = None, watchlists: WatchlistMatcher = None):
+        self.stories = stories
+        self.watchlists = watchlists
+        self.keyword_rows = []
+        self.category_rows = []
+        self.company_rows = []
+        self.articles = []
+        self.matches = []
+        self.added = 0
+
+    def add(self, article_id: int, article):
+        keywords, categories = article_links(article.negative_keywords, article.keyword_category)
+        companies = extract_companies(article.title, article.description)
+        self.added += 1
+        self.keyword_rows += [(article_id, keyword) for keyword in keywords]
+        self.category_rows += [(article_id, category) for category in categories]
+        if companies:
+            published_at = article.published_at or 0.0
+            self.company_rows += [(company, published_at, article_id) for company in companies]
+        if self.stories is not None:
+            self.articles.append((article_id, article))
+        if self.watchlists is not None:
+            self.matches.append((article_id, article, categories, companies))
+
+    def flush(self, cursor: sqlite3.Cursor):
+        _insert_links(cursor, self.keyword_rows, self.category_rows)
+        _insert_companies(cursor, self.company_rows)
+        if self.stories is not None:
+            self.stories.assign(cursor, self.articles)
+        if self.watchlists is not None:
+            self.watchlists.match(cursor, self.matches)
+        if self.added:
+            bump_ingest_version(cursor, self.added)
+        self.keyword_rows = []
+        self.category_rows = []
+        self.company_rows = []
+        self.articles = []
+        self.matches = []
+        self.added = 0
+
+
+ARTICLE_INSERT = '''
+INSERT OR IGNORE INTO negative_news
+(title, link, description, published, source, sentiment_score, negative_keywords, source_type, published_at)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def insert_articles(cursor: sqlite3.Cursor, articles: List, links: ArticleLinkWriter) -> int:
+    """Insert a batch of articles with one statement and pass the new ones (with
+    their ids) to ``links``; links already stored are ignored. Runs inside the
+    caller's transaction. Returns the number inserted.
+
+    The ids of the inserted rows are consecutive and end at the connection's
+    last insert id. A batch that fails for any reason other than a locked
+    database is rolled back and inserted one article at a time, skipping the
+    articles that fail.
+    """
+    if not articles:
+        return 0
+    conn = cursor.connection
+    if not conn.in_transaction:
+        cursor.execute("BEGIN")
+    cursor.execute("SAVEPOINT insert_articles")
+    try:
+        cursor.executemany(ARTICLE_INSERT, [article.as_row() for article in articles])
+        inserted = cursor.rowcount
+    except sqlite3.OperationalError:
+        raise
+    except Exception as e:
+        cursor.execute("ROLLBACK TO insert_articles")
+        cursor.execute("RELEASE insert_articles")
+        print(f"Error saving article batch ({e}); saving one at a time")
+        return _insert_articles_one_by_one(cursor, articles, links)
+    cursor.execute("RELEASE insert_articles")
+    if inserted <= 0:
+        return 0
+    last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+    by_link = {}
+    for article in articles:
+        by_link.setdefault(article.link, article)
+    for article_id, link in cursor.execute(
+        "SELECT id, link FROM negative_news WHERE id > ? AND id <= ? ORDER BY id", (last_id - inserted, last_id)
+    ).fetchall():
+        links.add(article_id, by_link[link])
+    return inserted
+
+
+def _insert_articles_one_by_one(cursor: sqlite3.Cursor, articles: List, links: ArticleLinkWriter) -> int:
+    inserted = 0
+    for article in articles:
+        try:
+            cursor.execute(ARTICLE_INSERT, article.as_row())
+        except sqlite3.OperationalError:
+            raise
+        except Exception as e:
+            print(f"Error saving article: {e}")
+            continue
+        if cursor.rowcount > 0:
+            links.add(cursor.lastrowid, article)
+            inserted += 1
+    return inserted
+
+
+def _insert_links(cursor, keyword_rows: List[Tuple], category_rows: List[Tuple]):
+    cursor.executemany("INSERT OR IGNORE INTO article_keywords (article_id, keyword) VALUES (?, ?)", keyword_rows)
+    cursor.executemany("INSERT OR IGNORE INTO article_categories (article_id, category) VALUES (?, ?)", category_rows)
+
+
+def _insert_companies(cursor, company_rows: List[Tuple]):
+    cursor.executemany(
+        "INSERT OR IGNORE INTO article_companies (company, published_at, article_id) VALUES (?, ?, ?)", company_rows
+    )
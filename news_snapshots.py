@@ -0,0 +1,225 @@
+"""
+News Snapshots
+Per-day Arrow IPC snapshots of every stored article (hot table and archive),
+kept next to the database for the dashboard and offline analysis. The writer
+refreshes only the days that gained articles since its last run; the loader
+memory-maps the uncompressed files so pandas columns are backed by the mapped
+buffers instead of rows copied out of SQLite.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from news_archive import archive_day, iter_archived_day
+from news_store import NewsReader
+
+SNAPSHOTS_ENABLED = os.getenv("NEWS_SNAPSHOTS", "1") != "0"
+MANIFEST_NAME = "manifest.json"
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ('id', pa.int64()),
+    ('title', pa.string()),
+    ('link', pa.string()),
+    ('description', pa.string()),
+    ('published', pa.string()),
+    ('source', pa.string()),
+    ('sentiment_score', pa.float64()),
+    ('negative_keywords', pa.string()),
+    ('created_at', pa.string()),
+    ('published_at', pa.float64()),
+    ('source_type', pa.string()),
+    ('story_id', pa.int64()),
+])
+# Bumped whenever SNAPSHOT_SCHEMA changes; older snapshot sets are rebuilt
+SNAPSHOT_VERSION = 2
+
+
+def default_snapshot_dir(db_path: str) -> str:
+    """``NEWS_SNAPSHOT_DIR``, or a ``snapshots/`` directory next to the database"""
+    return os.getenv("NEWS_SNAPSHOT_DIR") or os.path.join(os.path.dirname(os.path.abspath(db_path)), "snapshots")
+
+
+def snapshot_path(snapshot_dir: str, day: str) -> str:
+    return os.path.join(snapshot_dir, f"articles-{day}.arrow")
+
+
+def _day_bounds(day: str):
+    start = datetime.datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc).timestamp()
+    return start, start + 86400
+
+
+class SnapshotStore:
+    """Write and incrementally refresh the per-day snapshot files for one database"""
+
+    def __init__(self, db_path: str, snapshot_dir: str = None):
+        self.db_path = db_path
+        self.snapshot_dir = snapshot_dir or default_snapshot_dir(db_path)
+
+    def load_manifest(self) -> Dict:
+        try:
+            with open(os.path.join(self.snapshot_dir, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'last_article_id': 0, 'days': {}}
+
+    def save_manifest(self, manifest: Dict):
+        path = os.path.join(self.snapshot_dir, MANIFEST_NAME)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def refresh(self) -> List[str]:
+        """Rewrite the snapshot of every day that gained articles since the last refresh.
+
+        Articles are found by id above the manifest's high-water mark, so a
+        refresh that was skipped or failed is caught up by the next one.
+        Returns the days rewritten.
+        """
+        if not SNAPSHOTS_ENABLED:
+            return []
+        manifest = self.load_manifest()
+        if not manifest['days'] or manifest.get('version') != SNAPSHOT_VERSION:
+            # First snapshot of this database (or an older layout): include archived days too
+            return self.rebuild()
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                "SELECT id, published_at FROM negative_news WHERE id > ?", (manifest['last_article_id'],)
+            ).fetchall()
+            if not rows:
+                return []
+            days = sorted({archive_day(published_at) for _, published_at in rows})
+            for day in days:
+                manifest['days'][day] = self.write_day(conn, day)
+        finally:
+            conn.close()
+        manifest['last_article_id'] = max(manifest['last_article_id'], max(article_id for article_id, _ in rows))
+        manifest['updated_at'] = time.time()
+        self.save_manifest(manifest)
+        print(f"🧊 Refreshed {len(days)} daily snapshot(s)")
+        return days
+
+    def is_current(self) -> bool:
+        """True when the snapshots include the newest article in the database"""
+        manifest = self.load_manifest()
+        if not manifest['days'] or manifest.get('version') != SNAPSHOT_VERSION:
+            return False
+        try:
+            conn = NewsReader(self.db_path).connect()
+            try:
+                newest = conn.execute("SELECT MAX(id) FROM negative_news").fetchone()[0] or 0
+            finally:
+                conn.close()
+        except sqlite3.OperationalError:
+            return False
+        return newest <= manifest['last_article_id']
+
+    def rebuild(self) -> List[str]:
+        """Rewrite every day's snapshot from scratch"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            days = {archive_day(row[0]) for row in conn.execute("SELECT published_at FROM negative_news")}
+            try:
+                days.update(row[0] for row in conn.execute("SELECT DISTINCT day FROM news_archive"))
+            except sqlite3.OperationalError:
+                pass
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM negative_news").fetchone()[0]
+            manifest = {'version': SNAPSHOT_VERSION, 'last_article_id': last_id, 'days': {}}
+            for day in sorted(days):
+                manifest['days'][day] = self.write_day(conn, day)
+        finally:
+            conn.close()
+        manifest['updated_at'] = time.time()
+        self.save_manifest(manifest)
+        print(f"🧊 Rebuilt {len(days)} daily snapshot(s)")
+        return sorted(days)
+
+    def write_day(self, conn: sqlite3.Connection, day: str) -> int:
+        """Atomically replace one day's snapshot; returns its row count"""
+        start, end = _day_bounds(day)
+        columns = SNAPSHOT_SCHEMA.names
+        rows = conn.execute(f'''
+        SELECT {', '.join(columns)} FROM negative_news
+        WHERE published_at >= ? AND published_at < ?
+        ''', (start, end)).fetchall()
+        articles = [dict(zip(columns, row)) for row in rows]
+        # Hot rows win over archived copies of a re-collected link
+        seen = {article['link'] for article in articles}
+        for article in iter_archived_day(conn, day):
+            if article['link'] not in seen:
+                seen.add(article['link'])
+                articles.append(article)
+        articles.sort(key=lambda article: article['published_at'] or 0.0, reverse=True)
+
+        table = pa.Table.from_pydict(
+            {name: [article.get(name) for article in articles] for name in columns}, schema=SNAPSHOT_SCHEMA
+        )
+        path = snapshot_path(self.snapshot_dir, day)
+        with pa.OSFile(path + ".tmp", 'wb') as sink:
+            with pa.ipc.new_file(sink, SNAPSHOT_SCHEMA) as writer:
+                writer.write_table(table)
+        os.replace(path + ".tmp", path)
+        return len(articles)
+
+
+def load_snapshots(db_path: str = None, days: float = None, snapshot_dir: str = None,
+                   columns: List[str] = None, arrow_dtypes: bool = True) -> Optional[pd.DataFrame]:
+    """Memory-map the daily snapshots into one DataFrame, newest first.
+
+    ``days`` limits the result to articles published within that many days.
+    With ``arrow_dtypes`` the columns stay Arrow-backed (no copy out of the
+    mapped files); pass False for plain NumPy/object columns. Returns None
+    when no snapshot has been written yet.
+    """
+    snapshot_dir = snapshot_dir or default_snapshot_dir(db_path or "news_data.db")
+    manifest = SnapshotStore(db_path or "", snapshot_dir).load_manifest()
+    manifest_days = manifest['days']
+    if not manifest_days or manifest.get('version') != SNAPSHOT_VERSION:
+        return None
+
+    since = time.time() - float(days) * 86400 if days is not None else None
+    first_day = archive_day(since) if since is not None else None
+    tables = []
+    for day in sorted(manifest_days, reverse=True):
+        if first_day is not None and day < first_day:
+            break
+        path = snapshot_path(snapshot_dir, day)
+        if not os.path.exists(path):
+            continue
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        if day == first_day:
+            # Only the oldest day straddles the window edge
+            table = table.filter(pc.greater_equal(table.column('published_at'), since))
+        if columns:
+            table = table.select(columns)
+        tables.append(table)
+
+    schema = SNAPSHOT_SCHEMA if not columns else pa.schema([SNAPSHOT_SCHEMA.field(c) for c in columns])
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+    if arrow_dtypes:
+        return table.to_pandas(types_mapper=pd.ArrowDtype)
+    return table.to_pandas()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh or rebuild the daily article snapshots")
+    parser.add_argument("--db", default=os.getenv("NEWS_DB_PATH", "news_data.db"))
+    parser.add_argument("--snapshot-dir")
+    parser.add_argument("--rebuild", action="store_true", help="rewrite every day instead of only new ones")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.db, args.snapshot_dir)
+    written = store.rebuild() if args.rebuild else store.refresh()
+    print(f"Wrote {len(written)} snapshot(s) to {store.snapshot_dir}")
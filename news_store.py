@@ -0,0 +1,426 @@
+"""
+News Store
+Read-only access to collected articles for the dashboard and other readers.
+Windows reaching past the hot table are transparently unioned with the
+compressed archive. Reads go to the writer's published read-only snapshot
+when it is current, so they never contend with ingestion. Free of
+feed-parsing and NLP imports so read paths start fast.
+"""
+
+import os
+import time
+import sqlite3
+from typing import List, Dict, Optional, Set
+from news_archive import archived_by_id, iter_archived
+from read_snapshot import current_read_snapshot
+from watchlists import load_watchlists
+
+DEFAULT_DB_PATH = os.getenv("NEWS_DB_PATH", "news_data.db")
+
+# Databases no collector has migrated yet lack published_at; use collection time
+LEGACY_PUBLISHED_AT = "CAST(strftime('%s', created_at) AS REAL)"
+
+ARTICLE_FIELDS = ('title', 'link', 'description', 'published', 'source', 'sentiment_score', 'negative_keywords',
+                  'created_at', 'id', 'published_at', 'story_id')
+
+
+def window_start(days) -> float:
+    """UTC epoch ``days`` before now"""
+    return time.time() - float(days) * 86400
+
+
+class NewsReader:
+    """Query stored articles without creating or migrating the schema"""
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+
+    def connect(self) -> sqlite3.Connection:
+        """Open the published snapshot immutable if it is current, else the
+        live database read-only (never creates the file)"""
+        snapshot = current_read_snapshot(self.db_path)
+        if snapshot:
+            # The writer swaps in a new file rather than changing this one
+            uri = f"file:{os.path.abspath(snapshot)}?mode=ro&immutable=1"
+        else:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        return sqlite3.connect(uri, uri=True)
+
+    def _published_at(self, conn: sqlite3.Connection, table: str = '') -> str:
+        """SQL expression for an article's UTC publish epoch"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(negative_news)")}
+        if 'published_at' in columns:
+            return f"{table}published_at"
+        return LEGACY_PUBLISHED_AT.replace('created_at', f'{table}created_at')
+
+    def _story_id(self, conn: sqlite3.Connection) -> str:
+        """SQL expression for an article's story id (NULL before stories were added)"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(negative_news)")}
+        return 'story_id' if 'story_id' in columns else 'NULL'
+
+    def ingest_version(self) -> Dict:
+        """``{'version', 'articles', 'updated_at'}`` of the data readers currently see.
+        ``version`` changes whenever a save adds articles; ``articles`` counts every
+        article ever added. One indexed row, cheap enough to poll."""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return {'version': 0, 'articles': 0, 'updated_at': None}
+        try:
+            row = conn.execute("SELECT version, articles, updated_at FROM ingest_version WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            # Database predates the counter
+            row = None
+        finally:
+            conn.close()
+        if not row:
+            return {'version': 0, 'articles': 0, 'updated_at': None}
+        return {'version': row[0], 'articles': row[1], 'updated_at': row[2]}
+
+    def get_recent_news(self, days=7) -> List[Dict]:
+        """Get recent negative news from the hot table and archive, sorted by newest first"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return []
+
+        since = window_start(days)
+        try:
+            published_at = self._published_at(conn)
+            cursor = conn.cursor()
+            cursor.execute(f'''
+            SELECT title, link, description, published, source, sentiment_score, negative_keywords, created_at, id,
+                   {published_at}, {self._story_id(conn)}
+            FROM negative_news
+            WHERE {published_at} >= ?
+            ORDER BY {published_at} DESC
+            ''', (since,))
+            rows = cursor.fetchall()
+            archived = list(iter_archived(conn, since))
+        except sqlite3.OperationalError:
+            # No collection has created the table yet
+            return []
+        finally:
+            conn.close()
+
+        articles = [dict(zip(ARTICLE_FIELDS, row)) for row in rows]
+        if archived:
+            # A link re-collected after it was archived keeps its hot copy
+            seen = {article['link'] for article in articles}
+            for article in archived:
+                if article['link'] not in seen:
+                    seen.add(article['link'])
+                    articles.append({field: article.get(field) for field in ARTICLE_FIELDS})
+            articles.sort(key=lambda article: article['published_at'], reverse=True)
+
+        return articles
+
+    def has_articles(self, days=30) -> bool:
+        """Cheap emptiness check used before deciding on an initial collection"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return False
+        try:
+            since = window_start(days)
+            row = conn.execute(
+                f"SELECT 1 FROM negative_news WHERE {self._published_at(conn)} >= ? LIMIT 1",
+                (since,)
+            ).fetchone()
+            return row is not None or next(iter_archived(conn, since), None) is not None
+        except sqlite3.OperationalError:
+            return False
+        finally:
+            conn.close()
+
+    def _matching_keywords(self, conn: sqlite3.Connection, crisis_types: List[str]) -> Dict[str, List[str]]:
+        """Stored keywords containing each crisis type (e.g. 'layoffs' -> 'mass layoffs')"""
+        vocabulary = [row[0] for row in conn.execute("SELECT DISTINCT keyword FROM article_keywords")]
+        return {
+            crisis_type: [k for k in vocabulary if crisis_type.lower() in k]
+            for crisis_type in crisis_types
+        }
+
+    def article_ids_for_crisis_types(self, crisis_types: List[str], days=7) -> Optional[Set[int]]:
+        """Ids of recent articles with a keyword matching any crisis type, via the
+        keyword index (archived articles are matched on their stored keywords).
+        ``None`` if the database predates the link tables."""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return set()
+        try:
+            since = window_start(days)
+            ids = set()
+            keywords = sorted({k for ks in self._matching_keywords(conn, crisis_types).values() for k in ks})
+            if keywords:
+                placeholders = ','.join('?' * len(keywords))
+                rows = conn.execute(f'''
+                SELECT DISTINCT ak.article_id
+                FROM article_keywords ak JOIN negative_news n ON n.id = ak.article_id
+                WHERE ak.keyword IN ({placeholders}) AND {self._published_at(conn, 'n.')} >= ?
+                ''', (*keywords, since)).fetchall()
+                ids.update(row[0] for row in rows)
+            terms = [crisis_type.lower() for crisis_type in crisis_types]
+            for article in iter_archived(conn, since):
+                article_keywords = (article['negative_keywords'] or '').lower().split(',')
+                if any(term in keyword for keyword in article_keywords for term in terms):
+                    ids.add(article['id'])
+            return ids
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.close()
+
+    def category_counts(self, days=7) -> Dict[str, int]:
+        """Recent article count per crisis category, via the category index plus
+        the categories stored with archived articles"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return {}
+        try:
+            since = window_start(days)
+            counts = dict(conn.execute(f'''
+            SELECT ac.category, COUNT(*)
+            FROM article_categories ac JOIN negative_news n ON n.id = ac.article_id
+            WHERE {self._published_at(conn, 'n.')} >= ?
+            GROUP BY ac.category
+            ''', (since,)).fetchall())
+            for article in iter_archived(conn, since):
+                for category in article['categories']:
+                    counts[category] = counts.get(category, 0) + 1
+            return dict(sorted(counts.items(), key=lambda item: -item[1]))
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            conn.close()
+
+    def get_stories(self, days=7, limit: int = None) -> List[Dict]:
+        """Stories with articles published in the window, most recently updated first,
+        with their article and source counts and sources"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return []
+        try:
+            rows = conn.execute(f'''
+            SELECT id, title, link, first_published_at, last_published_at, article_count, source_count
+            FROM stories
+            WHERE last_published_at >= ?
+            ORDER BY last_published_at DESC
+            {'LIMIT ' + str(int(limit)) if limit else ''}
+            ''', (window_start(days),)).fetchall()
+            fields = ('id', 'title', 'link', 'first_published_at', 'last_published_at', 'article_count',
+                      'source_count')
+            stories = [dict(zip(fields, row)) for row in rows]
+            by_id = {story['id']: story for story in stories}
+            for story in stories:
+                story['sources'] = []
+            ids = list(by_id)
+            for start in range(0, len(ids), 500):
+                batch = ids[start:start + 500]
+                placeholders = ','.join('?' * len(batch))
+                for story_id, source in conn.execute(
+                    f"SELECT story_id, source FROM story_sources WHERE story_id IN ({placeholders})", batch
+                ):
+                    by_id[story_id]['sources'].append(source)
+            return stories
+        except sqlite3.OperationalError:
+            # Database predates story clustering
+            return []
+        finally:
+            conn.close()
+
+    def company_counts(self, days=7, limit: int = None) -> Dict[str, int]:
+        """Article count per company named in the window, most mentioned first, via the
+        company index (which covers archived articles too)"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return {}
+        try:
+            # Grouping by company would otherwise pick a full primary-key scan
+            rows = conn.execute(f'''
+            SELECT company, COUNT(*) AS articles
+            FROM article_companies INDEXED BY idx_article_companies_published_at
+            WHERE published_at >= ?
+            GROUP BY company
+            ORDER BY articles DESC, company
+            {'LIMIT ' + str(int(limit)) if limit else ''}
+            ''', (window_start(days),)).fetchall()
+            return dict(rows)
+        except sqlite3.OperationalError:
+            # Database predates company extraction
+            return {}
+        finally:
+            conn.close()
+
+    def article_ids_for_company(self, company: str, days=7) -> Optional[Set[int]]:
+        """Ids of articles in the window that name ``company``, as one range scan of
+        the company index. ``None`` if the database predates company extraction."""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return set()
+        try:
+            rows = conn.execute(
+                "SELECT article_id FROM article_companies WHERE company = ? AND published_at >= ?",
+                (company, window_start(days))
+            ).fetchall()
+            return {row[0] for row in rows}
+        except sqlite3.OperationalError:
+            return None
+        finally:
+            conn.close()
+
+    def company_timeline(self, company: str, days=30) -> Dict[str, int]:
+        """Articles naming ``company`` per UTC publish day, oldest first"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return {}
+        try:
+            rows = conn.execute('''
+            SELECT date(published_at, 'unixepoch') AS day, COUNT(*)
+            FROM article_companies
+            WHERE company = ? AND published_at >= ?
+            GROUP BY day
+            ORDER BY day
+            ''', (company, window_start(days))).fetchall()
+            return dict(rows)
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            conn.close()
+
+    def get_watchlists(self) -> List[Dict]:
+        """Enabled watchlists, read from the live database so edits show at once"""
+        try:
+            conn = sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        except sqlite3.OperationalError:
+            return []
+        try:
+            return [watchlist.as_dict() for watchlist in load_watchlists(conn)]
+        finally:
+            conn.close()
+
+    def article_ids_for_watchlist(self, watchlist_id: int) -> Set[int]:
+        """Ids of the articles a watchlist matched at ingest, from the notification outbox"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return set()
+        try:
+            rows = conn.execute(
+                "SELECT article_id FROM notification_outbox WHERE watchlist_id = ?", (watchlist_id,)
+            ).fetchall()
+            return {row[0] for row in rows}
+        except sqlite3.OperationalError:
+            return set()
+        finally:
+            conn.close()
+
+    def get_articles_page(self, days=7, limit: int = 50, before_id: int = None, query: str = None) -> List[Dict]:
+        """Up to ``limit`` articles published in the window, newest id first, from the
+        hot table and archive. Keyset pagination: pass the last id of the previous
+        page as ``before_id``. ``query`` keeps articles whose title or description
+        contains it (case-insensitive)."""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return []
+
+        since = window_start(days)
+        needle = query.lower() if query else None
+        try:
+            published_at = self._published_at(conn)
+            conditions = [f"{published_at} >= ?"]
+            params = [since]
+            if before_id is not None:
+                conditions.append("id < ?")
+                params.append(before_id)
+            if needle:
+                pattern = '%' + needle.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                conditions.append("(title LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+                params.extend([pattern, pattern])
+            where = ' AND '.join(conditions)
+            rows = conn.execute(f'''
+            SELECT title, link, description, published, source, sentiment_score, negative_keywords, created_at, id,
+                   {published_at}, {self._story_id(conn)}
+            FROM negative_news
+            WHERE {where}
+            ORDER BY id DESC
+            LIMIT ?
+            ''', (*params, limit)).fetchall()
+            # A link re-collected after it was archived keeps its hot copy
+            seen = {row[1] for row in rows}
+            archived = archived_by_id(
+                conn, limit, before_id=before_id, since=since,
+                keep=lambda article: article['link'] not in seen and
+                (not needle or needle in f"{article['title'] or ''}\n{article['description'] or ''}".lower())
+            )
+        except sqlite3.OperationalError:
+            return []
+        finally:
+            conn.close()
+
+        articles = [dict(zip(ARTICLE_FIELDS, row)) for row in rows]
+        if archived:
+            articles.extend({field: article.get(field) for field in ARTICLE_FIELDS} for article in archived)
+            articles.sort(key=lambda article: article['id'], reverse=True)
+        return articles[:limit]
+
+    def get_articles_since(self, after_id: int, limit: int = 100) -> List[Dict]:
+        """Up to ``limit`` articles with ids above ``after_id``, oldest first: the
+        delta a consumer polling with the last id it saw has not seen yet"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return []
+        try:
+            rows = conn.execute(f'''
+            SELECT title, link, description, published, source, sentiment_score, negative_keywords, created_at, id,
+                   {self._published_at(conn)}, {self._story_id(conn)}
+            FROM negative_news
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+            ''', (after_id, limit)).fetchall()
+            oldest_hot = conn.execute("SELECT MIN(id) FROM negative_news").fetchone()[0]
+            # Only a consumer that fell behind past archiving needs the archive
+            archived = []
+            if oldest_hot is None or after_id < oldest_hot - 1:
+                archived = archived_by_id(conn, limit, after_id=after_id)
+        except sqlite3.OperationalError:
+            return []
+        finally:
+            conn.close()
+
+        articles = [dict(zip(ARTICLE_FIELDS, row)) for row in rows]
+        if archived:
+            articles.extend({field: article.get(field) for field in ARTICLE_FIELDS} for article in archived)
+            articles.sort(key=lambda article: article['id'])
+        return articles[:limit]
+
+    def source_counts(self, days=7) -> Dict[str, int]:
+        """Recent article count per source, most articles first, from the hot table
+        (via the published_at index) and the archive"""
+        try:
+            conn = self.connect()
+        except sqlite3.OperationalError:
+            return {}
+        try:
+            since = window_start(days)
+            counts = dict(conn.execute(f'''
+            SELECT source, COUNT(*) FROM negative_news
+            WHERE {self._published_at(conn)} >= ?
+            GROUP BY source
+            ''', (since,)).fetchall())
+            for article in iter_archived(conn, since):
+                counts[article['source']] = counts.get(article['source'], 0) + 1
+            return dict(sorted(counts.items(), key=lambda item: -item[1]))
+        except sqlite3.OperationalError:
+            return {}
+        finally:
+            conn.close()
@@ -0,0 +1,102 @@
+"""
+Read Snapshot
+A read-only copy of the news database that the writer republishes after each
+collection. The copy is taken with SQLite's online backup API into a temporary
+file, analyzed, synced and swapped into place with os.replace, so readers see
+either the previous snapshot or the new one, never a partial write. Readers
+open it with immutable=1: no locks, no journal checks, and no contention with
+ingestion on the live database.
+"""
+
+import os
+import sqlite3
+from typing import Optional
+
+READ_SNAPSHOT_ENABLED = os.getenv("NEWS_READ_SNAPSHOT", "1") != "0"
+
+
+def read_snapshot_path(db_path: str) -> str:
+    """``NEWS_READ_DB_PATH``, or ``<name>.read.db`` next to the live database"""
+    override = os.getenv("NEWS_READ_DB_PATH")
+    if override:
+        return override
+    root, ext = os.path.splitext(db_path)
+    return f"{root}.read{ext or '.db'}"
+
+
+def _ingest_version(uri: str) -> Optional[int]:
+    """The database's ingest version, or None if it predates the counter"""
+    conn = sqlite3.connect(uri, uri=True)
+    try:
+        row = conn.execute("SELECT version FROM ingest_version WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+# (snapshot mtime, live mtime) -> whether the snapshot was current at those mtimes
+_currency = {}
+
+
+def current_read_snapshot(db_path: str) -> Optional[str]:
+    """Path of a published snapshot holding the same articles as the live database, if any.
+
+    Compares the ingest version stored in both files, so bookkeeping the live
+    database gets after a publish (lease renewals, run records, notification
+    delivery) doesn't retire the snapshot. The answer is reused until either
+    file changes; databases without a version fall back to modification times.
+    """
+    path = read_snapshot_path(db_path)
+    try:
+        published = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    try:
+        live = os.stat(db_path).st_mtime_ns
+    except OSError:
+        return path
+    key = (os.path.abspath(path), published, live)
+    current = _currency.get(key)
+    if current is None:
+        try:
+            snapshot_version = _ingest_version(f"file:{os.path.abspath(path)}?mode=ro&immutable=1")
+            live_version = _ingest_version(f"file:{os.path.abspath(db_path)}?mode=ro")
+        except sqlite3.Error:
+            snapshot_version = live_version = None
+        if snapshot_version is None or live_version is None:
+            current = published >= live
+        else:
+            current = snapshot_version == live_version
+        _currency.clear()
+        _currency[key] = current
+    return path if current else None
+
+
+def publish_read_snapshot(db_path: str, target: str = None) -> Optional[str]:
+    """Copy the live database to a fresh read-only snapshot and atomically swap it in"""
+    if not READ_SNAPSHOT_ENABLED:
+        return None
+    target = target or read_snapshot_path(db_path)
+    tmp_path = f"{target}.tmp-{os.getpid()}"
+    source = sqlite3.connect(db_path)
+    copy = sqlite3.connect(tmp_path)
+    try:
+        source.backup(copy)
+        # Rollback journal and fresh planner statistics for query-only use
+        copy.execute("PRAGMA journal_mode=DELETE")
+        copy.execute("ANALYZE")
+        copy.commit()
+    except Exception:
+        copy.close()
+        os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+    copy.close()
+
+    with open(tmp_path, 'rb') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)
+    return target
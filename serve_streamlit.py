@@ -1,4 +1,5 @@
 import shlex
+import shutil
 import subprocess
 from pathlib import Path
 import modal
@@ -8,21 +9,47 @@ import os
 image = (
     modal.Image.debian_slim(python_version="3.11")
     .pip_install(
-        "streamlit==1.35.0",
+        "streamlit==1.37.0",
         "feedparser==6.0.11", 
         "requests==2.31.0",
         "nltk==3.8.1",
         "textblob==0.17.1",
         "pandas==2.0.3",
         "plotly==5.15.0",
-        "python-dotenv==1.0.0"
+        "python-dotenv==1.0.0",
+        "pyarrow==14.0.2",
+        "scipy==1.11.4"
     )
+    # Corpora are baked into the image so no container downloads them at start
+    .env({"NLTK_DATA": "/usr/local/share/nltk_data", "NEWS_DB_PATH": "/data/news_data.db"})
     .run_commands(
-        "python -c 'import nltk; nltk.download(\"punkt\"); nltk.download(\"vader_lexicon\")'",
+        "python -c 'import nltk; nltk.download(\"punkt\", download_dir=\"/usr/local/share/nltk_data\"); nltk.download(\"vader_lexicon\", download_dir=\"/usr/local/share/nltk_data\")'",
         "python -m textblob.download_corpora"
     )
     .add_local_file("app.py", "/root/app.py")
+    .add_local_file("news_store.py", "/root/news_store.py")
+    .add_local_file("news_archive.py", "/root/news_archive.py")
+    .add_local_file("news_snapshots.py", "/root/news_snapshots.py")
+    .add_local_file("read_snapshot.py", "/root/read_snapshot.py")
     .add_local_file("news_collector.py", "/root/news_collector.py")
+    .add_local_file("feed_fetcher.py", "/root/feed_fetcher.py")
+    .add_local_file("feed_state.py", "/root/feed_state.py")
+    .add_local_file("article_record.py", "/root/article_record.py")
+    .add_local_file("news_schema.py", "/root/news_schema.py")
+    .add_local_file("text_normalizer.py", "/root/text_normalizer.py")
+    .add_local_file("collector_metrics.py", "/root/collector_metrics.py")
+    .add_local_file("collection_profiler.py", "/root/collection_profiler.py")
+    .add_local_file("enhanced_collector.py", "/root/enhanced_collector.py")
+    .add_local_file("comprehensive_news_sources.py", "/root/comprehensive_news_sources.py")
+    .add_local_file("local_news_sources.py", "/root/local_news_sources.py")
+    .add_local_file("sharded_collection.py", "/root/sharded_collection.py")
+    .add_local_file("ingest_daemon.py", "/root/ingest_daemon.py")
+    .add_local_file("collection_lease.py", "/root/collection_lease.py")
+    .add_local_file("collection_checkpoint.py", "/root/collection_checkpoint.py")
+    .add_local_file("story_clusters.py", "/root/story_clusters.py")
+    .add_local_file("company_entities.py", "/root/company_entities.py")
+    .add_local_file("watchlists.py", "/root/watchlists.py")
+    .add_local_file("news_api.py", "/root/news_api.py")
 )
 
 app = modal.App(name="negative-business-news", image=image)
@@ -30,32 +57,182 @@ app = modal.App(name="negative-business-news", image=image)
 # Create volume for persistent data storage
 volume = modal.Volume.from_name("news-data", create_if_missing=True)
 
-# Scheduled news update function
+# The volume keeps whichever container committed a file last, so only the
+# ingest daemon writes news_data.db; other containers queue writes for it here
+WRITE_QUEUE_NAME = "news-writes"
+write_queue = modal.Queue.from_name(WRITE_QUEUE_NAME, create_if_missing=True)
+# Write requests taken from the queue per daemon poll
+WRITE_BATCH = 100
+
+def take_write_requests():
+    """Requests waiting on the write queue, without blocking"""
+    return write_queue.get_many(WRITE_BATCH, block=False)
+
+# The web and API containers serve local copies of the daemon's published
+# files and refresh them this often. Nothing they read stays open on the
+# volume, so a reload never finds a file in use
+VOLUME_RELOAD_SECONDS = float(os.getenv("NEWS_VOLUME_RELOAD_SECONDS", "30"))
+LOCAL_DATA_DIR = "/tmp/news"
+LOCAL_DB_PATH = os.path.join(LOCAL_DATA_DIR, "news_data.db")
+
+def copy_if_changed(source: str, target: str, copied: dict):
+    """Swap in a fresh copy of ``source``; open readers keep the file they had"""
+    stat = os.stat(source)
+    key = (stat.st_size, stat.st_mtime_ns)
+    if copied.get(target) == key and os.path.exists(target):
+        return
+    shutil.copyfile(source, target + ".tmp")
+    os.replace(target + ".tmp", target)
+    copied[target] = key
+
+def sync_read_copy(copied: dict):
+    """Reload the volume, then copy the read snapshot and Arrow snapshots that changed"""
+    import sys
+    sys.path.append('/root')
+    
+    from read_snapshot import read_snapshot_path
+    from news_snapshots import MANIFEST_NAME
+    
+    volume.reload()
+    os.makedirs(os.path.join(LOCAL_DATA_DIR, "snapshots"), exist_ok=True)
+    source = read_snapshot_path("/data/news_data.db")
+    if not os.path.exists(source):
+        # Nothing published yet (the daemon's first checkpoint is still to come)
+        source = "/data/news_data.db"
+    if os.path.exists(source):
+        copy_if_changed(source, LOCAL_DB_PATH, copied)
+    
+    if os.path.isdir("/data/snapshots"):
+        names = sorted(name for name in os.listdir("/data/snapshots") if name.endswith(".arrow"))
+        # The manifest goes last so it never names a day file not yet copied
+        if os.path.exists(os.path.join("/data/snapshots", MANIFEST_NAME)):
+            names.append(MANIFEST_NAME)
+        for name in names:
+            copy_if_changed(os.path.join("/data/snapshots", name), os.path.join(LOCAL_DATA_DIR, "snapshots", name), copied)
+
+def keep_read_copy_fresh():
+    """Sync the local copy now, then keep syncing it in the background"""
+    import threading
+    import time
+    
+    copied = {}
+    try:
+        sync_read_copy(copied)
+    except Exception as e:
+        print(f"Initial sync of the read copy failed: {e}")
+    
+    def sync_loop():
+        while True:
+            time.sleep(VOLUME_RELOAD_SECONDS)
+            try:
+                sync_read_copy(copied)
+            except Exception as e:
+                print(f"Read copy sync skipped: {e}")
+    
+    threading.Thread(target=sync_loop, name="read-copy-sync", daemon=True).start()
+
+# Continuous ingestion; exits before Modal's 24h limit and the watchdog restarts it
+@app.function(volumes={"/data": volume}, timeout=24 * 3600)
+def run_ingest_daemon(workers: int = 4):
+    """Poll every feed on its own schedule and commit new articles as they arrive"""
+    import sys
+    sys.path.append('/root')
+    
+    from ingest_daemon import IngestDaemon
+    
+    # Every checkpoint commits the volume so other containers see the new articles
+    # and the writes (watchlists, manual updates) they queued
+    daemon = IngestDaemon("/data/news_data.db", workers=workers, on_checkpoint=volume.commit,
+                          requests=take_write_requests,
+                          handlers={'update_news_sharded': update_news_sharded_request})
+    saved_count = daemon.run(duration=23.5 * 3600)
+    volume.commit()
+    
+    return saved_count
+
+# Watchdog: the cron no longer collects, it only restarts a dead daemon
 @app.function(
     volumes={"/data": volume},
-    schedule=modal.Cron("0 */12 * * *")  # Every 12 hours
+    schedule=modal.Cron("*/15 * * * *")  # Every 15 minutes
 )
-def update_news_scheduled():
-    """Scheduled function to update news every 12 hours"""
+def ingest_watchdog():
+    """Start the ingest daemon unless one has checkpointed recently"""
     import sys
     sys.path.append('/root')
     
-    from news_collector import NegativeNewsCollector
-    import os
+    from ingest_daemon import daemon_is_alive, daemon_status
     
-    # Use persistent volume for database
-    collector = NegativeNewsCollector("/data/news_data.db")
+    volume.reload()
+    if daemon_is_alive("/data/news_data.db"):
+        status = daemon_status("/data/news_data.db")
+        print(f"Ingest daemon alive on {status['host']}: {status['polls']} polls, {status['articles_saved']} articles saved")
+        return False
     
-    # Get NewsAPI key from environment if available
-    newsapi_key = os.environ.get('NEWSAPI_KEY')
+    print("Ingest daemon not running, starting it...")
+    run_ingest_daemon.spawn()
+    return True
+
+# One shard of a sharded comprehensive collection
+@app.function(volumes={"/data": volume}, timeout=900)
+def collect_news_shard(shard: int, shards: int, run_id: str):
+    """Fetch one shard's feeds; returns its batch file for the daemon to merge"""
+    import sys
+    import tempfile
+    sys.path.append('/root')
     
-    saved_count = collector.update_news(newsapi_key)
-    print(f"Scheduled update completed. Saved {saved_count} new articles.")
+    from read_snapshot import read_snapshot_path
+    from sharded_collection import collect_shard
     
-    # Commit volume changes
-    volume.commit()
+    volume.reload()
+    # Cursors are read from a private copy, so this container never writes the volume
+    work_dir = tempfile.mkdtemp()
+    db_path = os.path.join(work_dir, "news_data.db")
+    snapshot = read_snapshot_path("/data/news_data.db")
+    shutil.copyfile(snapshot if os.path.exists(snapshot) else "/data/news_data.db", db_path)
+    path = collect_shard(shard, shards, os.path.join(work_dir, "batches"), db_path, run_id)
+    with open(path, 'rb') as f:
+        return os.path.basename(path), f.read()
+
+def update_news_sharded_request(db_path: str, request: dict):
+    """Daemon side of ``update_news_sharded``: fan out, then merge here under the collection lease"""
+    import tempfile
     
-    return saved_count
+    from sharded_collection import merge_batches, new_run_id
+    from collection_lease import run_single_flight
+    
+    shards = request.get('shards', 4)
+    
+    def collect_and_merge():
+        run_id = new_run_id()
+        with tempfile.TemporaryDirectory() as batch_dir:
+            calls = [(shard, shards, run_id) for shard in range(shards)]
+            for name, data in collect_news_shard.starmap(calls):
+                with open(os.path.join(batch_dir, name), 'wb') as f:
+                    f.write(data)
+            print(f"Collected {shards} shard batch files")
+            return merge_batches(batch_dir, db_path)
+    
+    saved_count, total = run_single_flight(db_path, "update_news_sharded", collect_and_merge)
+    print(f"Sharded update completed. Saved {saved_count} of {total} unique articles.")
+
+@app.function(volumes={"/data": volume})
+def update_news_sharded(shards: int = 4):
+    """Queue a comprehensive collection fanned out over ``shards`` containers
+
+    The ingest daemon runs it and merges the batches into its own database.
+    Run with ``modal run serve_streamlit.py::update_news_sharded --shards 8``.
+    """
+    import sys
+    sys.path.append('/root')
+    
+    from ingest_daemon import daemon_is_alive
+    
+    write_queue.put({'op': 'update_news_sharded', 'shards': shards})
+    print(f"Queued a sharded update over {shards} shards for the ingest daemon")
+    volume.reload()
+    if not daemon_is_alive("/data/news_data.db"):
+        print("Ingest daemon not running, starting it...")
+        run_ingest_daemon.spawn()
 
 # Web server function
 @app.function(
@@ -68,26 +245,37 @@ def run():
     import sys
     sys.path.append('/root')
     
-    # Initialize database if it doesn't exist
-    from news_collector import NegativeNewsCollector
-    collector = NegativeNewsCollector("/data/news_data.db")
-    
-    # Run initial data collection if database is empty
-    try:
-        news_data = collector.get_recent_news(30)
-        if not news_data:
-            print("Database empty, running initial collection...")
-            collector.update_news()
-            volume.commit()
-    except Exception as e:
-        print(f"Initial setup error: {e}")
+    from news_store import NewsReader
     
     # Set environment variables for Streamlit
     os.environ['STREAMLIT_BROWSER_GATHERUSAGESTATS'] = 'false'
     os.environ['STREAMLIT_SERVER_HEADLESS'] = 'true'
+    # Sessions read a local copy of what the daemon published, never the volume
+    keep_read_copy_fresh()
+    os.environ['NEWS_DB_PATH'] = LOCAL_DB_PATH
+    # The dashboard queues its writes (watchlists, manual updates) for the daemon
+    os.environ['NEWS_WRITE_QUEUE'] = WRITE_QUEUE_NAME
     
+    # Start serving existing data right away
     cmd = f"streamlit run /root/app.py --server.port 8000 --server.enableCORS=false --server.enableXsrfProtection=false --server.headless=true"
     subprocess.Popen(shlex.split(cmd))
+    
+    # Ask the daemon for an initial collection if the database is empty
+    if not NewsReader(LOCAL_DB_PATH).has_articles(30):
+        print("Database empty, queueing an initial collection...")
+        write_queue.put({'op': 'update_news'})
+
+# Read-only JSON API for other services (see news_api.py for the endpoints)
+@app.function(
+    volumes={"/data": volume},
+    allow_concurrent_inputs=100,
+)
+@modal.web_server(8080)
+def api():
+    """Run the HTTP JSON API over a local copy of the published database"""
+    keep_read_copy_fresh()
+    cmd = f"python /root/news_api.py --db {LOCAL_DB_PATH} --port 8080"
+    subprocess.Popen(shlex.split(cmd), cwd="/root")
 
 if __name__ == "__main__":
     app.serve()
\ No newline at end of file
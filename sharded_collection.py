@@ -0,0 +1,220 @@
+"""
+Sharded Collection
+Splits the comprehensive collector's RSS catalog across N workers by a stable
+hash of each feed URL. Workers may be local processes or separate nodes that
+share a batch directory; each fetches and scores only its own feeds and writes
+one gzipped JSON-lines batch file instead of touching the database. A merge
+step then dedups across shards, bulk-loads the articles in one transaction,
+advances the feed cursors and refreshes the snapshots. The APIs and social
+sources are fetched once, by shard 0.
+"""
+
+import os
+import glob
+import gzip
+import json
+import hashlib
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from article_record import ArticleRecord
+from collector_metrics import CollectionMetrics
+from collection_lease import run_single_flight, call_key
+from enhanced_collector import EnhancedNegativeNewsCollector
+
+BATCH_SUFFIX = ".jsonl.gz"
+
+
+def shard_of(feed_url: str, shards: int) -> int:
+    """Shard that owns ``feed_url``; the same in every process and on every node"""
+    digest = hashlib.sha1(feed_url.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+
+def feeds_for_shard(feeds: List[str], shard: int, shards: int) -> List[str]:
+    return [feed_url for feed_url in feeds if shard_of(feed_url, shards) == shard]
+
+
+def default_batch_dir(db_path: str) -> str:
+    """``NEWS_BATCH_DIR``, or a ``batches/`` directory next to the database"""
+    return os.getenv("NEWS_BATCH_DIR") or os.path.join(os.path.dirname(os.path.abspath(db_path)), "batches")
+
+
+def new_run_id() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def batch_path(batch_dir: str, run_id: str, shard: int, shards: int) -> str:
+    return os.path.join(batch_dir, f"{run_id}-shard{shard:03d}of{shards:03d}{BATCH_SUFFIX}")
+
+
+def collect_shard(shard: int, shards: int, batch_dir: str, db_path: str = "news_data.db",
+                  run_id: str = None, configure: Callable = None) -> str:
+    """Fetch one shard's feeds and write its batch file; returns the file's path.
+
+    The database is only read (for the feed cursors), so workers on other
+    nodes can point at a copy. ``configure`` is called with the collector
+    before fetching, e.g. to swap in a different feed catalog.
+    """
+    run_id = run_id or new_run_id()
+    collector = EnhancedNegativeNewsCollector(db_path)
+    if configure:
+        configure(collector)
+    collector.metrics = CollectionMetrics("enhanced_collector", "collect_shard")
+    collector.last_seen = collector.feed_state.load_last_seen()
+    collector.feed_cursors = {}
+
+    feeds = feeds_for_shard(collector.all_rss_feeds(), shard, shards)
+    print(f"🧩 Shard {shard + 1}/{shards}: {len(feeds)} feeds")
+    articles = collector.collect_articles(feeds, include_apis=shard == 0, include_social=shard == 0)
+    summary = collector.metrics.finish()
+
+    os.makedirs(batch_dir, exist_ok=True)
+    path = batch_path(batch_dir, run_id, shard, shards)
+    header = {
+        'run_id': run_id,
+        'shard': shard,
+        'shards': shards,
+        'feeds': len(feeds),
+        'articles': len(articles),
+        'feed_cursors': collector.feed_cursors,
+        'elapsed_s': summary['elapsed_s'],
+        'stages': summary['stages'],
+    }
+    # Written under a temporary name so a merge never reads a partial batch
+    with gzip.open(path + ".tmp", 'wt', encoding='utf-8', compresslevel=5) as f:
+        f.write(json.dumps(header) + "\n")
+        for article in articles:
+            f.write(json.dumps(article.as_dict(), separators=(',', ':')) + "\n")
+    os.replace(path + ".tmp", path)
+    print(f"📦 Shard {shard + 1}/{shards} wrote {len(articles)} articles to {path}")
+    return path
+
+
+def read_batch(path: str) -> Tuple[Dict, List[ArticleRecord]]:
+    """Header and articles of one batch file"""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        articles = [ArticleRecord(**json.loads(line)) for line in f if line.strip()]
+    return header, articles
+
+
+def merge_batches(batch_dir: str, db_path: str = "news_data.db", metrics: CollectionMetrics = None) -> Tuple[int, int]:
+    """Dedup every complete batch file in ``batch_dir`` and load it into the database.
+
+    Batch files are removed only after the save commits; merging a file twice
+    is harmless because inserts ignore links already stored. Returns
+    ``(saved, total)`` like ``comprehensive_update``.
+    """
+    paths = sorted(glob.glob(os.path.join(batch_dir, f"*{BATCH_SUFFIX}")))
+    if not paths:
+        print(f"No batch files in {batch_dir}")
+        return 0, 0
+
+    collector = EnhancedNegativeNewsCollector(db_path)
+    collector.metrics = metrics or CollectionMetrics("enhanced_collector", "merge_batches")
+
+    all_articles = []
+    feed_cursors = {}
+    runs = {}
+    with collector.metrics.stage('merge_read'):
+        for path in paths:
+            header, articles = read_batch(path)
+            all_articles.extend(articles)
+            for feed_url, cursor in header['feed_cursors'].items():
+                if cursor is not None and cursor > (feed_cursors.get(feed_url) or 0):
+                    feed_cursors[feed_url] = cursor
+            runs.setdefault(header['run_id'], (header['shards'], set()))[1].add(header['shard'])
+    for run_id, (shards, present) in sorted(runs.items()):
+        if len(present) < shards:
+            print(f"⚠️  Run {run_id}: merging {len(present)}/{shards} shards (the rest can be merged later)")
+
+    with collector.metrics.stage('dedup'):
+        unique_articles = []
+        seen_urls = set()
+        for article in all_articles:
+            if article.link not in seen_urls and article.link:
+                unique_articles.append(article)
+                seen_urls.add(article.link)
+    collector.metrics.count('articles_unique', len(unique_articles))
+    print(f"📊 {len(paths)} batch file(s): {len(all_articles)} articles, {len(unique_articles)} unique")
+
+    with collector.metrics.stage('db_write'):
+        saved_count = collector.save_articles(unique_articles)
+        collector.feed_state.update_last_seen(feed_cursors)
+    for path in paths:
+        os.remove(path)
+    with collector.metrics.stage('snapshot'):
+        collector.refresh_snapshots()
+    with collector.metrics.stage('notify'):
+        collector.notify_watchlists()
+    collector.metrics.count('rows_inserted', saved_count)
+    if metrics is None:
+        collector.metrics.finish()
+    print(f"💾 Saved {saved_count} new articles to database")
+    return saved_count, len(unique_articles)
+
+
+def run_sharded(workers: int, db_path: str = "news_data.db", batch_dir: str = None,
+                configure: Callable = None, metrics: CollectionMetrics = None) -> Tuple[int, int]:
+    """Collect with ``workers`` local processes, one shard each, then merge.
+
+    Stage timings go to ``metrics`` when given (``collect_shards`` plus the
+    merge stages); otherwise the run is published to the metrics registry.
+    Runs under the database's collection lease.
+    """
+    batch_dir = batch_dir or default_batch_dir(db_path)
+    return run_single_flight(
+        db_path, "run_sharded", lambda: _run_sharded(workers, db_path, batch_dir, configure, metrics),
+        call_key("run_sharded", (workers, batch_dir), {})
+    )
+
+
+def _run_sharded(workers: int, db_path: str, batch_dir: str, configure: Callable,
+                 metrics: CollectionMetrics) -> Tuple[int, int]:
+    run_id = new_run_id()
+    run_metrics = metrics or CollectionMetrics("enhanced_collector", "run_sharded")
+    # Create or migrate the schema once, before the workers open the database
+    EnhancedNegativeNewsCollector(db_path)
+
+    with run_metrics.stage('collect_shards'):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(collect_shard, shard, workers, batch_dir, db_path, run_id, configure)
+                       for shard in range(workers)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Shard failed: {e}")
+    print(f"⏱️  {workers} shard(s) collected in {run_metrics.stages['collect_shards']:.1f}s")
+    result = merge_batches(batch_dir, db_path, run_metrics)
+    if metrics is None:
+        run_metrics.finish()
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sharded comprehensive collection")
+    parser.add_argument("--db", default=os.getenv("NEWS_DB_PATH", "news_data.db"))
+    parser.add_argument("--batch-dir", help="shared directory for batch files (default: batches/ next to the database)")
+    parser.add_argument("--workers", type=int, default=4, help="local worker processes (one shard each), then merge")
+    parser.add_argument("--shard", type=int, help="collect only this shard (0-based) and exit; for multi-node runs")
+    parser.add_argument("--shards", type=int, help="total shards when running with --shard")
+    parser.add_argument("--run-id", help="label shared by every shard of one multi-node run")
+    parser.add_argument("--merge", action="store_true", help="merge the batch files and load them into the database")
+    args = parser.parse_args()
+
+    batch_dir = args.batch_dir or default_batch_dir(args.db)
+    if args.shard is not None:
+        if not args.shards or not 0 <= args.shard < args.shards:
+            parser.error("--shard needs --shards greater than it")
+        collect_shard(args.shard, args.shards, batch_dir, args.db, args.run_id)
+    elif args.merge:
+        saved, total = merge_batches(batch_dir, args.db)
+        print(f"\n🏁 MERGE COMPLETE: {saved} saved of {total} unique articles")
+    else:
+        saved, total = run_sharded(args.workers, args.db, batch_dir)
+        print(f"\n🏁 SHARDED COLLECTION COMPLETE: {saved} saved of {total} unique articles")
@@ -0,0 +1,316 @@
+"""
+Story Clusters
+Incremental grouping of articles that report the same crisis event. Each
+saved article is turned into a sparse TF-IDF vector (title terms weighted
+double) and compared by cosine similarity with the articles published in a
+sliding window; it joins the story of its closest match above a threshold or
+opens a new story. Articles are tokenized and counted a chunk at a time
+and the window's vectors stay in memory between saves, so clustering costs
+a few sparse matrix products per batch at ingest time and nothing at read
+time.
+"""
+
+import os
+import re
+import math
+import time
+import sqlite3
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+# Articles published this long ago or less are candidates for a new article's story
+STORY_WINDOW_HOURS = float(os.getenv("NEWS_STORY_WINDOW_HOURS", "72"))
+# Minimum cosine similarity to join an existing story
+STORY_SIMILARITY = float(os.getenv("NEWS_STORY_SIMILARITY", "0.35"))
+TITLE_WEIGHT = 2
+# Terms in more than this share of the window (and at least MIN_COMMON_DOCS
+# articles) are treated as stopwords
+MAX_DOC_SHARE = 0.05
+MIN_COMMON_DOCS = 25
+# Articles matched per sparse product; bounds memory on bulk saves
+CHUNK_SIZE = 512
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset('''
+a about after again against all also an and any are as at be because been before being between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his
+how i if in into is it its just more most my new news no nor not now of off on once only or other our out over
+own report reports said same says she should so some such than that the their them then there these they this
+those through to too under until up very was we were what when where which while who whom why will with would
+you your
+'''.split())
+
+
+def story_tokens(title: str, description: str) -> List[str]:
+    """An article's tokens; title tokens are repeated ``TITLE_WEIGHT`` times"""
+    return TOKEN_RE.findall((title or '').lower()) * TITLE_WEIGHT + TOKEN_RE.findall((description or '').lower())
+
+
+class Vocabulary(dict):
+    """Term -> column; a term seen for the first time gets the next column
+    (stopwords and tokens too short to count map to -1)"""
+
+    def __init__(self):
+        super().__init__(dict.fromkeys(STOPWORDS, -1))
+        self.size = 0
+
+    def __missing__(self, term: str) -> int:
+        column = -1
+        if len(term) > 2:
+            column, self.size = self.size, self.size + 1
+        self[term] = column
+        return column
+
+
+def create_story_tables(conn: sqlite3.Connection):
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS stories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        link TEXT,
+        first_published_at REAL,
+        last_published_at REAL,
+        article_count INTEGER DEFAULT 0,
+        source_count INTEGER DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS story_sources (
+        story_id INTEGER NOT NULL,
+        source TEXT NOT NULL,
+        PRIMARY KEY (story_id, source)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_stories_last_published_at ON stories (last_published_at);
+    ''')
+
+
+class StoryClusterer:
+    """Sliding window of article vectors that assigns new articles to stories"""
+
+    def __init__(self, window_hours: float = None, threshold: float = None):
+        self.window = (STORY_WINDOW_HOURS if window_hours is None else window_hours) * 3600
+        self.threshold = STORY_SIMILARITY if threshold is None else threshold
+        self.vocabulary = Vocabulary()
+        self.doc_freq = np.zeros(0, dtype=np.int64)
+        # article id -> (story id, published_at, term columns, term counts)
+        self.docs: Dict[int, Tuple] = {}
+        self.loaded_through = 0
+        # Sublinear term frequencies of the window (and their squares) with each
+        # row's story id, in blocks oldest first; articles added since are
+        # appended at the next match
+        self.blocks = None
+        self.unindexed: List[int] = []
+
+    def _vectorize(self, texts: List[Tuple[str, str]]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Sorted vocabulary columns and term counts of each ``(title, description)``,
+        growing the vocabulary. Terms are looked up once per token and counted for
+        the whole batch with one ``np.unique``."""
+        column_of = self.vocabulary.__getitem__
+        columns, lengths = [], []
+        for title, description in texts:
+            token_columns = list(map(column_of, story_tokens(title, description)))
+            columns.extend(token_columns)
+            lengths.append(len(token_columns))
+        # The -1 columns (stopwords) are kept until here so lengths stay per article
+        term_count = self.vocabulary.size
+        vocabulary_size = max(term_count, 1)
+        if len(self.doc_freq) < term_count:
+            self.doc_freq = np.concatenate([self.doc_freq, np.zeros(term_count - len(self.doc_freq), np.int64)])
+        columns = np.array(columns, dtype=np.int64)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        counted = columns >= 0
+        keys, counts = np.unique(rows[counted] * vocabulary_size + columns[counted], return_counts=True)
+        bounds = np.searchsorted(keys, np.arange(len(texts) + 1, dtype=np.int64) * vocabulary_size)
+        term_columns, term_counts = keys % vocabulary_size, counts.astype(np.float64)
+        return [(term_columns[bounds[i]:bounds[i + 1]], term_counts[bounds[i]:bounds[i + 1]])
+                for i in range(len(texts))]
+
+    def _add(self, article_ids: List[int], story_ids: List[int], published: List[float],
+             vectors: List[Tuple[np.ndarray, np.ndarray]]):
+        docs = self.docs
+        added = []
+        for article_id, story_id, published_at, (columns, counts) in zip(article_ids, story_ids, published, vectors):
+            if len(columns):
+                docs[article_id] = (story_id, published_at or 0.0, columns, counts)
+                self.unindexed.append(article_id)
+                added.append(columns)
+        if added:
+            self.doc_freq += np.bincount(np.concatenate(added), minlength=len(self.doc_freq))
+
+    def _expire(self, cutoff: float):
+        expired = [a for a, doc in self.docs.items() if doc[1] < cutoff]
+        if expired:
+            columns = np.concatenate([self.docs.pop(article_id)[2] for article_id in expired])
+            self.doc_freq -= np.bincount(columns, minlength=len(self.doc_freq))
+            # Rebuilt from the remaining articles at the next match
+            self.blocks = None
+
+    def _load(self, cursor: sqlite3.Cursor, cutoff: float):
+        """Pick up clustered articles saved since the last call (by any writer)"""
+        rows = cursor.execute('''
+        SELECT id, story_id, published_at, title, description FROM negative_news
+        WHERE id > ? AND story_id IS NOT NULL AND published_at >= ?
+        ''', (self.loaded_through, cutoff)).fetchall()
+        rows = [row for row in rows if row[0] not in self.docs]
+        if rows:
+            vectors = self._vectorize([(title, description) for _, _, _, title, description in rows])
+            self._add([row[0] for row in rows], [row[1] for row in rows], [row[2] for row in rows], vectors)
+        max_id = cursor.execute("SELECT COALESCE(MAX(id), 0) FROM negative_news").fetchone()[0]
+        self.loaded_through = max(self.loaded_through, max_id)
+
+    def _tf_rows(self, vectors: List[Tuple[np.ndarray, np.ndarray]]) -> sparse.csr_matrix:
+        """Sublinear term-frequency rows (1 + log count) over the current vocabulary"""
+        lengths = [len(columns) for columns, _ in vectors]
+        indptr = np.zeros(len(vectors) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(lengths)
+        if not indptr[-1]:
+            return sparse.csr_matrix((len(vectors), len(self.doc_freq)))
+        indices = np.concatenate([columns for columns, _ in vectors])
+        data = 1.0 + np.log(np.concatenate([counts for _, counts in vectors]))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(vectors), len(self.doc_freq)))
+
+    def _window(self) -> List[Tuple[sparse.csr_matrix, sparse.csr_matrix, np.ndarray]]:
+        """The window's blocks, extended with articles added since the last call.
+        A block is merged into the one before it once it is as large, so each
+        row is copied a logarithmic number of times as the window grows."""
+        if self.blocks is None:
+            self.blocks = []
+            self.unindexed = list(self.docs)
+        width = len(self.doc_freq)
+        for tf, tf_squared, _ in self.blocks:
+            if tf.shape[1] < width:
+                tf.resize((tf.shape[0], width))
+                tf_squared.resize((tf_squared.shape[0], width))
+        if self.unindexed:
+            block = self._tf_rows([self.docs[a][2:] for a in self.unindexed])
+            self.blocks.append((block, block.multiply(block).tocsr(),
+                                np.array([self.docs[a][0] for a in self.unindexed], dtype=np.int64)))
+            self.unindexed = []
+            while len(self.blocks) > 1 and self.blocks[-2][0].shape[0] <= self.blocks[-1][0].shape[0]:
+                newer, older = self.blocks.pop(), self.blocks.pop()
+                self.blocks.append((sparse.vstack([older[0], newer[0]], format='csr'),
+                                    sparse.vstack([older[1], newer[1]], format='csr'),
+                                    np.concatenate([older[2], newer[2]])))
+        return self.blocks
+
+    def assign(self, cursor: sqlite3.Cursor, articles: List[Tuple[int, object]]) -> Dict[int, int]:
+        """Give each ``(article_id, article)`` just inserted a story id and record it.
+
+        ``article`` may be an ArticleRecord or a dict with title, link,
+        description, source and published_at. Runs inside the caller's
+        transaction. Returns ``{article_id: story_id}``.
+        """
+        if not articles:
+            return {}
+        cutoff = time.time() - self.window
+        self._load(cursor, cutoff)
+        self._expire(cutoff)
+
+        articles = sorted(articles, key=lambda item: item[1]['published_at'] or 0.0)
+        assignments = {}
+        # Stories opened by this batch, inserted together by _record; until then
+        # the k-th one goes by the placeholder id -(k + 1)
+        new_stories = []
+        for start in range(0, len(articles), CHUNK_SIZE):
+            self._assign_chunk(articles[start:start + CHUNK_SIZE], assignments, new_stories)
+        self._record(cursor, articles, assignments, new_stories)
+        return assignments
+
+    def _assign_chunk(self, articles: List[Tuple[int, object]], assignments: Dict[int, int], new_stories: List):
+        chunk = self._vectorize([(article['title'], article['description']) for _, article in articles])
+
+        # One IDF for the whole chunk: window documents plus the new ones. Terms
+        # in a large share of the window say nothing about the event; drop them
+        doc_freq = (self.doc_freq + np.bincount(np.concatenate([columns for columns, _ in chunk]),
+                                                minlength=len(self.doc_freq))).astype(np.float64)
+        total = len(self.docs) + len(chunk)
+        idf = np.log((1.0 + total) / (1.0 + doc_freq)) + 1.0
+        idf[doc_freq > max(MIN_COMMON_DOCS, MAX_DOC_SHARE * total)] = 0.0
+        idf_diag = sparse.diags(idf)
+
+        # L2-normalised TF-IDF rows for the new articles
+        chunk_matrix = (self._tf_rows(chunk) @ idf_diag).tocsr()
+        chunk_matrix.eliminate_zeros()
+        norms = np.sqrt(np.asarray(chunk_matrix.multiply(chunk_matrix).sum(axis=1)).ravel())
+        norms[norms == 0.0] = 1.0
+        chunk_matrix = (sparse.diags(1.0 / norms) @ chunk_matrix).tocsr()
+
+        # Cosine against the window without materialising its TF-IDF rows:
+        # weight the new side by IDF once more and divide by the window norms.
+        # The best match is the first highest-scoring row, oldest block first
+        query = (chunk_matrix @ idf_diag).T.tocsc()
+        idf_squared = idf * idf
+        window_story = np.zeros(len(chunk), dtype=np.int64)
+        window_score = np.zeros(len(chunk))
+        for tf, tf_squared, stories in self._window():
+            window_norms = np.sqrt(tf_squared @ idf_squared)
+            window_norms[window_norms == 0.0] = np.inf
+            block_sim = (sparse.diags(1.0 / window_norms) @ (tf @ query)).T.tocsr()
+            block_score = block_sim.max(axis=1).toarray().ravel()
+            better = block_score > window_score
+            window_story[better] = stories[np.asarray(block_sim.argmax(axis=1)).ravel()[better]]
+            window_score[better] = block_score[better]
+        chunk_sim = (chunk_matrix @ chunk_matrix.T).toarray()
+
+        chunk_stories = []
+        for i, (article_id, article) in enumerate(articles):
+            story_id, score = None, self.threshold
+            if window_score[i] >= score:
+                story_id, score = int(window_story[i]), window_score[i]
+            if i:
+                j = int(chunk_sim[i, :i].argmax())
+                if chunk_sim[i, j] >= score:
+                    story_id = chunk_stories[j]
+            if story_id is None:
+                new_stories.append(article)
+                story_id = -len(new_stories)
+            chunk_stories.append(story_id)
+            assignments[article_id] = story_id
+        self._add([article_id for article_id, _ in articles], chunk_stories,
+                  [article['published_at'] for _, article in articles], chunk)
+
+    def _record(self, cursor: sqlite3.Cursor, articles: List[Tuple[int, object]], assignments: Dict[int, int],
+                new_stories: List):
+        touched = {}
+        for article_id, article in articles:
+            count, latest, sources = touched.get(assignments[article_id], (0, -math.inf, set()))
+            sources.add(article['source'] or '')
+            touched[assignments[article_id]] = (count + 1, max(latest, article['published_at'] or 0.0), sources)
+
+        if new_stories:
+            # New stories are written once with their final counts. The caller's
+            # transaction holds the write lock, so the newest ids are ours
+            cursor.executemany('''
+            INSERT INTO stories (title, link, first_published_at, last_published_at, article_count, source_count)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(article['title'], article['link'], article['published_at'], touched[-k][1], touched[-k][0],
+                   len(touched[-k][2])) for k, article in enumerate(new_stories, 1)])
+            story_ids = np.array([row[0] for row in cursor.execute(
+                "SELECT id FROM stories ORDER BY id DESC LIMIT ?", (len(new_stories),)
+            )][::-1], dtype=np.int64)
+            self._resolve(story_ids, assignments)
+
+        cursor.executemany("UPDATE negative_news SET story_id = ? WHERE id = ?",
+                           [(story_id, article_id) for article_id, story_id in sorted(assignments.items())])
+        cursor.executemany("INSERT OR IGNORE INTO story_sources (story_id, source) VALUES (?, ?)",
+                           [(assignments[article_id], article['source'] or '') for article_id, article in articles])
+        cursor.executemany('''
+        UPDATE stories SET
+            article_count = article_count + ?,
+            last_published_at = MAX(COALESCE(last_published_at, 0), ?),
+            source_count = (SELECT COUNT(*) FROM story_sources WHERE story_id = stories.id)
+        WHERE id = ?
+        ''', [(count, latest, story_id) for story_id, (count, latest, _) in touched.items() if story_id > 0])
+
+    def _resolve(self, story_ids: np.ndarray, assignments: Dict[int, int]):
+        """Replace placeholder story ids with the inserted ones"""
+        for article_id, story_id in assignments.items():
+            if story_id < 0:
+                assignments[article_id] = int(story_ids[-story_id - 1])
+                doc = self.docs.get(article_id)
+                if doc is not None:
+                    self.docs[article_id] = (assignments[article_id],) + doc[1:]
+        for _, _, stories in self.blocks or []:
+            placeholders = stories < 0
+            if placeholders.any():
+                stories[placeholders] = story_ids[-stories[placeholders] - 1]
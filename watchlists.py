@@ -0,0 +1,363 @@
+"""
+Watchlists
+Named standing queries evaluated on each batch of new articles at ingest. A
+watchlist combines keyword, category, source, company and maximum-sentiment
+predicates: an article must satisfy every predicate the watchlist sets, and
+any one value within each. All enabled watchlists are compiled into one
+matcher (every watched keyword indexed by its first letters, plus lookup
+tables from category, source and company to the watchlists naming them), so
+an article costs one pass over its words and a few lookups however many
+watchlists exist. Matches are
+queued in the notification_outbox table inside the saving transaction and
+delivered afterwards to a local webhook and/or a JSON-lines file.
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from company_entities import canonical_company
+
+# Where matches are delivered; with neither set they wait in the outbox
+WEBHOOK_URL = os.getenv("NEWS_WATCHLIST_WEBHOOK_URL")
+NOTIFICATION_FILE = os.getenv("NEWS_WATCHLIST_FILE")
+# Outbox rows sent per sink call, and failed sends before a row is given up on
+DELIVERY_BATCH = 200
+MAX_ATTEMPTS = 5
+# Delivered notifications are kept this long (the dashboard's longest window)
+OUTBOX_RETENTION_DAYS = 30
+
+PREDICATES = ('keywords', 'categories', 'sources', 'companies')
+# Keywords match at the start of a word and may run on ("layoff" matches "layoffs")
+WORD_START = re.compile(r"\b\w")
+KEYWORD_HEAD = 3
+
+
+def create_watchlist_tables(conn: sqlite3.Connection):
+    conn.executescript('''
+    CREATE TABLE IF NOT EXISTS watchlists (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL,
+        keywords TEXT NOT NULL DEFAULT '[]',
+        categories TEXT NOT NULL DEFAULT '[]',
+        sources TEXT NOT NULL DEFAULT '[]',
+        companies TEXT NOT NULL DEFAULT '[]',
+        max_sentiment REAL,
+        enabled INTEGER NOT NULL DEFAULT 1,
+        updated_at REAL NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS notification_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        watchlist_id INTEGER NOT NULL,
+        article_id INTEGER NOT NULL,
+        payload TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        delivered_at REAL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (watchlist_id, article_id)
+    );
+    CREATE INDEX IF NOT EXISTS idx_notification_outbox_pending ON notification_outbox (id) WHERE delivered_at IS NULL;
+    CREATE INDEX IF NOT EXISTS idx_notification_outbox_delivered_at ON notification_outbox (delivered_at);
+    ''')
+
+
+class Watchlist:
+    """One named standing query; empty predicates match anything"""
+
+    __slots__ = ('id', 'name', 'keywords', 'categories', 'sources', 'companies', 'max_sentiment')
+
+    def __init__(self, name: str, keywords: Iterable[str] = (), categories: Iterable[str] = (),
+                 sources: Iterable[str] = (), companies: Iterable[str] = (), max_sentiment: float = None,
+                 id: int = None):
+        self.id = id
+        self.name = name.strip()
+        self.keywords = _distinct(k.lower() for k in keywords)
+        self.categories = _distinct(c.lower() for c in categories)
+        self.sources = _distinct(s.lower() for s in sources)
+        self.companies = _distinct(canonical_company(c) for c in companies)
+        self.max_sentiment = max_sentiment
+
+    def is_empty(self) -> bool:
+        return self.max_sentiment is None and not any(getattr(self, p) for p in PREDICATES)
+
+    def as_dict(self) -> Dict:
+        return {'id': self.id, 'name': self.name, 'max_sentiment': self.max_sentiment,
+                **{p: list(getattr(self, p)) for p in PREDICATES}}
+
+
+def _distinct(values: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(v.strip() for v in values if v and v.strip()))
+
+
+def check_watchlist(watchlist: Watchlist):
+    """Raise ValueError for a watchlist that can't be saved"""
+    if not watchlist.name:
+        raise ValueError("A watchlist needs a name")
+    if watchlist.is_empty():
+        raise ValueError(f"Watchlist '{watchlist.name}' has no predicates and would match every article")
+
+
+def save_watchlist(conn: sqlite3.Connection, watchlist: Watchlist) -> int:
+    """Create or replace the watchlist with this name; returns its id"""
+    check_watchlist(watchlist)
+    conn.execute('''
+    INSERT INTO watchlists (name, keywords, categories, sources, companies, max_sentiment, enabled, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, 1, ?)
+    ON CONFLICT (name) DO UPDATE SET
+        keywords = excluded.keywords, categories = excluded.categories, sources = excluded.sources,
+        companies = excluded.companies, max_sentiment = excluded.max_sentiment, enabled = 1,
+        updated_at = excluded.updated_at
+    ''', (watchlist.name, *(json.dumps(list(getattr(watchlist, p))) for p in PREDICATES),
+          watchlist.max_sentiment, time.time()))
+    conn.commit()
+    watchlist.id = conn.execute("SELECT id FROM watchlists WHERE name = ?", (watchlist.name,)).fetchone()[0]
+    return watchlist.id
+
+
+def delete_watchlist(conn: sqlite3.Connection, name: str) -> bool:
+    """Remove a watchlist and its undelivered notifications"""
+    row = conn.execute("SELECT id FROM watchlists WHERE name = ?", (name,)).fetchone()
+    if not row:
+        return False
+    conn.execute("DELETE FROM notification_outbox WHERE watchlist_id = ? AND delivered_at IS NULL", row)
+    conn.execute("DELETE FROM watchlists WHERE id = ?", row)
+    conn.commit()
+    return True
+
+
+def load_watchlists(conn: sqlite3.Connection) -> List[Watchlist]:
+    """Enabled watchlists by name (none if the database predates them)"""
+    try:
+        rows = conn.execute('''
+        SELECT id, name, keywords, categories, sources, companies, max_sentiment
+        FROM watchlists WHERE enabled = 1 ORDER BY name
+        ''').fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [Watchlist(name, *(json.loads(value) for value in values), max_sentiment=max_sentiment, id=id)
+            for id, name, *values, max_sentiment in rows]
+
+
+class WatchlistMatcher:
+    """All enabled watchlists compiled into lookup tables, recompiled when they change"""
+
+    def __init__(self):
+        self.version = None
+        self.watchlists: Dict[int, Watchlist] = {}
+        # First letters of the watched keywords -> the keywords starting with them
+        self.keyword_heads: Dict[str, Tuple[str, ...]] = {}
+        self.head_lengths: Tuple[int, ...] = ()
+        # Predicate -> value -> ids of the watchlists requiring it
+        self.index: Dict[str, Dict[str, Set[int]]] = {p: {} for p in PREDICATES}
+        # Watchlists with only a sentiment bound
+        self.sentiment_only: Set[int] = set()
+
+    def _refresh(self, cursor: sqlite3.Cursor):
+        """Recompile if a watchlist was added, changed or removed since the last batch"""
+        version = cursor.execute("SELECT COUNT(*), MAX(updated_at) FROM watchlists WHERE enabled = 1").fetchone()
+        if version == self.version:
+            return
+        self.version = version
+        self._compile(load_watchlists(cursor.connection))
+
+    def _compile(self, watchlists: List[Watchlist]):
+        self.watchlists = {w.id: w for w in watchlists}
+        self.index = {p: {} for p in PREDICATES}
+        self.sentiment_only = set()
+        for watchlist in watchlists:
+            for predicate in PREDICATES:
+                for value in getattr(watchlist, predicate):
+                    self.index[predicate].setdefault(value, set()).add(watchlist.id)
+            if not any(getattr(watchlist, p) for p in PREDICATES):
+                self.sentiment_only.add(watchlist.id)
+
+        # One alternation of every keyword is far slower in ``re`` than a dict
+        # probe per word; only keywords sharing a word's first letters are compared
+        heads: Dict[str, List[str]] = {}
+        for keyword in self.index['keywords']:
+            heads.setdefault(keyword[:KEYWORD_HEAD], []).append(keyword)
+        self.keyword_heads = {head: tuple(keywords) for head, keywords in heads.items()}
+        self.head_lengths = tuple(sorted({len(head) for head in heads}))
+
+    def matching(self, article, categories: Iterable[str], companies: Iterable[str]) -> List[int]:
+        """Ids of the watchlists an article satisfies"""
+        hits = {p: set() for p in PREDICATES}
+        index = self.index
+        if self.keyword_heads:
+            text = f"{article.title or ''} {article.description or ''}".lower()
+            heads = self.keyword_heads
+            found = set()
+            for match in WORD_START.finditer(text):
+                start = match.start()
+                for length in self.head_lengths:
+                    for keyword in heads.get(text[start:start + length], ()):
+                        if text.startswith(keyword, start):
+                            found.add(keyword)
+            for keyword in found:
+                hits['keywords'].update(index['keywords'][keyword])
+        for category in categories:
+            hits['categories'].update(index['categories'].get(category, ()))
+        hits['sources'].update(index['sources'].get((article.source or '').lower(), ()))
+        for company in companies:
+            hits['companies'].update(index['companies'].get(company, ()))
+
+        sentiment = article.sentiment_score or 0.0
+        matched = []
+        for watchlist_id in set().union(*hits.values(), self.sentiment_only):
+            watchlist = self.watchlists[watchlist_id]
+            if all(watchlist_id in hits[p] for p in PREDICATES if getattr(watchlist, p)) and \
+                    (watchlist.max_sentiment is None or sentiment <= watchlist.max_sentiment):
+                matched.append(watchlist_id)
+        return matched
+
+    def match(self, cursor: sqlite3.Cursor, articles: List[Tuple[int, object, Tuple, Tuple]]) -> int:
+        """Queue a notification for every watchlist each ``(article_id, article,
+        categories, companies)`` just inserted satisfies. Runs inside the caller's
+        transaction; returns the number queued."""
+        if not articles:
+            return 0
+        self._refresh(cursor)
+        if not self.watchlists:
+            return 0
+        now = time.time()
+        rows = []
+        for article_id, article, categories, companies in articles:
+            for watchlist_id in self.matching(article, categories, companies):
+                payload = {
+                    'watchlist': self.watchlists[watchlist_id].name, 'article_id': article_id,
+                    'title': article.title, 'link': article.link, 'source': article.source,
+                    'published_at': article.published_at, 'sentiment_score': article.sentiment_score,
+                    'categories': list(categories), 'companies': list(companies),
+                }
+                rows.append((watchlist_id, article_id, json.dumps(payload, separators=(',', ':')), now))
+        cursor.executemany('''
+        INSERT OR IGNORE INTO notification_outbox (watchlist_id, article_id, payload, created_at)
+        VALUES (?, ?, ?, ?)
+        ''', rows)
+        return len(rows)
+
+
+class FileSink:
+    """Appends each notification to a JSON-lines file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def send(self, notifications: List[Dict]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for notification in notifications:
+                f.write(json.dumps(notification) + '\n')
+
+
+class WebhookSink:
+    """POSTs each batch as ``{"notifications": [...]}`` to a local webhook"""
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, notifications: List[Dict]):
+        import requests
+        response = requests.post(self.url, json={'notifications': notifications}, timeout=self.timeout)
+        response.raise_for_status()
+
+
+def configured_sinks() -> List:
+    """Sinks named by NEWS_WATCHLIST_WEBHOOK_URL and NEWS_WATCHLIST_FILE"""
+    sinks = []
+    if WEBHOOK_URL:
+        sinks.append(WebhookSink(WEBHOOK_URL))
+    if NOTIFICATION_FILE:
+        sinks.append(FileSink(NOTIFICATION_FILE))
+    return sinks
+
+
+def deliver_notifications(db_path: str, sinks: Optional[List] = None) -> int:
+    """Send queued notifications to every sink, oldest first, and mark them delivered.
+
+    Delivery is at least once: a batch a sink rejects stays queued (each row
+    carries its outbox ``id`` for deduplication) and is retried on the next
+    call, up to ``MAX_ATTEMPTS`` times. Returns the number delivered.
+    """
+    sinks = configured_sinks() if sinks is None else sinks
+    if not sinks:
+        return 0
+    conn = sqlite3.connect(db_path, timeout=30)
+    delivered = 0
+    try:
+        after = 0
+        while True:
+            rows = conn.execute('''
+            SELECT id, payload FROM notification_outbox
+            WHERE delivered_at IS NULL AND attempts < ? AND id > ?
+            ORDER BY id LIMIT ?
+            ''', (MAX_ATTEMPTS, after, DELIVERY_BATCH)).fetchall()
+            if not rows:
+                break
+            ids = [(row[0],) for row in rows]
+            notifications = [{'id': outbox_id, **json.loads(payload)} for outbox_id, payload in rows]
+            try:
+                for sink in sinks:
+                    sink.send(notifications)
+            except Exception as e:
+                print(f"Notification delivery failed: {e}")
+                conn.executemany("UPDATE notification_outbox SET attempts = attempts + 1 WHERE id = ?", ids)
+                conn.commit()
+                break
+            conn.executemany("UPDATE notification_outbox SET delivered_at = ? WHERE id = ?",
+                             [(time.time(), outbox_id) for (outbox_id,) in ids])
+            conn.commit()
+            delivered += len(rows)
+            after = rows[-1][0]
+
+        conn.execute("DELETE FROM notification_outbox WHERE delivered_at < ?",
+                     (time.time() - OUTBOX_RETENTION_DAYS * 86400,))
+        conn.commit()
+    except sqlite3.OperationalError as e:
+        # Database predates watchlists
+        print(f"Notification delivery skipped: {e}")
+    finally:
+        conn.close()
+    return delivered
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage watchlists and deliver their notifications")
+    parser.add_argument("--db", default=os.getenv("NEWS_DB_PATH", "news_data.db"))
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="create or replace a watchlist")
+    add.add_argument("name")
+    add.add_argument("--keyword", action="append", default=[], help="matched in the title or description")
+    add.add_argument("--category", action="append", default=[], help="crisis category, e.g. layoffs")
+    add.add_argument("--source", action="append", default=[])
+    add.add_argument("--company", action="append", default=[], help="company name or alias")
+    add.add_argument("--max-sentiment", type=float, help="only articles at or below this sentiment")
+    remove = commands.add_parser("remove", help="delete a watchlist")
+    remove.add_argument("name")
+    commands.add_parser("list", help="show the enabled watchlists")
+    commands.add_parser("deliver", help="send queued notifications to the configured sinks")
+    args = parser.parse_args()
+
+    if args.command == "deliver":
+        print(f"📬 Delivered {deliver_notifications(args.db)} notifications")
+    else:
+        from news_schema import migrate_database
+        conn = sqlite3.connect(args.db)
+        try:
+            migrate_database(conn)
+            if args.command == "add":
+                watchlist = Watchlist(args.name, args.keyword, args.category, args.source, args.company,
+                                      args.max_sentiment)
+                print(f"👁️ Saved watchlist '{watchlist.name}' (id {save_watchlist(conn, watchlist)})")
+            elif args.command == "remove":
+                print(f"🗑️ Removed '{args.name}'" if delete_watchlist(conn, args.name) else f"No watchlist '{args.name}'")
+            else:
+                for watchlist in load_watchlists(conn):
+                    print(json.dumps(watchlist.as_dict()))
+        finally:
+            conn.close()